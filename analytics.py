@@ -0,0 +1,2256 @@
+"""📊 TİCARİ PORTFÖY ANALİZ MOTORU
+Streamlit'ten bağımsız analiz çekirdeği
+
+İÇERİK:
+- 📂 Veri yükleme ve şehir normalizasyonu
+- 🏢 Şehir / Brick / Bölge / Rakip performans analizleri
+- ⭐ BCG Matrix ve yatırım stratejisi
+- 🏙️ Şehir–Brick stratejik uyum analizi
+- 📈 Zaman serisi ve trend analizi
+- 🤖 ML feature engineering ve tahmin modelleri
+
+Bu modül import edildiğinde Streamlit başlatılmaz; zamanlanmış işler (cron)
+ve komut satırı (cli.py) tarafından doğrudan kullanılabilir.
+
+Ağır kütüphaneler (scikit-learn, scipy) modül seviyesinde değil, ilk
+kullanıldıkları fonksiyonda yüklenir (bkz. benchmarks/import_time.py).
+"""
+import logging
+import time
+from collections import deque
+
+import pandas as pd
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from model_registry import get_model_registry, series_fingerprint
+from training_scheduler import get_training_scheduler
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+PRODUCTS = ["TROCMETAM", "CORTIPOL", "DEKSAMETAZON", "PF IZOTONIK"]
+
+BCG_CATEGORIES = ["⭐ Star", "🐄 Cash Cow", "❓ Question Mark", "🐶 Dog"]
+
+FIX_CITY_MAP = {
+    "AGRI": "AĞRI",
+    "BARTÄ±N": "BARTIN",
+    "BARTIN": "BARTIN",
+    "BINGÃ¶L": "BİNGÖL",
+    "BINGOL": "BİNGÖL",
+    "DÃ¼ZCE": "DÜZCE",
+    "DÃ1⁄4ZCE": "DÜZCE",
+    "DUZCE": "DÜZCE",
+    "DÜZCE": "DÜZCE",
+    "ELAZIG": "ELAZIĞ",
+    "ELAZIĞ": "ELAZIĞ",
+    "ESKISEHIR": "ESKİŞEHİR",
+    "ESKİŞEHİR": "ESKİŞEHİR",
+    "GÃ1⁄4MÃ1⁄4SHANE": "GÜMÜŞHANE",
+    "GÃ¼mÃ¼SHANE": "GÜMÜŞHANE",
+    "GÜMÜŞHANE": "GÜMÜŞHANE",
+    "HAKKARI": "HAKKARİ",
+    "HAKKARI": "HAKKARİ",
+    "HAKKARİ": "HAKKARİ",
+    "ISTANBUL": "İSTANBUL",
+    "İSTANBUL": "İSTANBUL",
+    "IZMIR": "İZMİR",
+    "İZMİR": "İZMİR",
+    "IÄ\x9fDIR": "IĞDIR",
+    "IĞDIR": "IĞDIR",
+    "KARABÃ1⁄4K": "KARABÜK",
+    "KARABÜK": "KARABÜK",
+    "KARABÃ¼K": "KARABÜK",
+    "KINKKALE": "KIRIKKALE",
+    "KIRIKKALE": "KIRIKKALE",
+    "KIRSEHIR": "KIRŞEHİR",
+    "KIRŞEHİR": "KIRŞEHİr",
+    "KÃ1⁄4TAHYA": "KÜTAHYA",
+    "KÃ¼TAHYA": "KÜTAHYA",
+    "KÜTAHYA": "KÜTAHYA",
+    "MUGLA": "MUĞLA",
+    "MUĞLA": "MUĞLA",
+    "MUS": "MUŞ",
+    "MUŞ": "MUŞ",
+    "NEVSEHIR": "NEVŞEHİR",
+    "NEVŞEHİR": "NEVŞEHİR",
+    "NIGDE": "NİĞDE",
+    "NİĞDE": "NİĞDE",
+    "SANLIURFA": "ŞANLIURFA",
+    "ŞANLIURFA": "ŞANLIURFA",
+    "SIRNAK": "ŞIRNAK",
+    "ŞIRNAK": "ŞIRNAK",
+    "TEKIRDAG": "TEKİRDAĞ",
+    "TEKİRDAĞ": "TEKİRDAĞ",
+    "USAK": "UŞAK",
+    "UŞAK": "UŞAK",
+    "ZINGULDAK": "ZONGULDAK",
+    "ZONGULDAK": "ZONGULDAK",
+    "Ã\x87ANAKKALE": "ÇANAKKALE",
+    "ÇANAKKALE": "ÇANAKKALE",
+    "Ã\x87ANKIRI": "ÇANKIRI",
+    "ÇANKIRI": "ÇANKIRI",
+    "Ã\x87ORUM": "ÇORUM",
+    "ÇORUM": "ÇORUM",
+    "K. MARAS": "KAHRAMANMARAŞ",
+    "KAHRAMANMARAŞ": "KAHRAMANMARAŞ",
+    "CORUM": "ÇORUM",
+    "CANKIRI": "ÇANKIRI",
+    "KARABUK": "KARABÜK",
+    "GUMUSHANE": "GÜMÜŞHANE",
+    "KUTAHYA": "KÜTAHYA",
+    "CANAKKALE": "ÇANAKKALE",
+    "TUNCELİ": "TUNCELİ",
+    "TUNCELI": "TUNCELİ",
+    "OSMANİYE": "OSMANİYE",
+    "OSMANIYE": "OSMANİYE",
+    "KİLİS": "KİLİS",
+    "KILIS": "KİLİS",
+    "ŞIRNAK": "ŞIRNAK",
+    "SİİRT": "SİİRT",
+    "SIIRT": "SİİRT",
+    "BATMAN": "BATMAN",
+    "BİTLİS": "BİTLİS",
+    "BITLIS": "BİTLİS",
+    "BİNGÖL": "BİNGÖL",
+    "IĞDIR": "IĞDIR",
+    "ARDAHAN": "ARDAHAN"
+}
+
+CITY_NORMALIZE_CLEAN = {
+    'ADANA': 'Adana',
+    'ADIYAMAN': 'Adiyaman',
+    'AFYONKARAHISAR': 'Afyonkarahisar',
+    'AFYON': 'Afyonkarahisar',
+    'AGRI': 'Agri',
+    'AĞRI': 'Agri',
+    'AKSARAY': 'Aksaray',
+    'ANKARA': 'Ankara',
+    'ANTALYA': 'Antalya',
+    'AYDIN': 'Aydin',
+    'BALIKESIR': 'Balikesir',
+    'BARTIN': 'Bartin',
+    'BATMAN': 'Batman',
+    'BILECIK': 'Bilecik',
+    'BINGOL': 'Bingol',
+    'BITLIS': 'Bitlis',
+    'BOLU': 'Bolu',
+    'BURDUR': 'Burdur',
+    'BURSA': 'Bursa',
+    'CANAKKALE': 'Canakkale',
+    'ÇANAKKALE': 'Canakkale',
+    'CANKIRI': 'Cankiri',
+    'ÇANKIRI': 'Cankiri',
+    'CORUM': 'Corum',
+    'ÇORUM': 'Corum',
+    'DENIZLI': 'Denizli',
+    'DIYARBAKIR': 'Diyarbakir',
+    'DUZCE': 'Duzce',
+    'DÜZCE': 'Duzce',
+    'EDIRNE': 'Edirne',
+    'ELAZIG': 'Elazig',
+    'ELAZĞ': 'Elazig',
+    'ELAZIĞ': 'Elazig',
+    'ERZINCAN': 'Erzincan',
+    'ERZURUM': 'Erzurum',
+    'ESKISEHIR': 'Eskisehir',
+    'ESKİŞEHİR': 'Eskisehir',
+    'GAZIANTEP': 'Gaziantep',
+    'GIRESUN': 'Giresun',
+    'GİRESUN': 'Giresun',
+    'GUMUSHANE': 'Gumushane',
+    'GÜMÜŞHANE': 'Gumushane',
+    'HAKKARI': 'Hakkari',
+    'HAKKARİ': 'Hakkari',
+    'HATAY': 'Hatay',
+    'IGDIR': 'Igdir',
+    'IĞDIR': 'Igdir',
+    'ISPARTA': 'Isparta',
+    'ISTANBUL': 'Istanbul',
+    'İSTANBUL': 'Istanbul',
+    'IZMIR': 'Izmir',
+    'İZMİR': 'Izmir',
+    'KAHRAMANMARAS': 'K. Maras',
+    'KAHRAMANMARAŞ': 'K. Maras',
+    'K.MARAS': 'K. Maras',
+    'KMARAS': 'K. Maras',
+    'KARABUK': 'Karabuk',
+    'KARABÜK': 'Karabuk',
+    'KARAMAN': 'Karaman',
+    'KARS': 'Kars',
+    'KASTAMONU': 'Kastamonu',
+    'KASTAMONU': 'Kastamonu',
+    'KASTAMONU': 'Kastamonu',
+    'KAYSERI': 'Kayseri',
+    'KIRIKKALE': 'Kinkkale',
+    'KIRKLARELI': 'Kirklareli',
+    'KIRKLARELİ': 'Kirklareli',
+    'KIRSEHIR': 'Kirsehir',
+    'KIRŞEHİR': 'Kirsehir',
+    'KILIS': 'Kilis',
+    'KİLİS': 'Kilis',
+    'KOCAELI': 'Kocaeli',
+    'KONYA': 'Konya',
+    'KUTAHYA': 'Kutahya',
+    'KÜTAHYA': 'Kutahya',
+    'MALATYA': 'Malatya',
+    'MANISA': 'Manisa',
+    'MANİSA': 'Manisa',
+    'MARDIN': 'Mardin',
+    'MARDİN': 'Mardin',
+    'MERSIN': 'Mersin',
+    'MERSİN': 'Mersin',
+    'MUGLA': 'Mugla',
+    'MUĞLA': 'Mugla',
+    'MUS': 'Mus',
+    'MUŞ': 'Mus',
+    'NEVSEHIR': 'Nevsehir',
+    'NEVŞEHİR': 'Nevsehir',
+    'NIGDE': 'Nigde',
+    'NİĞDE': 'Nigde',
+    'ORDU': 'Ordu',
+    'OSMANIYE': 'Osmaniye',
+    'OSMANİYE': 'Osmaniye',
+    'RIZE': 'Rize',
+    'RİZE': 'Rize',
+    'SAKARYA': 'Sakarya',
+    'SAMSUN': 'Samsun',
+    'SIIRT': 'Siirt',
+    'SİİRT': 'Siirt',
+    'SINOP': 'Sinop',
+    'SİNOP': 'Sinop',
+    'SIVAS': 'Sivas',
+    'SİVAS': 'Sivas',
+    'SANLIURFA': 'Sanliurfa',
+    'ŞANLIURFA': 'Sanliurfa',
+    'SIRNAK': 'Sirnak',
+    'ŞIRNAK': 'Sirnak',
+    'TEKIRDAG': 'Tekirdag',
+    'TEKİRDAĞ': 'Tekirdag',
+    'TOKAT': 'Tokat',
+    'TRABZON': 'Trabzon',
+    'TUNCELI': 'Tunceli',
+    'TUNCELİ': 'Tunceli',
+    'USAK': 'Usak',
+    'UŞAK': 'Usak',
+    'VAN': 'Van',
+    'YALOVA': 'Yalova',
+    'YOZGAT': 'Yozgat',
+    'ZONGULDAK': 'Zonguldak',
+    'ZONGULDAK': 'Zonguldak',
+    'ARDAHAN': 'Ardahan',
+    'AKSARAY': 'Aksaray',
+    'KIRIKKALE': 'Kirikkale'
+}
+
+# =============================================================================
+# HELPER FUNCTIONS
+# =============================================================================
+
+def safe_divide(a, b):
+    """Güvenli bölme işlemi"""
+    return np.where(b != 0, a / b, 0)
+
+def get_product_columns(product):
+    """Ürün kolonlarını döndür"""
+    if product == "TROCMETAM":
+        return {"pf": "TROCMETAM", "rakip": "DIGER TROCMETAM"}
+    elif product == "CORTIPOL":
+        return {"pf": "CORTIPOL", "rakip": "DIGER CORTIPOL"}
+    elif product == "DEKSAMETAZON":
+        return {"pf": "DEKSAMETAZON", "rakip": "DIGER DEKSAMETAZON"}
+    else:
+        return {"pf": "PF IZOTONIK", "rakip": "DIGER IZOTONIK"}
+
+def get_portfolio_columns():
+    """Tüm ürünlerin PF / rakip kolonları (PRODUCTS sırasıyla)"""
+    columns = []
+    for product in PRODUCTS:
+        cols = get_product_columns(product)
+        columns += [cols['pf'], cols['rakip']]
+    return columns
+
+def _join_unique(values):
+    """Benzersiz değerleri sıralı ve virgülle birleştir"""
+    return ', '.join(sorted(set(values)))
+
+def aggregate_sales(df, product, by, date_filter=None, engine=None, extra=None):
+    """
+    PF / rakip satış toplamları (`by` kırılımında, grup anahtarına göre sıralı)
+    
+    engine verilirse (bkz. query_engine.SalesQueryEngine, sales_rollup.SalesRollup)
+    toplama motorda yapılır ve df kullanılmaz; aksi halde pandas groupby. İki
+    yolun çıktısı aynı biçimdedir.
+    
+    Args:
+        by: Grup kolonları (boş liste = tek satır genel toplam)
+        extra: {kolon: 'first' | 'nunique' | 'join'} ek toplamalar
+    
+    Returns:
+        pd.DataFrame: by kolonları, PF kolonu, rakip kolonu, extra kolonları
+    """
+    cols = get_product_columns(product)
+    return _aggregate_columns(df, [cols['pf'], cols['rakip']], by, date_filter, engine, extra)
+
+def aggregate_portfolio_sales(df, by, date_filter=None, engine=None):
+    """
+    Tüm ürünlerin PF / rakip toplamları tek geçişte (geniş tablo)
+    
+    Ürün değiştirmek bu tablodan kolon seçmektir (bkz. get_product_columns).
+    """
+    return _aggregate_columns(df, get_portfolio_columns(), by, date_filter, engine)
+
+def _aggregate_columns(df, value_cols, by, date_filter=None, engine=None, extra=None):
+    if engine is not None:
+        return engine.aggregate(value_cols, by, date_filter, extra)
+    
+    if date_filter:
+        df = df[(df['DATE'] >= date_filter[0]) & (df['DATE'] <= date_filter[1])]
+    
+    if not by:
+        return df[value_cols].sum().to_frame().T
+    
+    agg = dict.fromkeys(value_cols, 'sum')
+    for col, how in (extra or {}).items():
+        agg[col] = _join_unique if how == 'join' else how
+    
+    return df.groupby(by).agg(agg).reset_index()
+
+def normalize_city_name_fixed(city_name):
+    """Düzeltilmiş şehir normalizasyon"""
+    if pd.isna(city_name):
+        return None
+    
+    city_upper = str(city_name).strip().upper()
+    
+    # Fix known encoding issues
+    if city_upper in FIX_CITY_MAP:
+        return FIX_CITY_MAP[city_upper]
+    
+    # Turkish character mapping
+    tr_map = {
+        "İ": "I", "Ğ": "G", "Ü": "U",
+        "Ş": "S", "Ö": "O", "Ç": "C",
+        "Â": "A", "Î": "I", "Û": "U"
+    }
+    
+    for k, v in tr_map.items():
+        city_upper = city_upper.replace(k, v)
+    
+    return CITY_NORMALIZE_CLEAN.get(city_upper, city_name)
+
+def format_number(num):
+    """Sayıları binlik ayırıcılı ve sadeleştirilmiş formatta göster"""
+    if pd.isna(num):
+        return "0"
+    
+    try:
+        num = float(num)
+        if num == 0:
+            return "0"
+        elif abs(num) >= 1_000_000_000:
+            return f"{num/1_000_000_000:,.1f}B"
+        elif abs(num) >= 1_000_000:
+            return f"{num/1_000_000:,.1f}M"
+        elif abs(num) >= 1_000:
+            return f"{num/1_000:,.1f}K"
+        else:
+            return f"{num:,.0f}"
+    except:
+        return str(num)
+
+def format_percentage(num):
+    """Yüzdelikleri formatla"""
+    if pd.isna(num):
+        return "0%"
+    try:
+        return f"{float(num):.1f}%"
+    except:
+        return str(num)
+
+def calculate_trend_slope(y_values):
+    """Trend eğimini hesapla"""
+    if len(y_values) < 2:
+        return 0
+    
+    from scipy import stats
+    
+    x = np.arange(len(y_values))
+    slope, intercept, r_value, p_value, std_err = stats.linregress(x, y_values)
+    return slope
+
+def classify_trend(slope, y_values):
+    """Trendi sınıflandır"""
+    if len(y_values) < 5:
+        return "Yetersiz Veri"
+    
+    mean_value = np.mean(y_values)
+    if mean_value == 0:
+        return "Nötr"
+    
+    percent_slope = (slope / mean_value) * 100 if mean_value != 0 else 0
+    
+    if percent_slope > 10:
+        return "📈 Güçlü Artış"
+    elif percent_slope > 5:
+        return "📈 Artış"
+    elif percent_slope > -5:
+        return "📊 Sabit"
+    elif percent_slope > -10:
+        return "📉 Düşüş"
+    else:
+        return "📉 Güçlü Düşüş"
+
+def calculate_seasonality(y_values, period=12):
+    """Mevsimsellik analizi"""
+    if len(y_values) < period * 2:
+        return None, "Yetersiz veri"
+    
+    try:
+        from scipy.signal import periodogram
+        f, Pxx = periodogram(y_values, fs=1)
+        
+        if len(f) > 0 and len(Pxx) > 0:
+            # En yüksek mevsimsel frekans
+            idx = np.argmax(Pxx[1:]) + 1
+            dominant_period = 1 / f[idx] if f[idx] > 0 else 0
+            
+            if dominant_period >= period - 2 and dominant_period <= period + 2:
+                return "Güçlü Mevsimsellik", round(dominant_period, 1)
+            elif dominant_period >= 3 and dominant_period <= 24:
+                return "Zayıf Mevsimsellik", round(dominant_period, 1)
+            else:
+                return "Mevsimsellik Yok", None
+    except:
+        return "Analiz Edilemedi", None
+    
+    return "Bilinmiyor", None
+
+# =============================================================================
+# YENİ: ŞEHİR-BRICK STRATEJİK UYUM ANALİZİ FONKSİYONLARI
+# =============================================================================
+
+def analyze_city_brick_strategic_alignment(df, product, date_filter=None):
+    """
+    ŞEHİR–BRICK STRATEJİK UYUM ANALİZİ
+    
+    MAKRO: Şehir bazlı yatırım stratejileri
+    MİKRO: Brick bazlı BCG konumlandırması
+    
+    Analiz mantığı:
+    1. Her şehir için yatırım stratejisi belirle
+    2. Her Brick için BCG kategorisi belirle
+    3. Şehir stratejisi ile Brick BCG konumlarını karşılaştır
+    4. Stratejik uyum skoru hesapla
+    5. İçgörü ve aksiyon önerisi üret
+    """
+    cols = get_product_columns(product)
+    
+    if date_filter:
+        df_filtered = df[(df['DATE'] >= date_filter[0]) & (df['DATE'] <= date_filter[1])]
+    else:
+        df_filtered = df.copy()
+    
+    # 1. ŞEHİR BAZLI YATIRIM STRATEJİSİ
+    city_perf = calculate_city_performance(df_filtered, product, date_filter)
+    investment_df = calculate_investment_strategy(city_perf)
+    
+    # 2. BRICK BAZLI BCG MATRIX
+    bcg_df = calculate_bcg_matrix(df_filtered, product, date_filter)
+    
+    # 3. ŞEHİR–BRICK EŞLEŞTİRMESİ
+    # Her Brick'in hangi şehirde olduğunu bul
+    city_brick_mapping = df_filtered.groupby(['CITY_NORMALIZED', 'TERRITORIES']).agg({
+        cols['pf']: 'sum'
+    }).reset_index()
+    
+    city_brick_mapping.columns = ['City', 'Brick', 'PF_Satis']
+    
+    # Şehir stratejileri ile birleştir
+    city_brick_mapping = city_brick_mapping.merge(
+        investment_df[['City', 'Yatırım_Stratejisi']],
+        on='City',
+        how='left'
+    )
+    
+    # Brick BCG kategorileri ile birleştir
+    city_brick_mapping = city_brick_mapping.merge(
+        bcg_df[['Brick', 'BCG_Kategori']],
+        on='Brick',
+        how='left'
+    )
+    
+    # BCG kategorisi olmayan Brick'ler için varsayılan değer
+    city_brick_mapping['BCG_Kategori'] = city_brick_mapping['BCG_Kategori'].fillna('🐶 Dog')
+    
+    # 4. ŞEHİR BAZLI ANALİZ
+    results = []
+    
+    for city in city_brick_mapping['City'].unique():
+        city_data = city_brick_mapping[city_brick_mapping['City'] == city]
+        
+        if city_data.empty:
+            continue
+        
+        # Şehir stratejisi
+        city_strategy = city_data['Yatırım_Stratejisi'].iloc[0]
+        
+        # Brick dağılımı
+        brick_distribution = city_data.groupby('BCG_Kategori').agg({
+            'PF_Satis': ['sum', 'count']
+        }).reset_index()
+        
+        brick_distribution.columns = ['BCG_Kategori', 'Toplam_Ciro', 'Brick_Sayisi']
+        
+        # Toplam ciro
+        total_ciro = brick_distribution['Toplam_Ciro'].sum()
+        
+        # BCG kategorilerine göre yüzde dağılımı
+        brick_distribution['Ciro_Pay_%'] = (brick_distribution['Toplam_Ciro'] / total_ciro * 100) if total_ciro > 0 else 0
+        
+        # 5. STRATEJİK UYUM SKORU HESAPLA
+        strategic_fit_score, fit_category = calculate_strategic_fit_score(city_strategy, brick_distribution)
+        
+        # 6. TEK CÜMLELİK YÖNETİCİ İÇGÖRÜSÜ
+        executive_insight = generate_executive_insight(city, city_strategy, brick_distribution, strategic_fit_score)
+        
+        # 7. YATIRIM KOMİTESİ KARAR ÖZETİ
+        decision_summary = generate_decision_summary(city_strategy, brick_distribution, strategic_fit_score)
+        
+        # 8. DETAYLI BRICK LİSTESİ (ilk 5)
+        top_bricks = city_data.nlargest(5, 'PF_Satis')
+        brick_details = []
+        for _, brick_row in top_bricks.iterrows():
+            brick_share = (brick_row['PF_Satis'] / total_ciro * 100) if total_ciro > 0 else 0
+            brick_details.append(f"• {brick_row['Brick']} [{brick_row['BCG_Kategori']}]: {format_number(brick_row['PF_Satis'])} (%{brick_share:.1f})")
+        
+        results.append({
+            'Şehir': city,
+            'Şehir_Yatırım_Stratejisi': city_strategy,
+            'Toplam_Ciro': total_ciro,
+            'Brick_Sayisi': len(city_data),
+            'BCG_Dağılımı': brick_distribution.to_dict('records'),
+            'Stratejik_Uyum_Skoru': strategic_fit_score,
+            'Uyum_Kategorisi': fit_category,
+            'Yönetici_İçgörüsü': executive_insight,
+            'Karar_Önerisi': decision_summary['decision'],
+            'Karar_Gerekçesi': decision_summary['rationale'],
+            'Detaylı_Brick_Listesi': "\n".join(brick_details) if brick_details else "Brick verisi bulunamadı",
+            'BCG_Star_%': brick_distribution[brick_distribution['BCG_Kategori'] == '⭐ Star']['Ciro_Pay_%'].sum(),
+            'BCG_CashCow_%': brick_distribution[brick_distribution['BCG_Kategori'] == '🐄 Cash Cow']['Ciro_Pay_%'].sum(),
+            'BCG_Question_%': brick_distribution[brick_distribution['BCG_Kategori'] == '❓ Question Mark']['Ciro_Pay_%'].sum(),
+            'BCG_Dog_%': brick_distribution[brick_distribution['BCG_Kategori'] == '🐶 Dog']['Ciro_Pay_%'].sum()
+        })
+    
+    results_df = pd.DataFrame(results)
+    
+    # Sıralama: Önce uyum skoru (düşükten yükseğe), sonra ciro (yüksekten düşüğe)
+    results_df = results_df.sort_values(['Stratejik_Uyum_Skoru', 'Toplam_Ciro'], ascending=[True, False])
+    
+    return results_df
+
+def calculate_strategic_fit_score(city_strategy, brick_distribution):
+    """
+    Şehir stratejisi ile Brick BCG dağılımı arasındaki uyum skorunu hesapla
+    
+    Skor mantığı:
+    0-49: Stratejik Kopuş
+    50-79: Kısmi Uyum
+    80-100: Güçlü Uyum
+    """
+    # BCG dağılımını dictionary'ye çevir
+    bcg_dict = {}
+    for _, row in brick_distribution.iterrows():
+        bcg_dict[row['BCG_Kategori']] = row['Ciro_Pay_%']
+    
+    # Varsayılan değerler
+    star_percent = bcg_dict.get('⭐ Star', 0)
+    cashcow_percent = bcg_dict.get('🐄 Cash Cow', 0)
+    question_percent = bcg_dict.get('❓ Question Mark', 0)
+    dog_percent = bcg_dict.get('🐶 Dog', 0)
+    
+    # Şehir stratejisine göre ideal BCG dağılımı
+    ideal_distributions = {
+        '🚀 Agresif': {'star': 40, 'question': 30, 'cashcow': 20, 'dog': 10},
+        '⚡ Hızlandırılmış': {'star': 30, 'question': 25, 'cashcow': 30, 'dog': 15},
+        '🛡️ Koruma': {'star': 15, 'question': 20, 'cashcow': 50, 'dog': 15},
+        '💎 Potansiyel': {'star': 20, 'question': 40, 'cashcow': 20, 'dog': 20},
+        '👁️ İzleme': {'star': 10, 'question': 20, 'cashcow': 30, 'dog': 40}
+    }
+    
+    if city_strategy not in ideal_distributions:
+        city_strategy = '👁️ İzleme'  # Varsayılan
+    
+    ideal = ideal_distributions[city_strategy]
+    
+    # Skor hesapla (ideal dağılıma yakınlık)
+    score = 100 - (
+        abs(star_percent - ideal['star']) * 0.3 +
+        abs(cashcow_percent - ideal['cashcow']) * 0.2 +
+        abs(question_percent - ideal['question']) * 0.3 +
+        abs(dog_percent - ideal['dog']) * 0.2
+    )
+    
+    # Skoru 0-100 arasına sınırla
+    score = max(0, min(100, score))
+    
+    # Kategori belirle
+    if score >= 80:
+        fit_category = "Güçlü Uyum"
+    elif score >= 50:
+        fit_category = "Kısmi Uyum"
+    else:
+        fit_category = "Stratejik Kopuş"
+    
+    return round(score, 1), fit_category
+
+def generate_executive_insight(city, city_strategy, brick_distribution, strategic_fit_score):
+    """
+    Tek cümlelik yönetici içgörüsü üret
+    
+    Format:
+    [ŞEHİR]: [Şehir yatırım stratejisi], ancak [baskın brick BCG durumu] nedeniyle [net risk/fırsat yorumu].
+    """
+    # En baskın BCG kategorisini bul
+    dominant_bcg = brick_distribution.loc[brick_distribution['Ciro_Pay_%'].idxmax(), 'BCG_Kategori']
+    dominant_percent = brick_distribution.loc[brick_distribution['Ciro_Pay_%'].idxmax(), 'Ciro_Pay_%']
+    
+    # İçgörü mantığı
+    if strategic_fit_score >= 80:
+        # Güçlü uyum
+        if city_strategy in ['🚀 Agresif', '⚡ Hızlandırılmış']:
+            insight = f"{city}: {city_strategy} stratejisi, {dominant_bcg} brick'lerin %{dominant_percent:.1f} ciro payı ile güçlü şekilde destekleniyor."
+        else:
+            insight = f"{city}: {city_strategy} stratejisi, mevcut brick portföyü ile uyumlu ve risk düzeyi kontrollü."
+    
+    elif strategic_fit_score >= 50:
+        # Kısmi uyum
+        if dominant_bcg in ['🐄 Cash Cow', '🐶 Dog'] and city_strategy in ['🚀 Agresif', '⚡ Hızlandırılmış']:
+            insight = f"{city}: {city_strategy} stratejisi, ancak cironun %{dominant_percent:.1f}'inin {dominant_bcg} brick'lerde olması büyüme hızını kısıtlıyor."
+        elif dominant_bcg == '⭐ Star' and city_strategy in ['🛡️ Koruma', '👁️ İzleme']:
+            insight = f"{city}: {city_strategy} stratejisi, ancak cironun %{dominant_percent:.1f}'inin {dominant_bcg} brick'lerde olması stratejik tutarsızlık riski taşıyor."
+        else:
+            insight = f"{city}: {city_strategy} stratejisi ile brick portföyü kısmen uyumlu, ancak optimizasyon gerekiyor."
+    
+    else:
+        # Stratejik kopuş
+        if dominant_bcg == '🐶 Dog' and city_strategy in ['🚀 Agresif', '⚡ Hızlandırılmış']:
+            insight = f"{city}: {city_strategy} stratejisi, ancak cironun %{dominant_percent:.1f}'inin {dominant_bcg} brick'lerde olması ciddi stratejik kopuşa işaret ediyor."
+        elif dominant_bcg == '⭐ Star' and city_strategy == '👁️ İzleme':
+            insight = f"{city}: {city_strategy} stratejisi, ancak cironun %{dominant_percent:.1f}'inin {dominant_bcg} brick'lerde olması yatırım eksikliğini gösteriyor."
+        else:
+            insight = f"{city}: Şehir stratejisi ile brick portföyü arasında ciddi uyumsuzluk var. Acil müdahale gerekiyor."
+    
+    return insight
+
+def generate_decision_summary(city_strategy, brick_distribution, strategic_fit_score):
+    """
+    Yatırım komitesi için karar özeti oluştur
+    
+    Karar seçenekleri:
+    - Yatırımı Artır
+    - Seçici Yatırım Yap
+    - Yeniden Dengele
+    - Mevcut Yapıyı Koru
+    - Yatırımı Azalt / Çekil
+    """
+    # En baskın BCG kategorisini bul
+    dominant_bcg = brick_distribution.loc[brick_distribution['Ciro_Pay_%'].idxmax(), 'BCG_Kategori']
+    dominant_percent = brick_distribution.loc[brick_distribution['Ciro_Pay_%'].idxmax(), 'Ciro_Pay_%']
+    
+    # Karar mantığı
+    if strategic_fit_score >= 80:
+        # Güçlü uyum
+        if city_strategy in ['🚀 Agresif', '⚡ Hızlandırılmış']:
+            decision = "Yatırımı Artır"
+            rationale = "Şehir stratejisi ile brick portföyü güçlü uyum içinde. Başarı modelini ölçeklendirmek için yatırım artırılmalı."
+        else:
+            decision = "Mevcut Yapıyı Koru"
+            rationale = "Strateji-portföy uyumu optimal seviyede. Mevcut yapı korunarak karlılık sürdürülmeli."
+    
+    elif strategic_fit_score >= 50:
+        # Kısmi uyum
+        if city_strategy in ['🚀 Agresif', '⚡ Hızlandırılmış']:
+            if dominant_bcg in ['🐄 Cash Cow', '🐶 Dog']:
+                decision = "Yeniden Dengele"
+                rationale = f"Cironun %{dominant_percent:.1f}'i {dominant_bcg} brick'lerde. Büyüme stratejisi için brick portföyü yeniden dengelenmeli."
+            else:
+                decision = "Seçici Yatırım Yap"
+                rationale = "Strateji-portföy uyumu kısmen var. Star ve Question Mark brick'lere odaklanarak seçici yatırım yapılmalı."
+        else:
+            decision = "Seçici Yatırım Yap"
+            rationale = "Portföyde optimizasyon fırsatları var. Yüksek potansiyelli brick'lere odaklanarak seçici yatırım yapılmalı."
+    
+    else:
+        # Stratejik kopuş
+        if dominant_bcg == '🐶 Dog' and city_strategy in ['🚀 Agresif', '⚡ Hızlandırılmış']:
+            decision = "Yatırımı Azalt / Çekil"
+            rationale = f"Cironun %{dominant_percent:.1f}'i Dog brick'lerde. Büyüme stratejisi ile uyumsuz. Yatırım azaltılmalı veya strateji revize edilmeli."
+        elif dominant_bcg == '⭐ Star' and city_strategy == '👁️ İzleme':
+            decision = "Yatırımı Artır"
+            rationale = "Star brick'lere rağmen izleme stratejisi uygulanıyor. Potansiyeli değerlendirmek için yatırım artırılmalı."
+        else:
+            decision = "Yeniden Dengele"
+            rationale = "Ciddi stratejik kopuş var. Brick portföyü şehir stratejisiyle uyumlu hale getirilmeli."
+    
+    return {
+        'decision': decision,
+        'rationale': rationale
+    }
+
+# =============================================================================
+# YENİ ANALİZ FONKSİYONLARI
+# =============================================================================
+
+def calculate_region_comparative_analysis(df, product, date_filter=None, engine=None):
+    """
+    Bölgeler arası karşılaştırmalı analiz
+    
+    Her bölge için:
+    - PF Satış Toplamı
+    - Toplam Pazar Büyüklüğü
+    - Pazar Payı
+    - Bölge İçi Pay (Bölgedeki PF Satışın Türkiye'deki PF Satışa Oranı)
+    - Yoğunluk (Birim Şehir Başına PF Satış)
+    """
+    cols = get_product_columns(product)
+    
+    if date_filter and engine is None:
+        df = df[(df['DATE'] >= date_filter[0]) & (df['DATE'] <= date_filter[1])]
+        date_filter = None
+    
+    # Türkiye toplamları
+    totals = aggregate_sales(df, product, [], date_filter, engine)
+    total_pf_turkey = totals[cols['pf']].iloc[0]
+    total_market_turkey = total_pf_turkey + totals[cols['rakip']].iloc[0]
+    
+    # Bölge bazlı analiz (şehir sayısı aynı toplamada)
+    region_analysis = aggregate_sales(
+        df, product, ['REGION'], date_filter, engine,
+        extra={'CITY_NORMALIZED': 'nunique'}
+    )
+    
+    region_analysis.columns = ['Region', 'PF_Satis', 'Rakip_Satis', 'Sehir_Sayisi']
+    city_count = region_analysis.pop('Sehir_Sayisi')
+    region_analysis['Toplam_Pazar'] = region_analysis['PF_Satis'] + region_analysis['Rakip_Satis']
+    region_analysis['Pazar_Payi_%'] = safe_divide(region_analysis['PF_Satis'], region_analysis['Toplam_Pazar']) * 100
+    
+    # Bölge içi pay (Türkiye'deki toplam PF satışa göre)
+    region_analysis['Bolge_Ici_Pay_%'] = safe_divide(region_analysis['PF_Satis'], total_pf_turkey) * 100
+    
+    # Şehir sayısı ve yoğunluk
+    region_analysis['Sehir_Sayisi'] = city_count.fillna(0)
+    region_analysis['Yogunluk'] = safe_divide(region_analysis['PF_Satis'], region_analysis['Sehir_Sayisi'])
+    
+    # Performans skoru (çok boyutlu)
+    max_pf = region_analysis['PF_Satis'].max() if region_analysis['PF_Satis'].max() > 0 else 1
+    max_share = region_analysis['Pazar_Payi_%'].max() if region_analysis['Pazar_Payi_%'].max() > 0 else 1
+    max_density = region_analysis['Yogunluk'].max() if region_analysis['Yogunluk'].max() > 0 else 1
+    
+    region_analysis['Performans_Skoru'] = (
+        (region_analysis['Bolge_Ici_Pay_%'] / 100) * 0.4 +          # Bölge içi ağırlık
+        (region_analysis['Pazar_Payi_%'] / max_share) * 0.3 +      # Pazar payı
+        (region_analysis['Yogunluk'] / max_density) * 0.3          # Yoğunluk
+    ) * 100
+    
+    # Sıralama
+    region_analysis = region_analysis.sort_values('Performans_Skoru', ascending=False)
+    
+    return region_analysis
+
+def calculate_intra_region_performance(df, product, selected_region, date_filter=None, engine=None):
+    """
+    Seçilen bir bölge içindeki detaylı performans analizi
+    
+    Bölge içindeki:
+    - Şehirlerin PF Satış Dağılımı
+    - Brick Performansları
+    - Manager Performansları
+    - Zaman İçinde Gelişim
+    """
+    if engine is not None:
+        # Bölge ve tarih filtresi SQL'de uygulanır
+        engine = engine.filtered(REGION=selected_region)
+        df_region = None
+        if engine.row_count(date_filter) == 0:
+            return None, None, None, None
+    else:
+        if date_filter:
+            df = df[(df['DATE'] >= date_filter[0]) & (df['DATE'] <= date_filter[1])]
+            date_filter = None
+        
+        # Bölgeyi filtrele
+        df_region = df[df['REGION'] == selected_region]
+        
+        if len(df_region) == 0:
+            return None, None, None, None
+    
+    # 1. ŞEHİR BAZLI ANALİZ
+    city_analysis = aggregate_sales(df_region, product, ['CITY_NORMALIZED'], date_filter, engine)
+    
+    city_analysis.columns = ['City', 'PF_Satis', 'Rakip_Satis']
+    city_analysis['Toplam_Pazar'] = city_analysis['PF_Satis'] + city_analysis['Rakip_Satis']
+    city_analysis['Pazar_Payi_%'] = safe_divide(city_analysis['PF_Satis'], city_analysis['Toplam_Pazar']) * 100
+    
+    region_total_pf = city_analysis['PF_Satis'].sum()
+    city_analysis['Bolge_Ici_Pay_%'] = safe_divide(city_analysis['PF_Satis'], region_total_pf) * 100
+    
+    city_analysis = city_analysis.sort_values('PF_Satis', ascending=False)
+    
+    # 2. Brick BAZLI ANALİZ
+    brick_analysis = aggregate_sales(
+        df_region, product, ['TERRITORIES'], date_filter, engine,
+        extra={
+            'MANAGER': 'first',
+            'CITY_NORMALIZED': 'join'  # Brick'nin kapsadığı şehirler
+        }
+    )
+    
+    brick_analysis.columns = ['Brick', 'PF_Satis', 'Rakip_Satis', 'Manager', 'Kapsadigi_Sehirler']
+    brick_analysis['Toplam_Pazar'] = brick_analysis['PF_Satis'] + brick_analysis['Rakip_Satis']
+    brick_analysis['Pazar_Payi_%'] = safe_divide(brick_analysis['PF_Satis'], brick_analysis['Toplam_Pazar']) * 100
+    brick_analysis['Bolge_Ici_Pay_%'] = safe_divide(brick_analysis['PF_Satis'], region_total_pf) * 100
+    
+    brick_analysis = brick_analysis.sort_values('PF_Satis', ascending=False)
+    
+    # 3. MANAGER BAZLI ANALİZ
+    manager_analysis = aggregate_sales(
+        df_region, product, ['MANAGER'], date_filter, engine,
+        extra={
+            'TERRITORIES': 'nunique',  # Kaç Brick yönetiyor
+            'CITY_NORMALIZED': 'nunique'  # Kaç şehirde çalışıyor
+        }
+    )
+    
+    manager_analysis.columns = ['Manager', 'PF_Satis', 'Rakip_Satis', 'Brick_Sayisi', 'Sehir_Sayisi']
+    manager_analysis['Toplam_Pazar'] = manager_analysis['PF_Satis'] + manager_analysis['Rakip_Satis']
+    manager_analysis['Pazar_Payi_%'] = safe_divide(manager_analysis['PF_Satis'], manager_analysis['Toplam_Pazar']) * 100
+    manager_analysis['Ortalama_Brick_Performansi'] = safe_divide(manager_analysis['PF_Satis'], manager_analysis['Brick_Sayisi'])
+    
+    manager_analysis = manager_analysis.sort_values('PF_Satis', ascending=False)
+    
+    # 4. ZAMAN İÇİ GELİŞİM (Aylık)
+    monthly_analysis = aggregate_sales(
+        df_region, product, ['YIL_AY'], date_filter, engine
+    ).sort_values('YIL_AY')
+    
+    monthly_analysis.columns = ['YIL_AY', 'PF_Satis', 'Rakip_Satis']
+    monthly_analysis['Toplam_Pazar'] = monthly_analysis['PF_Satis'] + monthly_analysis['Rakip_Satis']
+    monthly_analysis['Pazar_Payi_%'] = safe_divide(monthly_analysis['PF_Satis'], monthly_analysis['Toplam_Pazar']) * 100
+    
+    # Büyüme oranları
+    monthly_analysis['PF_Buyume_%'] = monthly_analysis['PF_Satis'].pct_change() * 100
+    
+    return city_analysis, brick_analysis, manager_analysis, monthly_analysis
+
+# =============================================================================
+# GELİŞTİRİLMİŞ ZAMAN SERİSİ ANALİZ FONKSİYONLARI
+# =============================================================================
+
+def calculate_advanced_time_series(df, product, brick=None, date_filter=None, engine=None):
+    """GELİŞTİRİLMİŞ zaman serisi analizi"""
+    df_filtered = df
+    if engine is not None:
+        engine = engine.filtered(TERRITORIES=brick)
+    elif brick and brick != "TÜMÜ":
+        df_filtered = df_filtered[df_filtered['TERRITORIES'] == brick]
+    
+    # Aylık gruplama
+    monthly = aggregate_sales(
+        df_filtered, product, ['YIL_AY'], date_filter, engine,
+        extra={'DATE': 'first'}
+    ).sort_values('YIL_AY')
+    
+    monthly.columns = ['YIL_AY', 'PF_Satis', 'Rakip_Satis', 'DATE']
+    monthly['Toplam_Pazar'] = monthly['PF_Satis'] + monthly['Rakip_Satis']
+    monthly['Pazar_Payi_%'] = safe_divide(monthly['PF_Satis'], monthly['Toplam_Pazar']) * 100
+    
+    # Temel büyüme oranları
+    monthly['PF_Buyume_%'] = monthly['PF_Satis'].pct_change() * 100
+    monthly['Rakip_Buyume_%'] = monthly['Rakip_Satis'].pct_change() * 100
+    monthly['Goreceli_Buyume_%'] = monthly['PF_Buyume_%'] - monthly['Rakip_Buyume_%']
+    
+    # GELİŞTİRİLMİŞ Hareketli Ortalamalar
+    monthly['MA_3'] = monthly['PF_Satis'].rolling(window=3, min_periods=1).mean()
+    monthly['MA_6'] = monthly['PF_Satis'].rolling(window=6, min_periods=1).mean()
+    monthly['MA_12'] = monthly['PF_Satis'].rolling(window=12, min_periods=1).mean()
+    
+    # GELİŞTİRİLMİŞ Hareketli Ortalama Büyüme
+    monthly['MA_3_Growth'] = monthly['MA_3'].pct_change() * 100
+    monthly['MA_6_Growth'] = monthly['MA_6'].pct_change() * 100
+    monthly['MA_12_Growth'] = monthly['MA_12'].pct_change() * 100
+    
+    # Pazar Payı Hareketli Ortalamaları
+    monthly['PP_MA_3'] = monthly['Pazar_Payi_%'].rolling(window=3, min_periods=1).mean()
+    monthly['PP_MA_6'] = monthly['Pazar_Payi_%'].rolling(window=6, min_periods=1).mean()
+    
+    # Yıllık Büyüme (YoY)
+    monthly['DATE_DT'] = pd.to_datetime(monthly['YIL_AY'] + '-01', errors='coerce')
+    monthly['Year'] = monthly['DATE_DT'].dt.year
+    monthly['Month'] = monthly['DATE_DT'].dt.month
+    
+    # YoY büyümesini hesapla
+    for idx, row in monthly.iterrows():
+        if idx >= 12:
+            same_month_last_year = monthly[(monthly['Year'] == row['Year'] - 1) & 
+                                          (monthly['Month'] == row['Month'])]
+            if not same_month_last_year.empty:
+                monthly.loc[idx, 'YoY_PF_Growth'] = ((row['PF_Satis'] / same_month_last_year['PF_Satis'].values[0]) - 1) * 100
+                monthly.loc[idx, 'YoY_Rakip_Growth'] = ((row['Rakip_Satis'] / same_month_last_year['Rakip_Satis'].values[0]) - 1) * 100
+    
+    # Mevsimsellik indeksi (basitleştirilmiş)
+    if len(monthly) >= 12:
+        monthly_grouped = monthly.groupby('Month')['PF_Satis'].mean()
+        seasonality_base = monthly_grouped.mean()
+        if seasonality_base > 0:
+            monthly['Seasonality_Index'] = monthly.apply(
+                lambda x: (monthly_grouped[x['Month']] / seasonality_base * 100) if x['Month'] in monthly_grouped.index else 100,
+                axis=1
+            )
+    
+    # Trend analizi
+    if len(monthly) >= 3:
+        # Son 3 ay vs Önceki 3 ay
+        if len(monthly) >= 6:
+            recent_3m = monthly.tail(3)['PF_Satis'].mean()
+            previous_3m = monthly.tail(6).head(3)['PF_Satis'].mean()
+            if previous_3m > 0:
+                monthly.loc[monthly.index[-1], 'QoQ_Growth_3M'] = ((recent_3m / previous_3m) - 1) * 100
+        
+        # Son 6 ay vs Önceki 6 ay
+        if len(monthly) >= 12:
+            recent_6m = monthly.tail(6)['PF_Satis'].mean()
+            previous_6m = monthly.tail(12).head(6)['PF_Satis'].mean()
+            if previous_6m > 0:
+                monthly.loc[monthly.index[-1], 'QoQ_Growth_6M'] = ((recent_6m / previous_6m) - 1) * 100
+    
+    # Volatilite hesaplama
+    monthly['PF_Volatility'] = monthly['PF_Satis'].rolling(window=6, min_periods=3).std()
+    monthly['PF_CV'] = safe_divide(monthly['PF_Volatility'], monthly['PF_Satis']) * 100
+    
+    # Momentum indikatörleri
+    if len(monthly) >= 3:
+        monthly['Momentum_3M'] = monthly['PF_Satis'] - monthly['PF_Satis'].shift(3)
+        monthly['Momentum_6M'] = monthly['PF_Satis'] - monthly['PF_Satis'].shift(6)
+    
+    # Performans skoru (basitleştirilmiş)
+    monthly['Performance_Score'] = (
+        (monthly['Pazar_Payi_%'] / 100) * 0.4 +
+        (np.minimum(monthly['PF_Buyume_%'].fillna(0), 50) / 50) * 0.3 +
+        (1 - np.minimum(monthly['PF_CV'].fillna(50), 100) / 100) * 0.3
+    ) * 100
+    
+    return monthly
+
+def perform_trend_analysis(monthly_df):
+    """Detaylı trend analizi"""
+    if len(monthly_df) < 6:
+        return {"error": "Yetersiz veri"}
+    
+    analysis = {}
+    
+    # 1. Temel trend analizi
+    pf_values = monthly_df['PF_Satis'].values
+    pf_slope = calculate_trend_slope(pf_values)
+    pf_trend = classify_trend(pf_slope, pf_values)
+    
+    # 2. Hareketli ortalamalara göre trend
+    if 'MA_3' in monthly_df.columns:
+        ma3_slope = calculate_trend_slope(monthly_df['MA_3'].dropna().values)
+        ma3_trend = classify_trend(ma3_slope, monthly_df['MA_3'].dropna().values)
+        ma6_slope = calculate_trend_slope(monthly_df['MA_6'].dropna().values)
+        ma6_trend = classify_trend(ma6_slope, monthly_df['MA_6'].dropna().values)
+    else:
+        ma3_trend = "Hesaplanamadı"
+        ma6_trend = "Hesaplanamadı"
+    
+    # 3. Mevsimsellik analizi
+    seasonality_type, period = calculate_seasonality(pf_values)
+    
+    # 4. Dönemsel büyüme analizi
+    growth_metrics = {}
+    
+    if len(monthly_df) >= 4:
+        # Son 1 ay vs Önceki 1 ay
+        if len(monthly_df) >= 2:
+            last_month = monthly_df['PF_Satis'].iloc[-1]
+            prev_month = monthly_df['PF_Satis'].iloc[-2] if len(monthly_df) >= 2 else 0
+            if prev_month > 0:
+                growth_metrics['MoM_Growth'] = ((last_month / prev_month) - 1) * 100
+        
+        # Son 3 ay vs Önceki 3 ay
+        if len(monthly_df) >= 6:
+            recent_3m = monthly_df['PF_Satis'].tail(3).mean()
+            previous_3m = monthly_df['PF_Satis'].tail(6).head(3).mean()
+            if previous_3m > 0:
+                growth_metrics['QoQ_3M_Growth'] = ((recent_3m / previous_3m) - 1) * 100
+        
+        # Son 6 ay vs Önceki 6 ay
+        if len(monthly_df) >= 12:
+            recent_6m = monthly_df['PF_Satis'].tail(6).mean()
+            previous_6m = monthly_df['PF_Satis'].tail(12).head(6).mean()
+            if previous_6m > 0:
+                growth_metrics['QoQ_6M_Growth'] = ((recent_6m / previous_6m) - 1) * 100
+    
+    # 5. Pazar payı trendi
+    if 'Pazar_Payi_%' in monthly_df.columns:
+        pp_slope = calculate_trend_slope(monthly_df['Pazar_Payi_%'].values)
+        pp_trend = classify_trend(pp_slope, monthly_df['Pazar_Payi_%'].values)
+    else:
+        pp_trend = "Hesaplanamadı"
+    
+    # 6. Volatilite analizi
+    volatility = monthly_df['PF_Satis'].std() if len(monthly_df) > 1 else 0
+    mean_value = monthly_df['PF_Satis'].mean() if len(monthly_df) > 0 else 0
+    cv = (volatility / mean_value * 100) if mean_value > 0 else 0
+    
+    if cv < 20:
+        volatility_class = "Düşük"
+    elif cv < 50:
+        volatility_class = "Orta"
+    else:
+        volatility_class = "Yüksek"
+    
+    # 7. Momentum analizi
+    if len(monthly_df) >= 3:
+        momentum_3m = monthly_df['PF_Satis'].iloc[-1] - monthly_df['PF_Satis'].iloc[-4] if len(monthly_df) >= 4 else 0
+        momentum_6m = monthly_df['PF_Satis'].iloc[-1] - monthly_df['PF_Satis'].iloc[-7] if len(monthly_df) >= 7 else 0
+    else:
+        momentum_3m = 0
+        momentum_6m = 0
+    
+    analysis = {
+        "temel_trend": pf_trend,
+        "hareketli_ortalama_3m_trend": ma3_trend,
+        "hareketli_ortalama_6m_trend": ma6_trend,
+        "mevsimsellik": seasonality_type,
+        "mevsimsel_periyot": period,
+        "pazar_payi_trendi": pp_trend,
+        "volatilite": volatility_class,
+        "volatilite_degeri": round(cv, 1),
+        "momentum_3m": round(momentum_3m, 0),
+        "momentum_6m": round(momentum_6m, 0),
+        "buyume_metrikleri": growth_metrics,
+        "trend_egimi": round(pf_slope, 2)
+    }
+    
+    return analysis
+
+def create_comparative_analysis(monthly_df, periods=[3, 6, 12]):
+    """Karşılaştırmalı dönem analizi"""
+    if len(monthly_df) < max(periods):
+        return None
+    
+    comparisons = []
+    
+    for period in periods:
+        if len(monthly_df) >= period:
+            recent_data = monthly_df.tail(period)
+            previous_data = monthly_df.tail(period*2).head(period)
+            
+            recent_avg = recent_data['PF_Satis'].mean()
+            previous_avg = previous_data['PF_Satis'].mean()
+            
+            recent_share = recent_data['Pazar_Payi_%'].mean()
+            previous_share = previous_data['Pazar_Payi_%'].mean()
+            
+            growth_rate = ((recent_avg / previous_avg) - 1) * 100 if previous_avg > 0 else 0
+            share_change = recent_share - previous_share
+            
+            comparisons.append({
+                'period': f'Son {period} ay',
+                'ortalama_satis': recent_avg,
+                'onceki_ortalama': previous_avg,
+                'buyume_orani': growth_rate,
+                'pazar_payi': recent_share,
+                'pay_degisimi': share_change,
+                'volatilite': recent_data['PF_Satis'].std(),
+                'trend': classify_trend(
+                    calculate_trend_slope(recent_data['PF_Satis'].values),
+                    recent_data['PF_Satis'].values
+                )
+            })
+    
+    return pd.DataFrame(comparisons)
+
+# =============================================================================
+# DATA LOADING
+# =============================================================================
+
+def load_sales_data(file):
+    """
+    Satış verisini yükle ve normalize et
+    
+    Excel (.xlsx/.xls) varsayılandır; büyük veri setleri için .csv ve .parquet
+    dosyaları da okunabilir. Streamlit UploadedFile nesneleri de kabul edilir.
+    """
+    file_name = str(getattr(file, 'name', file)).lower()
+    
+    if file_name.endswith('.parquet'):
+        df = pd.read_parquet(file)
+    elif file_name.endswith('.csv'):
+        df = pd.read_csv(file)
+    else:
+        df = pd.read_excel(file)
+    
+    df['DATE'] = pd.to_datetime(df['DATE'])
+    df['YIL_AY'] = df['DATE'].dt.strftime('%Y-%m')
+    df['AY'] = df['DATE'].dt.month
+    df['YIL'] = df['DATE'].dt.year
+    
+    df['TERRITORIES'] = df['TERRITORIES'].str.upper().str.strip()
+    df['CITY'] = df['CITY'].str.strip()
+    df['CITY_NORMALIZED'] = df['CITY'].apply(normalize_city_name_fixed)
+    df['REGION'] = df['REGION'].str.upper().str.strip()
+    df['MANAGER'] = df['MANAGER'].str.upper().str.strip()
+    
+    return df
+
+# =============================================================================
+# ML FEATURE ENGINEERING - GELİŞTİRİLMİŞ
+# =============================================================================
+
+ML_LAGS = [1, 2, 3, 4, 5, 6, 12]
+ML_WINDOWS = [3, 6, 12]
+ML_SPANS = [3, 6, 12]
+
+# build_grouped_ml_features tarafından üretilen feature kolonları
+ML_GROUPED_FEATURE_COLS = (
+    [f'lag_{lag}' for lag in ML_LAGS]
+    + [f'rolling_{stat}_{window}' for window in ML_WINDOWS for stat in ('mean', 'std', 'min', 'max')]
+    + [f'ema_{span}' for span in ML_SPANS]
+    + ['month', 'quarter', 'year', 'month_sin', 'month_cos', 'quarter_sin', 'quarter_cos', 'trend_index']
+    + ['is_q1', 'is_q2', 'is_q3', 'is_q4']
+    + ['growth_1m', 'growth_3m', 'growth_6m', 'momentum_3m', 'momentum_6m', 'volatility_3m', 'volatility_6m']
+)
+
+def estimate_ml_feature_memory(n_rows, float32=False, n_features=None):
+    """Feature matrisi için tahmini bellek (MB) - hesaplamadan önce kontrol için"""
+    if n_features is None:
+        n_features = len(ML_GROUPED_FEATURE_COLS)
+    itemsize = 4 if float32 else 8
+    return n_rows * n_features * itemsize / (1024 * 1024)
+
+def build_grouped_ml_features(df, group_col=None, value_col='PF_Satis', fill_value=None, float32=False):
+    """
+    Birden fazla seri için ML feature'larını tek geçişte hesapla
+    
+    Lag, rolling, EMA, büyüme ve momentum feature'ları seri bazında
+    groupby-shift/rolling/ewm ile tüm seriler için birlikte hesaplanır.
+    Pencere feature'ları sadece geçmiş değerlerden hesaplanır (t anı için t-1'e kadar),
+    böylece aynı feature'lar tahmin sırasında adım adım ileri taşınabilir
+    (bkz. RecursiveFeatureState).
+    
+    Args:
+        df: DATE ve value_col içeren (group_col varsa seri kimliği de) veri
+        group_col: Seri kolonu (örn. TERRITORIES); None ise tek seri
+        fill_value: Eksik / sonsuz değerlerin yerine yazılacak değer (None: NaN kalır)
+        float32: Feature kolonlarını float32 olarak döndür (bellek yarıya iner)
+    """
+    sort_cols = [group_col, 'DATE'] if group_col else ['DATE']
+    df = df.sort_values(sort_cols, kind='stable').reset_index(drop=True)
+    
+    keys = df[group_col] if group_col else pd.Series(0, index=df.index)
+    group = df[value_col].groupby(keys, sort=False)
+    
+    features = {}
+    
+    # Lag features
+    for lag in ML_LAGS:
+        features[f'lag_{lag}'] = group.shift(lag)
+    
+    past = features['lag_1']
+    past_group = past.groupby(keys, sort=False)
+    
+    # Rolling statistics (pencere başına tek rolling geçişi)
+    for window in ML_WINDOWS:
+        rolled = past_group.rolling(window=window, min_periods=1).agg(['mean', 'std', 'min', 'max'])
+        rolled = rolled.reset_index(level=0, drop=True)
+        for stat in ('mean', 'std', 'min', 'max'):
+            features[f'rolling_{stat}_{window}'] = rolled[stat]
+    
+    # Exponential moving averages
+    for span in ML_SPANS:
+        features[f'ema_{span}'] = past_group.ewm(span=span, adjust=False).mean().reset_index(level=0, drop=True)
+    
+    # Date features
+    month = df['DATE'].dt.month
+    quarter = df['DATE'].dt.quarter
+    features.update({
+        'month': month,
+        'quarter': quarter,
+        'year': df['DATE'].dt.year,
+        'month_sin': np.sin(2 * np.pi * month / 12),
+        'month_cos': np.cos(2 * np.pi * month / 12),
+        'quarter_sin': np.sin(2 * np.pi * quarter / 4),
+        'quarter_cos': np.cos(2 * np.pi * quarter / 4),
+        'trend_index': keys.groupby(keys, sort=False).cumcount()
+    })
+    
+    # Seasonal features
+    for q in range(1, 5):
+        features[f'is_q{q}'] = (quarter == q).astype(int)
+    
+    # Growth / momentum / volatility
+    for periods in (1, 3, 6):
+        base = past_group.shift(periods)
+        # Sıfır paydada büyüme 0 (RecursiveFeatureState._growth ile aynı); sonsuz değer üretilmez
+        features[f'growth_{periods}m'] = ((past / base - 1) * 100).where(base != 0, 0.0)
+    features['momentum_3m'] = past - past_group.shift(3)
+    features['momentum_6m'] = past - past_group.shift(6)
+    features['volatility_3m'] = features['rolling_std_3']
+    features['volatility_6m'] = features['rolling_std_6']
+    
+    # Interaction features
+    if 'Pazar_Payi_%' in df.columns:
+        features['share_trend'] = (
+            df['Pazar_Payi_%'].groupby(keys, sort=False)
+            .rolling(window=3, min_periods=1).mean()
+            .reset_index(level=0, drop=True)
+        )
+    
+    feature_df = pd.DataFrame(features, index=df.index)
+    
+    if fill_value is not None:
+        feature_df = feature_df.replace([np.inf, -np.inf], np.nan).fillna(fill_value)
+    
+    if float32:
+        feature_df = feature_df.astype(np.float32)
+    
+    # Girdide aynı isimli kolonlar varsa yeni feature'lar geçerli olur
+    return pd.concat([df.drop(columns=feature_df.columns, errors='ignore'), feature_df], axis=1)
+
+def create_advanced_ml_features(df):
+    """GELİŞTİRİLMİŞ ML için feature oluştur"""
+    df = build_grouped_ml_features(df)
+    
+    # Fill NaN (sonsuz değerler de eksik sayılır; sklearn sonsuz girdiyi reddeder)
+    df = df.replace([np.inf, -np.inf], np.nan).bfill().ffill().fillna(0)
+    
+    return df
+
+ML_FEATURE_COLS = [
+    'lag_1', 'lag_2', 'lag_3', 'lag_6', 'lag_12',
+    'rolling_mean_3', 'rolling_mean_6', 'rolling_mean_12',
+    'rolling_std_3', 'rolling_std_6',
+    'ema_3', 'ema_6',
+    'month', 'quarter', 'year',
+    'month_sin', 'month_cos',
+    'trend_index',
+    'growth_1m', 'growth_3m',
+    'momentum_3m', 'momentum_6m',
+    'volatility_3m'
+]
+
+# Model parametreleri veya feature tanımları değiştiğinde artırılır (kayıtlı modeller geçersiz olur)
+ML_MODEL_CONFIG_VERSION = 'v3'
+
+# Tahmin aralığı için z değeri (%95)
+FORECAST_INTERVAL_Z = 1.96
+
+class RecursiveFeatureState:
+    """
+    Özyinelemeli tahmin için feature durumu
+    
+    create_advanced_ml_features ile aynı tanımları kullanır; her yeni değer
+    eklendiğinde lag, rolling ve EMA feature'ları O(1) güncellenir.
+    Geçmiş tek seri (ay) veya seri × ay matrisi olabilir; matris verildiğinde
+    tüm seriler tek adımda birlikte ilerletilir.
+    """
+    
+    WINDOWS = (3, 6, 12)
+    SPANS = (3, 6, 12)
+    
+    def __init__(self, history, last_date):
+        values = np.atleast_2d(np.asarray(history, dtype=float))
+        n_series, n_months = values.shape
+        
+        self.recent = deque(values[:, -12:].T, maxlen=12)
+        self.last_date = pd.Timestamp(last_date)
+        self.trend_index = n_months
+        
+        self.sums = {}
+        self.sq_sums = {}
+        for window in self.WINDOWS:
+            tail = values[:, -window:]
+            self.sums[window] = tail.sum(axis=1)
+            self.sq_sums[window] = (tail ** 2).sum(axis=1)
+        
+        self.emas = {}
+        for span in self.SPANS:
+            alpha = 2 / (span + 1)
+            ema = values[:, 0].copy() if n_months else np.zeros(n_series)
+            for month_values in values[:, 1:].T:
+                ema = alpha * month_values + (1 - alpha) * ema
+            self.emas[span] = ema
+        
+        self._zeros = np.zeros(n_series)
+    
+    def _lag(self, k):
+        return self.recent[-k] if k <= len(self.recent) else self._zeros
+    
+    def _growth(self, k_new, k_old):
+        old = self._lag(k_old)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(old != 0, (self._lag(k_new) / old - 1) * 100, 0.0)
+    
+    def _rolling(self, window):
+        count = min(window, len(self.recent))
+        if count == 0:
+            return self._zeros, self._zeros
+        mean = self.sums[window] / count
+        if count < 2:
+            return mean, self._zeros
+        var = (self.sq_sums[window] - count * mean ** 2) / (count - 1)
+        return mean, np.sqrt(np.maximum(var, 0.0))
+    
+    def features(self):
+        """Sıradaki ay için feature sözlüğü (her feature seri sayısı uzunluğunda)"""
+        next_date = self.last_date + pd.DateOffset(months=1)
+        month = next_date.month
+        
+        row = {f'lag_{k}': self._lag(k) for k in (1, 2, 3, 4, 5, 6, 12)}
+        for window in self.WINDOWS:
+            row[f'rolling_mean_{window}'], row[f'rolling_std_{window}'] = self._rolling(window)
+        for span in self.SPANS:
+            row[f'ema_{span}'] = self.emas[span]
+        
+        calendar = {
+            'month': month,
+            'quarter': next_date.quarter,
+            'year': next_date.year,
+            'month_sin': np.sin(2 * np.pi * month / 12),
+            'month_cos': np.cos(2 * np.pi * month / 12),
+            'trend_index': self.trend_index
+        }
+        row.update({name: self._zeros + value for name, value in calendar.items()})
+        
+        row.update({
+            'growth_1m': self._growth(1, 2),
+            'growth_3m': self._growth(1, 4),
+            'momentum_3m': self._lag(1) - self._lag(4),
+            'momentum_6m': self._lag(1) - self._lag(7) if len(self.recent) >= 7 else self._zeros,
+            'volatility_3m': row['rolling_std_3']
+        })
+        return next_date, row
+    
+    def push(self, values):
+        """Yeni ay değer(ler)ini ekle (tahmin veya gerçekleşen)"""
+        values = self._zeros + np.asarray(values, dtype=float)
+        
+        for window in self.WINDOWS:
+            if len(self.recent) >= window:
+                leaving = self.recent[-window]
+                self.sums[window] = self.sums[window] - leaving
+                self.sq_sums[window] = self.sq_sums[window] - leaving ** 2
+            self.sums[window] = self.sums[window] + values
+            self.sq_sums[window] = self.sq_sums[window] + values ** 2
+        
+        for span in self.SPANS:
+            alpha = 2 / (span + 1)
+            self.emas[span] = alpha * values + (1 - alpha) * self.emas[span]
+        
+        self.recent.append(values)
+        self.last_date = self.last_date + pd.DateOffset(months=1)
+        self.trend_index += 1
+
+def recursive_ml_forecast(model, feature_cols, history, last_date, forecast_periods, residual_std=0.0):
+    """
+    Seçilen model ile özyinelemeli çok adımlı tahmin
+    
+    Her adımın tahmini bir sonraki adımın lag/rolling/EMA feature'larına girer.
+    Tahmin aralığı: tahmin ± z × kalıntı std × √adım
+    """
+    state = RecursiveFeatureState(history, last_date)
+    forecast_data = []
+    
+    for step in range(1, forecast_periods + 1):
+        next_date, row = state.features()
+        X_next = pd.DataFrame({col: row[col] for col in feature_cols})
+        next_pred = max(0.0, float(model.predict(X_next)[0]))  # Negatif olmamasını sağla
+        
+        margin = FORECAST_INTERVAL_Z * residual_std * np.sqrt(step)
+        forecast_data.append({
+            'DATE': next_date,
+            'YIL_AY': next_date.strftime('%Y-%m'),
+            'PF_Satis': next_pred,
+            'Alt_Sinir': max(0.0, next_pred - margin),
+            'Ust_Sinir': next_pred + margin
+        })
+        state.push(next_pred)
+    
+    return pd.DataFrame(forecast_data)
+
+def benchmark_recursive_forecast(df_features, model, feature_cols, split_idx):
+    """
+    Test döneminde çok adımlı tahmini basit yöntemlerle karşılaştır
+    
+    Tahmin başlangıcı eğitim sonu; test dönemi boyunca gerçek değer kullanılmaz.
+    """
+    y = df_features['PF_Satis'].values.astype(float)
+    y_train, y_test = y[:split_idx], y[split_idx:]
+    horizon = len(y_test)
+    
+    if horizon == 0 or split_idx == 0:
+        return pd.DataFrame()
+    
+    ml_path = recursive_ml_forecast(
+        model, feature_cols, y_train, df_features['DATE'].iloc[split_idx - 1], horizon
+    )['PF_Satis'].values
+    
+    candidates = {
+        ('Özyinelemeli ML', 'ML Tahmin'): ml_path,
+        ('Son Değer', 'Basit Tahmin'): np.full(horizon, y_train[-1]),
+        ('6 Aylık Ortalama', 'Basit Tahmin'): np.full(horizon, y_train[-6:].mean())
+    }
+    
+    rows = []
+    for (name, forecast_type), path in candidates.items():
+        errors = y_test - path
+        rows.append({
+            'Model': name,
+            'Tahmin_Tipi': forecast_type,
+            'Ufuk (Ay)': horizon,
+            'MAE': np.mean(np.abs(errors)),
+            'RMSE': np.sqrt(np.mean(errors ** 2)),
+            'MAPE': np.mean(np.abs(errors) / np.maximum(y_test, 1)) * 100
+        })
+    
+    return pd.DataFrame(rows).sort_values('MAPE').reset_index(drop=True)
+
+# Tam kapasitede Random Forest ağaç sayısı (yük altında zamanlayıcı azaltır)
+RF_N_ESTIMATORS = 200
+
+def build_ml_models(n_jobs=-1, n_estimators=RF_N_ESTIMATORS):
+    """Karşılaştırılan ML modelleri (eğitilmemiş)"""
+    from sklearn.linear_model import LinearRegression, Ridge
+    from sklearn.ensemble import RandomForestRegressor
+    
+    # Gelişmiş modeller
+    return {
+        'Linear Regression': LinearRegression(),
+        'Ridge Regression': Ridge(alpha=1.0),
+        'Random Forest': RandomForestRegressor(
+            n_estimators=n_estimators,
+            random_state=42,
+            max_depth=10,
+            min_samples_split=5,
+            n_jobs=n_jobs
+        )
+    }
+
+def fit_advanced_ml_models(df_features, product=None, brick=None, registry=None, progress_callback=None):
+    """
+    ML modellerini eğit ve test metriklerini hesapla (kayıt defteri destekli)
+    
+    Tahmin ufku eğitimi etkilemez; aynı seri + ürün + brick + feature seti için
+    daha önce eğitilmiş modeller diskteki kayıt defterinden yüklenir.
+    
+    Eğitim, süreç genelindeki zamanlayıcıdan sıra ve çekirdek alarak yapılır.
+    Yük altında az ağaçla eğitilen Random Forest kaydı, kuyruk boşaldığında
+    warm start ile kalan ağaçlar eklenerek tamamlanır.
+    
+    progress_callback(ad, durum) eğitim sırası ve her model için
+    'Bekliyor' / 'Eğitiliyor' / 'Tamam' / 'Hata' durumlarıyla çağrılır.
+    
+    Returns:
+        (results, best_model_name, benchmark, from_registry)
+    """
+    # Sadece mevcut kolonları kullan
+    available_cols = [col for col in ML_FEATURE_COLS if col in df_features.columns]
+    
+    if registry is None:
+        registry = get_model_registry()
+    
+    registry_key = registry.make_key(
+        series_fingerprint(df_features, ['DATE', 'PF_Satis']),
+        product,
+        brick,
+        available_cols + [ML_MODEL_CONFIG_VERSION]
+    )
+    
+    scheduler = get_training_scheduler()
+    warm_models = {}
+    
+    cached = registry.get(registry_key)
+    if cached is not None:
+        results, best_model_name, benchmark = cached
+        degraded = {name: metrics['model'] for name, metrics in results.items() if metrics.get('degraded')}
+        if not degraded or not scheduler.is_idle():
+            return results, best_model_name, benchmark, True
+        warm_models = degraded
+    
+    # Train/Test split (zaman bazlı - son %20 test)
+    split_idx = int(len(df_features) * 0.8)
+    
+    if progress_callback is not None:
+        progress_callback('Eğitim Sırası', 'Bekliyor')
+    
+    with scheduler.slot() as plan:
+        if progress_callback is not None:
+            progress_callback('Eğitim Sırası', 'Tamam')
+        
+        models = build_ml_models(
+            n_jobs=plan.n_jobs,
+            n_estimators=max(1, int(RF_N_ESTIMATORS * plan.tree_factor))
+        )
+        
+        # Önceki kısmi modele kalan ağaçları ekle (sadece tam kapasitede)
+        if not plan.degraded:
+            for name, model in warm_models.items():
+                model.set_params(warm_start=True, n_estimators=RF_N_ESTIMATORS, n_jobs=plan.n_jobs)
+                models[name] = model
+        
+        results, best_model_name, benchmark = _fit_and_score_ml_models(
+            models, df_features, available_cols, split_idx, plan, progress_callback
+        )
+    
+    if not results:
+        return None, None, None, False
+    
+    registry.put(registry_key, (results, best_model_name, benchmark))
+    
+    return results, best_model_name, benchmark, False
+
+def _fit_and_score_ml_models(models, df_features, available_cols, split_idx, plan, progress_callback=None):
+    """
+    Modelleri eğitim döneminde eğit, test döneminde skorla
+    
+    Returns:
+        (results, best_model_name, benchmark); hiçbir model eğitilemezse (None, None, None)
+    """
+    # scikit-learn sadece ML gerektiğinde yüklenir
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+    
+    train_df = df_features.iloc[:split_idx]
+    test_df = df_features.iloc[split_idx:]
+    
+    X_train = train_df[available_cols]
+    y_train = train_df['PF_Satis']
+    X_test = test_df[available_cols]
+    y_test = test_df['PF_Satis']
+    
+    results = {}
+    
+    if progress_callback is not None:
+        for name in models:
+            progress_callback(name, 'Bekliyor')
+    
+    for name, model in models.items():
+        if progress_callback is not None:
+            progress_callback(name, 'Eğitiliyor')
+        try:
+            model.fit(X_train, y_train)
+            if model.get_params().get('warm_start'):
+                model.set_params(warm_start=False)
+            y_pred = model.predict(X_test)
+            
+            # Negatif tahminleri 0 yap
+            y_pred = np.maximum(y_pred, 0)
+            
+            mae = mean_absolute_error(y_test, y_pred)
+            rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+            mape = np.mean(np.abs((y_test - y_pred) / np.maximum(y_test, 1))) * 100
+            r2 = r2_score(y_test, y_pred)
+            
+            results[name] = {
+                'model': model,
+                'MAE': mae,
+                'RMSE': rmse,
+                'MAPE': mape,
+                'R2': r2,
+                'y_pred': y_pred,
+                'residual_std': float(np.std(y_test - y_pred, ddof=1)) if len(y_test) > 1 else 0.0,
+                'degraded': plan.degraded and 'n_estimators' in model.get_params(),
+                'queue_wait': plan.wait_seconds
+            }
+        except Exception as e:
+            logger.warning("%s modeli eğitilemedi: %s", name, e)
+            if progress_callback is not None:
+                progress_callback(name, 'Hata')
+            continue
+        
+        if progress_callback is not None:
+            progress_callback(name, 'Tamam')
+    
+    if not results:
+        return None, None, None
+    
+    # En iyi model (MAPE'e göre)
+    best_model_name = min(results.keys(), key=lambda x: results[x]['MAPE'])
+    
+    benchmark = benchmark_recursive_forecast(
+        df_features, results[best_model_name]['model'], available_cols, split_idx
+    )
+    
+    return results, best_model_name, benchmark
+
+def train_advanced_ml_models(df, forecast_periods=3, product=None, brick=None, progress_callback=None):
+    """GELİŞTİRİLMİŞ ML modelleri ile tahmin"""
+    if len(df) < 24:  # En az 2 yıllık veri
+        return None, None, None
+    
+    df_features = create_advanced_ml_features(df)
+    
+    # Eğitim kayıt defterinden gelir; sadece tahmin ufku değiştiyse yeniden eğitilmez
+    results, best_model_name, benchmark, from_registry = fit_advanced_ml_models(
+        df_features, product, brick, progress_callback=progress_callback
+    )
+    
+    if not results:
+        return None, None, None
+    
+    for metrics in results.values():
+        metrics['from_registry'] = from_registry
+    
+    # Test dönemi çok adımlı karşılaştırma (ML vs basit yöntemler)
+    results[best_model_name]['forecast_benchmark'] = benchmark
+    
+    # Seçilen en iyi model ile özyinelemeli tahmin (aralıklar test kalıntılarından)
+    best_metrics = results[best_model_name]
+    last_date = df_features['DATE'].iloc[-1]
+    forecast_df = recursive_ml_forecast(
+        best_metrics['model'],
+        [col for col in ML_FEATURE_COLS if col in df_features.columns],
+        df_features['PF_Satis'].values,
+        last_date,
+        forecast_periods,
+        residual_std=best_metrics.get('residual_std', 0.0)
+    )
+    forecast_df['Model'] = best_model_name
+    forecast_df['Tahmin_Tipi'] = 'ML Tahmin'
+    
+    # Basit tahmin metodları ekle (benchmark)
+    simple_forecast_df = calculate_baseline_forecasts(df_features, forecast_periods)
+    
+    # Tüm tahminleri birleştir
+    all_forecasts = pd.concat([forecast_df, simple_forecast_df], ignore_index=True)
+    
+    return results, best_model_name, all_forecasts
+
+def calculate_baseline_forecasts(df, forecast_periods):
+    """Basit tahmin yöntemleri (son değer, 6 aylık ortalama); eğitim gerektirmez"""
+    simple_forecasts = []
+    last_date = df['DATE'].iloc[-1]
+    
+    # 1. Son değer yöntemi
+    last_value = df['PF_Satis'].iloc[-1]
+    for i in range(forecast_periods):
+        simple_forecasts.append({
+            'DATE': last_date + pd.DateOffset(months=i+1),
+            'YIL_AY': (last_date + pd.DateOffset(months=i+1)).strftime('%Y-%m'),
+            'PF_Satis': last_value,
+            'Model': 'Son Değer',
+            'Tahmin_Tipi': 'Basit Tahmin'
+        })
+    
+    # 2. Hareketli ortalama yöntemi
+    ma_value = df['PF_Satis'].tail(6).mean()
+    for i in range(forecast_periods):
+        simple_forecasts.append({
+            'DATE': last_date + pd.DateOffset(months=i+1),
+            'YIL_AY': (last_date + pd.DateOffset(months=i+1)).strftime('%Y-%m'),
+            'PF_Satis': ma_value,
+            'Model': '6 Aylık Ortalama',
+            'Tahmin_Tipi': 'Basit Tahmin'
+        })
+    
+    return pd.DataFrame(simple_forecasts)
+
+# =============================================================================
+# GLOBAL MODEL - TÜM BRICK'LER
+# =============================================================================
+
+GLOBAL_ENCODING_COLS = ['brick_code', 'city_code', 'region_code']
+
+# Bu boyutun üzerindeki feature matrisleri otomatik olarak float32 hesaplanır
+GLOBAL_FLOAT32_THRESHOLD_MB = 256
+
+def build_brick_month_panel(df, product, date_filter=None):
+    """
+    Brick × ay satış paneli (eksik aylar 0 satış ile tamamlanır)
+    
+    Returns:
+        (panel, brick_info): TERRITORIES, YIL_AY, DATE, PF_Satis paneli
+        (brick bazında ay sıralı) ve brick → şehir/bölge/kod tablosu
+    """
+    cols = get_product_columns(product)
+    
+    df_filtered = df
+    if date_filter:
+        df_filtered = df_filtered[(df_filtered['DATE'] >= date_filter[0]) & 
+                                  (df_filtered['DATE'] <= date_filter[1])]
+    
+    if df_filtered.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    
+    # Brick kodlamaları (şehir / bölge)
+    brick_info = df_filtered.groupby('TERRITORIES').agg(
+        CITY=('CITY_NORMALIZED', 'first'),
+        REGION=('REGION', 'first')
+    ).reset_index()
+    brick_info['brick_code'] = np.arange(len(brick_info))
+    brick_info['city_code'] = brick_info['CITY'].astype('category').cat.codes
+    brick_info['region_code'] = brick_info['REGION'].astype('category').cat.codes
+    
+    # Brick × ay ızgarası
+    month_range = pd.date_range(
+        pd.to_datetime(df_filtered['YIL_AY'].min()),
+        pd.to_datetime(df_filtered['YIL_AY'].max()),
+        freq='MS'
+    )
+    grid = pd.MultiIndex.from_product(
+        [brick_info['TERRITORIES'], month_range.strftime('%Y-%m')],
+        names=['TERRITORIES', 'YIL_AY']
+    )
+    
+    panel = (
+        df_filtered.groupby(['TERRITORIES', 'YIL_AY'])[cols['pf']].sum()
+        .reindex(grid, fill_value=0)
+        .rename('PF_Satis')
+        .reset_index()
+    )
+    panel['DATE'] = pd.to_datetime(panel['YIL_AY'])
+    
+    return panel, brick_info
+
+def build_global_ml_dataset(df, product, date_filter=None, float32=None):
+    """
+    Tüm brick'ler için brick × ay feature matrisi (tek vektörize geçiş)
+    
+    Eksik aylar 0 satış ile tamamlanır. Feature'lar build_grouped_ml_features
+    ile brick bazında hesaplanır; eksik geçmiş 0 kabul edilir
+    (RecursiveFeatureState ile aynı).
+    
+    float32=None ise matrisin tahmini boyutu GLOBAL_FLOAT32_THRESHOLD_MB'ı
+    aştığında feature'lar float32 hesaplanır.
+    
+    Returns:
+        (panel, brick_info): feature matrisi ve brick → şehir/bölge/kod tablosu
+    """
+    panel, brick_info = build_brick_month_panel(df, product, date_filter)
+    if panel.empty:
+        return panel, brick_info
+    
+    estimated_mb = estimate_ml_feature_memory(len(panel))
+    if float32 is None:
+        float32 = estimated_mb > GLOBAL_FLOAT32_THRESHOLD_MB
+    logger.info(
+        "Global feature matrisi: %d satır, tahmini %.1f MB (float64), float32=%s",
+        len(panel), estimated_mb, float32
+    )
+    
+    panel = build_grouped_ml_features(panel, group_col='TERRITORIES', fill_value=0, float32=float32)
+    
+    panel = panel.merge(
+        brick_info[['TERRITORIES'] + GLOBAL_ENCODING_COLS],
+        on='TERRITORIES',
+        how='left'
+    )
+    
+    return panel, brick_info
+
+def train_global_ml_model(df, product, date_filter=None, forecast_periods=6, float32=None, registry=None):
+    """
+    Tüm brick'ler için tek global model ve toplu tahmin
+    
+    Brick başına ayrı model yerine brick × ay matrisinde tek bir gradient
+    boosting modeli eğitilir; tahmin tüm brick'ler için aynı anda özyinelemeli
+    olarak yapılır.
+    
+    Returns:
+        (metrics, forecast_df) - yetersiz veride (None, None)
+    """
+    panel, brick_info = build_global_ml_dataset(df, product, date_filter, float32=float32)
+    if panel.empty:
+        return None, None
+    
+    n_bricks = len(brick_info)
+    n_months = len(panel) // n_bricks
+    if n_months < 24:  # En az 2 yıllık veri
+        return None, None
+    
+    feature_cols = ML_FEATURE_COLS + GLOBAL_ENCODING_COLS
+    
+    if registry is None:
+        registry = get_model_registry()
+    
+    registry_key = registry.make_key(
+        series_fingerprint(panel, ['TERRITORIES', 'DATE', 'PF_Satis']),
+        product,
+        'GLOBAL',
+        feature_cols + [str(panel['lag_1'].dtype), ML_MODEL_CONFIG_VERSION]
+    )
+    
+    cached = registry.get(registry_key)
+    if cached is not None:
+        model, metrics, residual_std = cached
+        metrics = dict(metrics, from_registry=True)
+    else:
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+        from threadpoolctl import threadpool_limits
+        
+        start = time.perf_counter()
+        
+        # İlk 12 ay lag_12 eksik olduğundan eğitimde kullanılmaz
+        usable = panel[panel['trend_index'] >= 12]
+        split_index = int(n_months * 0.8)
+        train_df = usable[usable['trend_index'] < split_index]
+        test_df = usable[usable['trend_index'] >= split_index]
+        
+        model = HistGradientBoostingRegressor(
+            max_iter=300,
+            learning_rate=0.05,
+            max_depth=8,
+            random_state=42
+        )
+        
+        # OpenMP thread sayısı oturumun zamanlayıcıdan aldığı çekirdekle sınırlı
+        with get_training_scheduler().slot() as plan, threadpool_limits(limits=plan.n_jobs):
+            model.fit(train_df[feature_cols], train_df['PF_Satis'])
+        
+        y_test = test_df['PF_Satis']
+        y_pred = np.maximum(model.predict(test_df[feature_cols]), 0)
+        residuals = y_test - y_pred
+        
+        # Brick bazlı kalıntı std (tahmin aralığı için); az gözlemde genel std
+        residual_std = residuals.groupby(test_df['TERRITORIES']).std().reindex(brick_info['TERRITORIES'])
+        residual_std = residual_std.fillna(residuals.std()).fillna(0).values
+        
+        metrics = {
+            'Model': 'Global Model',
+            'MAE': mean_absolute_error(y_test, y_pred),
+            'RMSE': np.sqrt(mean_squared_error(y_test, y_pred)),
+            'MAPE': np.mean(np.abs(residuals) / np.maximum(y_test, 1)) * 100,
+            'R2': r2_score(y_test, y_pred),
+            'Brick Sayısı': n_bricks,
+            'Eğitim Satırı': len(train_df),
+            'Eğitim Süresi (sn)': time.perf_counter() - start
+        }
+        
+        registry.put(registry_key, (model, metrics, residual_std))
+        metrics = dict(metrics, from_registry=False)
+    
+    # Tüm brick'ler için aynı anda özyinelemeli tahmin
+    history = panel['PF_Satis'].values.reshape(n_bricks, n_months)
+    encodings = {col: brick_info[col].values for col in GLOBAL_ENCODING_COLS}
+    state = RecursiveFeatureState(history, panel['DATE'].iloc[n_months - 1])
+    
+    forecast_frames = []
+    for step in range(1, forecast_periods + 1):
+        next_date, row = state.features()
+        X_next = pd.DataFrame({col: row[col] for col in ML_FEATURE_COLS})
+        for col, codes in encodings.items():
+            X_next[col] = codes
+        
+        preds = np.maximum(model.predict(X_next[feature_cols]), 0)
+        margin = FORECAST_INTERVAL_Z * residual_std * np.sqrt(step)
+        
+        forecast_frames.append(pd.DataFrame({
+            'TERRITORIES': brick_info['TERRITORIES'].values,
+            'CITY': brick_info['CITY'].values,
+            'REGION': brick_info['REGION'].values,
+            'DATE': next_date,
+            'YIL_AY': next_date.strftime('%Y-%m'),
+            'PF_Satis': preds,
+            'Alt_Sinir': np.maximum(preds - margin, 0),
+            'Ust_Sinir': preds + margin
+        }))
+        state.push(preds)
+    
+    forecast_df = pd.concat(forecast_frames, ignore_index=True)
+    forecast_df['Model'] = 'Global Model'
+    
+    return metrics, forecast_df
+
+# =============================================================================
+# ANALYSIS FUNCTIONS
+# =============================================================================
+
+def calculate_city_performance(df, product, date_filter=None, engine=None):
+    """Şehir bazlı performans"""
+    city_perf = aggregate_sales(df, product, ['CITY_NORMALIZED', 'REGION'], date_filter, engine)
+    
+    city_perf.columns = ['City', 'Region', 'PF_Satis', 'Rakip_Satis']
+    city_perf['Toplam_Pazar'] = city_perf['PF_Satis'] + city_perf['Rakip_Satis']
+    city_perf['Pazar_Payi_%'] = safe_divide(city_perf['PF_Satis'], city_perf['Toplam_Pazar']) * 100
+    
+    # Bölge isimlerini düzelt
+    city_perf['Bölge'] = city_perf['Region']
+    
+    return city_perf
+
+def calculate_brick_performance(df, product, date_filter=None, engine=None):
+    """Brick bazlı performans"""
+    terr_perf = aggregate_sales(df, product, ['TERRITORIES', 'REGION', 'CITY', 'MANAGER'], date_filter, engine)
+    
+    terr_perf.columns = ['Brick', 'Region', 'City', 'Manager', 'PF_Satis', 'Rakip_Satis']
+    terr_perf['Toplam_Pazar'] = terr_perf['PF_Satis'] + terr_perf['Rakip_Satis']
+    terr_perf['Pazar_Payi_%'] = safe_divide(terr_perf['PF_Satis'], terr_perf['Toplam_Pazar']) * 100
+    
+    total_pf = terr_perf['PF_Satis'].sum()
+    terr_perf['Agirlik_%'] = safe_divide(terr_perf['PF_Satis'], total_pf) * 100
+    terr_perf['Goreceli_Pazar_Payi'] = safe_divide(terr_perf['PF_Satis'], terr_perf['Rakip_Satis'])
+    
+    return terr_perf.sort_values('PF_Satis', ascending=False)
+
+def calculate_competitor_analysis(df, product, date_filter=None, engine=None):
+    """Rakip analizi"""
+    monthly = aggregate_sales(df, product, ['YIL_AY'], date_filter, engine).sort_values('YIL_AY')
+    
+    monthly.columns = ['YIL_AY', 'PF', 'Rakip']
+    monthly['PF_Pay_%'] = (monthly['PF'] / (monthly['PF'] + monthly['Rakip'])) * 100
+    monthly['Rakip_Pay_%'] = 100 - monthly['PF_Pay_%']
+    monthly['PF_Buyume'] = monthly['PF'].pct_change() * 100
+    monthly['Rakip_Buyume'] = monthly['Rakip'].pct_change() * 100
+    monthly['Fark'] = monthly['PF_Buyume'] - monthly['Rakip_Buyume']
+    
+    return monthly
+
+def calculate_portfolio_overview(df, date_filter=None, engine=None):
+    """
+    Dört ürün yan yana: toplamlar, pazar payı, son 3 ay büyümesi
+    
+    Tüm ürün kolonları tek toplamada gelir (satış küpünde ek maliyet yok).
+    
+    Returns:
+        (overview, monthly_share, region_share): ürün bazlı özet, ürün × ay
+        pazar payı (uzun format) ve bölge × ürün pazar payı tablosu
+    """
+    monthly = aggregate_portfolio_sales(df, ['YIL_AY'], date_filter, engine).sort_values('YIL_AY')
+    by_region = aggregate_portfolio_sales(df, ['REGION'], date_filter, engine)
+    
+    rows = []
+    share_frames = []
+    region_share = pd.DataFrame({'Region': by_region['REGION']})
+    
+    for product in PRODUCTS:
+        cols = get_product_columns(product)
+        pf = monthly[cols['pf']]
+        rakip = monthly[cols['rakip']]
+        
+        total_pf = pf.sum()
+        total_market = total_pf + rakip.sum()
+        recent_pf = pf.iloc[-3:].sum()
+        previous_pf = pf.iloc[-6:-3].sum()
+        
+        rows.append({
+            'Urun': product,
+            'PF_Satis': total_pf,
+            'Rakip_Satis': rakip.sum(),
+            'Toplam_Pazar': total_market,
+            'Pazar_Payi_%': total_pf / total_market * 100 if total_market > 0 else 0,
+            'Aylik_Ort_PF': total_pf / len(monthly) if len(monthly) > 0 else 0,
+            'Son3Ay_Buyume_%': (recent_pf / previous_pf - 1) * 100 if previous_pf > 0 else np.nan
+        })
+        
+        share_frames.append(pd.DataFrame({
+            'YIL_AY': monthly['YIL_AY'].values,
+            'Urun': product,
+            'Pazar_Payi_%': safe_divide(pf.values, (pf + rakip).values) * 100
+        }))
+        
+        region_pf = by_region[cols['pf']]
+        region_share[product] = safe_divide(region_pf, region_pf + by_region[cols['rakip']]) * 100
+    
+    overview = pd.DataFrame(rows)
+    monthly_share = pd.concat(share_frames, ignore_index=True)
+    
+    return overview, monthly_share, region_share
+
+def calculate_bcg_matrix(df, product, date_filter=None, engine=None):
+    """BCG Matrix"""
+    cols = get_product_columns(product)
+    
+    terr_perf = calculate_brick_performance(df, product, date_filter, engine=engine)
+    
+    first_half, second_half = _brick_half_period_sales(df, [cols['pf']], date_filter, engine)
+    terr_perf['Pazar_Buyume_%'] = _half_period_growth(
+        terr_perf['Brick'], first_half[cols['pf']], second_half[cols['pf']]
+    )
+    
+    terr_perf['BCG_Kategori'] = assign_bcg_categories(terr_perf['Goreceli_Pazar_Payi'], terr_perf['Pazar_Buyume_%'])
+    
+    return terr_perf
+
+def _brick_half_period_sales(df, value_cols, date_filter=None, engine=None):
+    """
+    Brick bazlı dönemin ilk ve ikinci yarısı toplamları
+    
+    Dönem ay bazında ikiye bölünür (tek ayda ikinci yarı ağır basar); brick × ay
+    toplamından hesaplandığı için satış küpünde ham veriye dönülmez.
+    """
+    monthly = _aggregate_columns(df, value_cols, ['TERRITORIES', 'YIL_AY'], date_filter, engine)
+    
+    months = np.sort(monthly['YIL_AY'].unique())
+    in_second_half = monthly['YIL_AY'].isin(months[len(months) // 2:])
+    
+    first_half = monthly[~in_second_half].groupby('TERRITORIES')[value_cols].sum()
+    second_half = monthly[in_second_half].groupby('TERRITORIES')[value_cols].sum()
+    
+    return first_half, second_half
+
+def _half_period_growth(bricks, first_half, second_half):
+    """İkinci yarının ilk yarıya göre büyümesi (%); ilk yarı satışı yoksa 0"""
+    first = bricks.map(first_half).fillna(0).values
+    second = bricks.map(second_half).fillna(0).values
+    valid = bricks.isin(second_half.index).values & (first > 0)
+    return np.where(valid, (second - first) / np.where(valid, first, 1) * 100, 0)
+
+def assign_bcg_categories(relative_share, growth):
+    """
+    BCG kategorileri (vektörel): medyan göreceli pazar payı ve medyan büyümeye göre
+    
+    Returns:
+        np.ndarray: "⭐ Star" / "🐄 Cash Cow" / "❓ Question Mark" / "🐶 Dog"
+    """
+    relative_share = pd.Series(np.asarray(relative_share, dtype=float))
+    growth = pd.Series(np.asarray(growth, dtype=float))
+    median_share = relative_share.median()
+    median_growth = growth.median()
+    
+    high_share = (relative_share >= median_share).values
+    low_share = (relative_share < median_share).values
+    high_growth = (growth >= median_growth).values
+    low_growth = (growth < median_growth).values
+    
+    return np.select(
+        [high_share & high_growth, high_share & low_growth, low_share & high_growth],
+        BCG_CATEGORIES[:3],
+        default=BCG_CATEGORIES[3]
+    )
+
+def calculate_portfolio_bcg(df, date_filter=None, engine=None):
+    """
+    Tüm ürünler için brick bazlı BCG kategorisi ve yatırım stratejisi (tek geçiş)
+    
+    Dört ürünün kolonları aynı geniş toplamadan vektörel hesaplanır; her
+    ürünün kategorisi calculate_bcg_matrix ile aynıdır. Yatırım stratejisi
+    calculate_investment_strategy kurallarıyla brick bazında atanır.
+    
+    Returns:
+        (matrix, details): brick × ürün BCG kategori tablosu ve uzun formatta
+        brick × ürün metrikleri (pazar payı, büyüme, kategori, strateji)
+    """
+    keys = ['TERRITORIES', 'REGION', 'CITY', 'MANAGER']
+    totals = aggregate_portfolio_sales(df, keys, date_filter, engine)
+    first_half, second_half = _brick_half_period_sales(df, get_portfolio_columns(), date_filter, engine)
+    
+    bricks = totals[keys].copy()
+    bricks.columns = ['Brick', 'Region', 'City', 'Manager']
+    matrix = bricks.copy()
+    
+    details = []
+    for product in PRODUCTS:
+        cols = get_product_columns(product)
+        
+        perf = bricks.copy()
+        perf['Urun'] = product
+        perf['PF_Satis'] = totals[cols['pf']].values
+        perf['Rakip_Satis'] = totals[cols['rakip']].values
+        perf['Toplam_Pazar'] = perf['PF_Satis'] + perf['Rakip_Satis']
+        perf['Pazar_Payi_%'] = safe_divide(perf['PF_Satis'], perf['Toplam_Pazar']) * 100
+        perf['Goreceli_Pazar_Payi'] = safe_divide(perf['PF_Satis'], perf['Rakip_Satis'])
+        
+        perf['Pazar_Buyume_%'] = _half_period_growth(
+            perf['Brick'], first_half[cols['pf']], second_half[cols['pf']]
+        )
+        
+        perf['BCG_Kategori'] = assign_bcg_categories(perf['Goreceli_Pazar_Payi'], perf['Pazar_Buyume_%'])
+        
+        strategy = calculate_investment_strategy(perf)
+        perf['Yatırım_Stratejisi'] = strategy['Yatırım_Stratejisi'] if len(strategy) else None
+        
+        matrix[product] = perf['BCG_Kategori'].values
+        details.append(perf)
+    
+    details = pd.concat(details, ignore_index=True) if details else pd.DataFrame()
+    
+    return matrix, details
+
+# =============================================================================
+# YATIRIM STRATEJİSİ - GELİŞTİRİLMİŞ ALGORİTMA
+# =============================================================================
+
+def calculate_investment_strategy(city_perf):
+    """
+    Geliştirilmiş Yatırım Stratejisi Algoritması
+    """
+    df = city_perf.copy()
+    df = df[df['PF_Satis'] > 0]
+    
+    if len(df) == 0:
+        return df
+    
+    # 1. PAZAR BÜYÜKLÜĞÜ SEGMENTİ
+    try:
+        df["Pazar_Büyüklüğü"] = pd.qcut(
+            df["Toplam_Pazar"], 
+            q=3, 
+            labels=["Küçük", "Orta", "Büyük"],
+            duplicates='drop'
+        )
+    except:
+        df["Pazar_Büyüklüğü"] = "Orta"
+    
+    # 2. PERFORMANS SEGMENTİ
+    try:
+        df["Performans"] = pd.qcut(
+            df["PF_Satis"], 
+            q=3, 
+            labels=["Düşük", "Orta", "Yüksek"],
+            duplicates='drop'
+        )
+    except:
+        df["Performans"] = "Orta"
+    
+    # 3. PAZAR PAYI SEGMENTİ
+    try:
+        df["Pazar_Payı_Segment"] = pd.qcut(
+            df["Pazar_Payi_%"], 
+            q=3, 
+            labels=["Düşük", "Orta", "Yüksek"],
+            duplicates='drop'
+        )
+    except:
+        df["Pazar_Payı_Segment"] = "Orta"
+    
+    # 4. BÜYÜME POTANSİYELİ
+    df["Büyüme_Alanı"] = df["Toplam_Pazar"] - df["PF_Satis"]
+    try:
+        df["Büyüme_Potansiyeli"] = pd.qcut(
+            df["Büyüme_Alanı"],
+            q=3,
+            labels=["Düşük", "Orta", "Yüksek"],
+            duplicates='drop'
+        )
+    except:
+        df["Büyüme_Potansiyeli"] = "Orta"
+    
+    # 5. STRATEJİ ATAMA (vektörel)
+    pazar_buyuklugu = df["Pazar_Büyüklüğü"].astype(str)
+    pazar_payi = df["Pazar_Payı_Segment"].astype(str)
+    buyume_potansiyeli = df["Büyüme_Potansiyeli"].astype(str)
+    performans = df["Performans"].astype(str)
+    
+    df["Yatırım_Stratejisi"] = np.select(
+        [
+            pazar_buyuklugu.isin(["Büyük", "Orta"]) & (pazar_payi == "Düşük") &
+            buyume_potansiyeli.isin(["Yüksek", "Orta"]),
+            
+            pazar_buyuklugu.isin(["Büyük", "Orta"]) & (pazar_payi == "Orta") &
+            performans.isin(["Orta", "Yüksek"]),
+            
+            (pazar_buyuklugu == "Büyük") & (pazar_payi == "Yüksek"),
+            
+            (pazar_buyuklugu == "Küçük") & (buyume_potansiyeli == "Yüksek") &
+            performans.isin(["Orta", "Yüksek"])
+        ],
+        ["🚀 Agresif", "⚡ Hızlandırılmış", "🛡️ Koruma", "💎 Potansiyel"],
+        default="👁️ İzleme"
+    )
+    
+    return df
+
+# =============================================================================
+# ANOMALİ TESPİTİ
+# =============================================================================
+
+ANOMALY_LEVELS = {'TERRITORIES': 'Brick', 'CITY_NORMALIZED': 'Şehir'}
+ANOMALY_SERIES = {'PF_Satis': 'PF', 'Rakip_Satis': 'Rakip'}
+
+def build_monthly_aggregate(df, product, date_filter=None, engine=None):
+    """
+    Brick × ay PF / rakip toplamları (tek groupby)
+    
+    Şehir ve bölge kolonlarını da taşıdığı için şehir / bölge bazlı aylık
+    seriler bu tablodan yeniden ham veriye dönmeden türetilir.
+    """
+    monthly = aggregate_sales(df, product, ['TERRITORIES', 'CITY_NORMALIZED', 'REGION', 'YIL_AY'], date_filter, engine)
+    
+    monthly.columns = ['TERRITORIES', 'CITY_NORMALIZED', 'REGION', 'YIL_AY', 'PF_Satis', 'Rakip_Satis']
+    
+    return monthly
+
+def detect_sales_anomalies(monthly_agg, window=6, threshold=3.5, min_baseline=0):
+    """
+    Brick ve şehir aylık PF / rakip serilerinde anomali tespiti (robust z-skor)
+    
+    Her ay, serinin önceki `window` ayının medyanı ve MAD'i ile karşılaştırılır:
+    z = (değer - medyan) / (MAD / 0.6745). MAD sıfırsa ortalama mutlak sapma,
+    o da çok küçükse medyanın %10'u ölçek olarak kullanılır (sabit seride ani
+    sıfırlanma da yakalanır). Tüm seriler tek bir seri × ay matrisinde, kayan
+    pencere ile tek geçişte hesaplanır.
+    
+    Returns:
+        pd.DataFrame: |z| büyükten küçüğe sıralı anomali tablosu
+    """
+    if monthly_agg.empty:
+        return pd.DataFrame()
+    
+    months = pd.period_range(monthly_agg['YIL_AY'].min(), monthly_agg['YIL_AY'].max(), freq='M').strftime('%Y-%m')
+    if len(months) <= window:
+        return pd.DataFrame()
+    
+    # Seri × ay matrisi: (seviye, ad, seri) satırları
+    blocks = []
+    labels = []
+    regions = []
+    for level_col, level_name in ANOMALY_LEVELS.items():
+        wide = monthly_agg.groupby([level_col, 'YIL_AY'])[list(ANOMALY_SERIES)].sum().unstack('YIL_AY')
+        region_map = monthly_agg.groupby(level_col)['REGION'].first()
+        for value_col, series_name in ANOMALY_SERIES.items():
+            block = wide[value_col].reindex(columns=months, fill_value=0).fillna(0)
+            blocks.append(block.to_numpy(dtype=float))
+            labels += [(level_name, key, series_name) for key in block.index]
+            regions.append(region_map.reindex(block.index).to_numpy())
+    
+    values = np.vstack(blocks)
+    region_values = np.concatenate(regions)
+    
+    # t ayı için pencere: t-window ... t-1
+    past = sliding_window_view(values, window, axis=1)[:, :-1, :]
+    current = values[:, window:]
+    
+    median = np.median(past, axis=2)
+    deviation = np.abs(past - median[..., None])
+    mad = np.median(deviation, axis=2)
+    
+    scale = np.where(mad > 0, mad / 0.6745, deviation.mean(axis=2) * 1.2533)
+    scale = np.maximum(scale, 0.1 * np.abs(median))
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(scale > 0, (current - median) / scale, 0.0)
+    
+    flagged = (np.abs(z) >= threshold) & (np.maximum(median, current) > min_baseline)
+    series_idx, month_idx = np.nonzero(flagged)
+    
+    if len(series_idx) == 0:
+        return pd.DataFrame()
+    
+    expected = median[series_idx, month_idx]
+    actual = current[series_idx, month_idx]
+    z_scores = z[series_idx, month_idx]
+    
+    anomalies = pd.DataFrame({
+        'Seviye': [labels[i][0] for i in series_idx],
+        'Ad': [labels[i][1] for i in series_idx],
+        'Bölge': region_values[series_idx],
+        'Seri': [labels[i][2] for i in series_idx],
+        'Ay': months[month_idx + window],
+        'Değer': actual,
+        'Beklenen': expected,
+        'Sapma_%': np.where(expected > 0, (actual - expected) / np.where(expected > 0, expected, 1) * 100, np.nan),
+        'Robust_Z': z_scores,
+        'Yön': np.where(z_scores < 0, '📉 Düşüş', '📈 Artış')
+    })
+    
+    anomalies['_abs_z'] = anomalies['Robust_Z'].abs()
+    anomalies = anomalies.sort_values(['_abs_z', 'Ay'], ascending=[False, False]).drop(columns='_abs_z')
+    
+    return anomalies.reset_index(drop=True)
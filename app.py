@@ -17,20 +17,61 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime, timedelta
 import warnings
-from io import BytesIO
 import json
-from sklearn.linear_model import LinearRegression, Ridge
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from statsmodels.tsa.seasonal import seasonal_decompose
-from statsmodels.tsa.stattools import adfuller
-import geopandas as gpd
-from shapely.geometry import LineString, MultiLineString
-import warnings
-from scipy import stats
+import time
+import uuid
+import hashlib
+
+from analytics import (
+    PRODUCTS,
+    FIX_CITY_MAP,
+    safe_divide,
+    get_product_columns,
+    normalize_city_name_fixed,
+    format_number,
+    format_percentage,
+    load_sales_data,
+    aggregate_sales,
+    calculate_region_comparative_analysis,
+    calculate_intra_region_performance,
+    calculate_advanced_time_series,
+    perform_trend_analysis,
+    create_comparative_analysis,
+    calculate_baseline_forecasts,
+    train_global_ml_model,
+    build_monthly_aggregate,
+    detect_sales_anomalies,
+    calculate_city_performance,
+    calculate_brick_performance,
+    calculate_competitor_analysis,
+    calculate_portfolio_overview,
+    calculate_bcg_matrix,
+    calculate_portfolio_bcg,
+    calculate_investment_strategy
+)
+from backtest import walk_forward_backtest
+from forecast_scenarios import FORECAST_MAX_HORIZON, slice_forecast_horizon, submit_forecast_scenario
+from model_registry import get_model_registry
+from query_engine import create_query_engine
+from filter_index import FilterIndex
+from date_presets import (
+    CUSTOM_PERIOD_LABEL,
+    STATUS_READY,
+    get_period_index,
+    get_sales_rollup,
+    preset_status,
+    warm_date_presets
+)
+from statistical_models import fit_statistical_models_by_brick
+from training_scheduler import get_training_scheduler, set_training_session
+from reporting import (
+    BATCH_GROUP_OPTIONS,
+    get_report_sections,
+    write_excel_report,
+    generate_batch_reports
+)
 
 warnings.filterwarnings("ignore")
 
@@ -420,348 +461,10 @@ GRADIENT_SCALES = {
     "trend": ["#475569", "#64748B", "#94A3B8", "#3B82F6", "#2563EB"]
 }
 
-# =============================================================================
-# CONSTANTS
-# =============================================================================
-
-FIX_CITY_MAP = {
-    "AGRI": "AĞRI",
-    "BARTÄ±N": "BARTIN",
-    "BARTIN": "BARTIN",
-    "BINGÃ¶L": "BİNGÖL",
-    "BINGOL": "BİNGÖL",
-    "DÃ¼ZCE": "DÜZCE",
-    "DÃ1⁄4ZCE": "DÜZCE",
-    "DUZCE": "DÜZCE",
-    "DÜZCE": "DÜZCE",
-    "ELAZIG": "ELAZIĞ",
-    "ELAZIĞ": "ELAZIĞ",
-    "ESKISEHIR": "ESKİŞEHİR",
-    "ESKİŞEHİR": "ESKİŞEHİR",
-    "GÃ1⁄4MÃ1⁄4SHANE": "GÜMÜŞHANE",
-    "GÃ¼mÃ¼SHANE": "GÜMÜŞHANE",
-    "GÜMÜŞHANE": "GÜMÜŞHANE",
-    "HAKKARI": "HAKKARİ",
-    "HAKKARI": "HAKKARİ",
-    "HAKKARİ": "HAKKARİ",
-    "ISTANBUL": "İSTANBUL",
-    "İSTANBUL": "İSTANBUL",
-    "IZMIR": "İZMİR",
-    "İZMİR": "İZMİR",
-    "IÄ\x9fDIR": "IĞDIR",
-    "IĞDIR": "IĞDIR",
-    "KARABÃ1⁄4K": "KARABÜK",
-    "KARABÜK": "KARABÜK",
-    "KARABÃ¼K": "KARABÜK",
-    "KINKKALE": "KIRIKKALE",
-    "KIRIKKALE": "KIRIKKALE",
-    "KIRSEHIR": "KIRŞEHİR",
-    "KIRŞEHİR": "KIRŞEHİr",
-    "KÃ1⁄4TAHYA": "KÜTAHYA",
-    "KÃ¼TAHYA": "KÜTAHYA",
-    "KÜTAHYA": "KÜTAHYA",
-    "MUGLA": "MUĞLA",
-    "MUĞLA": "MUĞLA",
-    "MUS": "MUŞ",
-    "MUŞ": "MUŞ",
-    "NEVSEHIR": "NEVŞEHİR",
-    "NEVŞEHİR": "NEVŞEHİR",
-    "NIGDE": "NİĞDE",
-    "NİĞDE": "NİĞDE",
-    "SANLIURFA": "ŞANLIURFA",
-    "ŞANLIURFA": "ŞANLIURFA",
-    "SIRNAK": "ŞIRNAK",
-    "ŞIRNAK": "ŞIRNAK",
-    "TEKIRDAG": "TEKİRDAĞ",
-    "TEKİRDAĞ": "TEKİRDAĞ",
-    "USAK": "UŞAK",
-    "UŞAK": "UŞAK",
-    "ZINGULDAK": "ZONGULDAK",
-    "ZONGULDAK": "ZONGULDAK",
-    "Ã\x87ANAKKALE": "ÇANAKKALE",
-    "ÇANAKKALE": "ÇANAKKALE",
-    "Ã\x87ANKIRI": "ÇANKIRI",
-    "ÇANKIRI": "ÇANKIRI",
-    "Ã\x87ORUM": "ÇORUM",
-    "ÇORUM": "ÇORUM",
-    "K. MARAS": "KAHRAMANMARAŞ",
-    "KAHRAMANMARAŞ": "KAHRAMANMARAŞ",
-    "CORUM": "ÇORUM",
-    "CANKIRI": "ÇANKIRI",
-    "KARABUK": "KARABÜK",
-    "GUMUSHANE": "GÜMÜŞHANE",
-    "KUTAHYA": "KÜTAHYA",
-    "CANAKKALE": "ÇANAKKALE",
-    "TUNCELİ": "TUNCELİ",
-    "TUNCELI": "TUNCELİ",
-    "OSMANİYE": "OSMANİYE",
-    "OSMANIYE": "OSMANİYE",
-    "KİLİS": "KİLİS",
-    "KILIS": "KİLİS",
-    "ŞIRNAK": "ŞIRNAK",
-    "SİİRT": "SİİRT",
-    "SIIRT": "SİİRT",
-    "BATMAN": "BATMAN",
-    "BİTLİS": "BİTLİS",
-    "BITLIS": "BİTLİS",
-    "BİNGÖL": "BİNGÖL",
-    "IĞDIR": "IĞDIR",
-    "ARDAHAN": "ARDAHAN"
-}
-
-CITY_NORMALIZE_CLEAN = {
-    'ADANA': 'Adana',
-    'ADIYAMAN': 'Adiyaman',
-    'AFYONKARAHISAR': 'Afyonkarahisar',
-    'AFYON': 'Afyonkarahisar',
-    'AGRI': 'Agri',
-    'AĞRI': 'Agri',
-    'AKSARAY': 'Aksaray',
-    'ANKARA': 'Ankara',
-    'ANTALYA': 'Antalya',
-    'AYDIN': 'Aydin',
-    'BALIKESIR': 'Balikesir',
-    'BARTIN': 'Bartin',
-    'BATMAN': 'Batman',
-    'BILECIK': 'Bilecik',
-    'BINGOL': 'Bingol',
-    'BITLIS': 'Bitlis',
-    'BOLU': 'Bolu',
-    'BURDUR': 'Burdur',
-    'BURSA': 'Bursa',
-    'CANAKKALE': 'Canakkale',
-    'ÇANAKKALE': 'Canakkale',
-    'CANKIRI': 'Cankiri',
-    'ÇANKIRI': 'Cankiri',
-    'CORUM': 'Corum',
-    'ÇORUM': 'Corum',
-    'DENIZLI': 'Denizli',
-    'DIYARBAKIR': 'Diyarbakir',
-    'DUZCE': 'Duzce',
-    'DÜZCE': 'Duzce',
-    'EDIRNE': 'Edirne',
-    'ELAZIG': 'Elazig',
-    'ELAZĞ': 'Elazig',
-    'ELAZIĞ': 'Elazig',
-    'ERZINCAN': 'Erzincan',
-    'ERZURUM': 'Erzurum',
-    'ESKISEHIR': 'Eskisehir',
-    'ESKİŞEHİR': 'Eskisehir',
-    'GAZIANTEP': 'Gaziantep',
-    'GIRESUN': 'Giresun',
-    'GİRESUN': 'Giresun',
-    'GUMUSHANE': 'Gumushane',
-    'GÜMÜŞHANE': 'Gumushane',
-    'HAKKARI': 'Hakkari',
-    'HAKKARİ': 'Hakkari',
-    'HATAY': 'Hatay',
-    'IGDIR': 'Igdir',
-    'IĞDIR': 'Igdir',
-    'ISPARTA': 'Isparta',
-    'ISTANBUL': 'Istanbul',
-    'İSTANBUL': 'Istanbul',
-    'IZMIR': 'Izmir',
-    'İZMİR': 'Izmir',
-    'KAHRAMANMARAS': 'K. Maras',
-    'KAHRAMANMARAŞ': 'K. Maras',
-    'K.MARAS': 'K. Maras',
-    'KMARAS': 'K. Maras',
-    'KARABUK': 'Karabuk',
-    'KARABÜK': 'Karabuk',
-    'KARAMAN': 'Karaman',
-    'KARS': 'Kars',
-    'KASTAMONU': 'Kastamonu',
-    'KASTAMONU': 'Kastamonu',
-    'KASTAMONU': 'Kastamonu',
-    'KAYSERI': 'Kayseri',
-    'KIRIKKALE': 'Kinkkale',
-    'KIRKLARELI': 'Kirklareli',
-    'KIRKLARELİ': 'Kirklareli',
-    'KIRSEHIR': 'Kirsehir',
-    'KIRŞEHİR': 'Kirsehir',
-    'KILIS': 'Kilis',
-    'KİLİS': 'Kilis',
-    'KOCAELI': 'Kocaeli',
-    'KONYA': 'Konya',
-    'KUTAHYA': 'Kutahya',
-    'KÜTAHYA': 'Kutahya',
-    'MALATYA': 'Malatya',
-    'MANISA': 'Manisa',
-    'MANİSA': 'Manisa',
-    'MARDIN': 'Mardin',
-    'MARDİN': 'Mardin',
-    'MERSIN': 'Mersin',
-    'MERSİN': 'Mersin',
-    'MUGLA': 'Mugla',
-    'MUĞLA': 'Mugla',
-    'MUS': 'Mus',
-    'MUŞ': 'Mus',
-    'NEVSEHIR': 'Nevsehir',
-    'NEVŞEHİR': 'Nevsehir',
-    'NIGDE': 'Nigde',
-    'NİĞDE': 'Nigde',
-    'ORDU': 'Ordu',
-    'OSMANIYE': 'Osmaniye',
-    'OSMANİYE': 'Osmaniye',
-    'RIZE': 'Rize',
-    'RİZE': 'Rize',
-    'SAKARYA': 'Sakarya',
-    'SAMSUN': 'Samsun',
-    'SIIRT': 'Siirt',
-    'SİİRT': 'Siirt',
-    'SINOP': 'Sinop',
-    'SİNOP': 'Sinop',
-    'SIVAS': 'Sivas',
-    'SİVAS': 'Sivas',
-    'SANLIURFA': 'Sanliurfa',
-    'ŞANLIURFA': 'Sanliurfa',
-    'SIRNAK': 'Sirnak',
-    'ŞIRNAK': 'Sirnak',
-    'TEKIRDAG': 'Tekirdag',
-    'TEKİRDAĞ': 'Tekirdag',
-    'TOKAT': 'Tokat',
-    'TRABZON': 'Trabzon',
-    'TUNCELI': 'Tunceli',
-    'TUNCELİ': 'Tunceli',
-    'USAK': 'Usak',
-    'UŞAK': 'Usak',
-    'VAN': 'Van',
-    'YALOVA': 'Yalova',
-    'YOZGAT': 'Yozgat',
-    'ZONGULDAK': 'Zonguldak',
-    'ZONGULDAK': 'Zonguldak',
-    'ARDAHAN': 'Ardahan',
-    'AKSARAY': 'Aksaray',
-    'KIRIKKALE': 'Kirikkale'
-}
-
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
 
-def safe_divide(a, b):
-    """Güvenli bölme işlemi"""
-    return np.where(b != 0, a / b, 0)
-
-def get_product_columns(product):
-    """Ürün kolonlarını döndür"""
-    if product == "TROCMETAM":
-        return {"pf": "TROCMETAM", "rakip": "DIGER TROCMETAM"}
-    elif product == "CORTIPOL":
-        return {"pf": "CORTIPOL", "rakip": "DIGER CORTIPOL"}
-    elif product == "DEKSAMETAZON":
-        return {"pf": "DEKSAMETAZON", "rakip": "DIGER DEKSAMETAZON"}
-    else:
-        return {"pf": "PF IZOTONIK", "rakip": "DIGER IZOTONIK"}
-
-def normalize_city_name_fixed(city_name):
-    """Düzeltilmiş şehir normalizasyon"""
-    if pd.isna(city_name):
-        return None
-    
-    city_upper = str(city_name).strip().upper()
-    
-    # Fix known encoding issues
-    if city_upper in FIX_CITY_MAP:
-        return FIX_CITY_MAP[city_upper]
-    
-    # Turkish character mapping
-    tr_map = {
-        "İ": "I", "Ğ": "G", "Ü": "U",
-        "Ş": "S", "Ö": "O", "Ç": "C",
-        "Â": "A", "Î": "I", "Û": "U"
-    }
-    
-    for k, v in tr_map.items():
-        city_upper = city_upper.replace(k, v)
-    
-    return CITY_NORMALIZE_CLEAN.get(city_upper, city_name)
-
-def format_number(num):
-    """Sayıları binlik ayırıcılı ve sadeleştirilmiş formatta göster"""
-    if pd.isna(num):
-        return "0"
-    
-    try:
-        num = float(num)
-        if num == 0:
-            return "0"
-        elif abs(num) >= 1_000_000_000:
-            return f"{num/1_000_000_000:,.1f}B"
-        elif abs(num) >= 1_000_000:
-            return f"{num/1_000_000:,.1f}M"
-        elif abs(num) >= 1_000:
-            return f"{num/1_000:,.1f}K"
-        else:
-            return f"{num:,.0f}"
-    except:
-        return str(num)
-
-def format_percentage(num):
-    """Yüzdelikleri formatla"""
-    if pd.isna(num):
-        return "0%"
-    try:
-        return f"{float(num):.1f}%"
-    except:
-        return str(num)
-
-def calculate_trend_slope(y_values):
-    """Trend eğimini hesapla"""
-    if len(y_values) < 2:
-        return 0
-    
-    x = np.arange(len(y_values))
-    slope, intercept, r_value, p_value, std_err = stats.linregress(x, y_values)
-    return slope
-
-def classify_trend(slope, y_values):
-    """Trendi sınıflandır"""
-    if len(y_values) < 5:
-        return "Yetersiz Veri"
-    
-    mean_value = np.mean(y_values)
-    if mean_value == 0:
-        return "Nötr"
-    
-    percent_slope = (slope / mean_value) * 100 if mean_value != 0 else 0
-    
-    if percent_slope > 10:
-        return "📈 Güçlü Artış"
-    elif percent_slope > 5:
-        return "📈 Artış"
-    elif percent_slope > -5:
-        return "📊 Sabit"
-    elif percent_slope > -10:
-        return "📉 Düşüş"
-    else:
-        return "📉 Güçlü Düşüş"
-
-def calculate_seasonality(y_values, period=12):
-    """Mevsimsellik analizi"""
-    if len(y_values) < period * 2:
-        return None, "Yetersiz veri"
-    
-    try:
-        from scipy.signal import periodogram
-        f, Pxx = periodogram(y_values, fs=1)
-        
-        if len(f) > 0 and len(Pxx) > 0:
-            # En yüksek mevsimsel frekans
-            idx = np.argmax(Pxx[1:]) + 1
-            dominant_period = 1 / f[idx] if f[idx] > 0 else 0
-            
-            if dominant_period >= period - 2 and dominant_period <= period + 2:
-                return "Güçlü Mevsimsellik", round(dominant_period, 1)
-            elif dominant_period >= 3 and dominant_period <= 24:
-                return "Zayıf Mevsimsellik", round(dominant_period, 1)
-            else:
-                return "Mevsimsellik Yok", None
-    except:
-        return "Analiz Edilemedi", None
-    
-    return "Bilinmiyor", None
-
 def hex_to_rgba(hex_color, alpha=0.3):
     """Hex rengini RGBA formatına çevir"""
     if isinstance(hex_color, str) and hex_color.startswith('#'):
@@ -772,277 +475,9 @@ def hex_to_rgba(hex_color, alpha=0.3):
     return f'rgba(100, 116, 139, {alpha})'  # Varsayılan slate gray
 
 # =============================================================================
-# YENİ: ŞEHİR-BRICK STRATEJİK UYUM ANALİZİ FONKSİYONLARI
+# ŞEHİR-BRICK STRATEJİK UYUM GÖRSELLEŞTİRME
 # =============================================================================
 
-def analyze_city_brick_strategic_alignment(df, product, date_filter=None):
-    """
-    ŞEHİR–BRICK STRATEJİK UYUM ANALİZİ
-    
-    MAKRO: Şehir bazlı yatırım stratejileri
-    MİKRO: Brick bazlı BCG konumlandırması
-    
-    Analiz mantığı:
-    1. Her şehir için yatırım stratejisi belirle
-    2. Her Brick için BCG kategorisi belirle
-    3. Şehir stratejisi ile Brick BCG konumlarını karşılaştır
-    4. Stratejik uyum skoru hesapla
-    5. İçgörü ve aksiyon önerisi üret
-    """
-    cols = get_product_columns(product)
-    
-    if date_filter:
-        df_filtered = df[(df['DATE'] >= date_filter[0]) & (df['DATE'] <= date_filter[1])]
-    else:
-        df_filtered = df.copy()
-    
-    # 1. ŞEHİR BAZLI YATIRIM STRATEJİSİ
-    city_perf = calculate_city_performance(df_filtered, product, date_filter)
-    investment_df = calculate_investment_strategy(city_perf)
-    
-    # 2. BRICK BAZLI BCG MATRIX
-    bcg_df = calculate_bcg_matrix(df_filtered, product, date_filter)
-    
-    # 3. ŞEHİR–BRICK EŞLEŞTİRMESİ
-    # Her Brick'in hangi şehirde olduğunu bul
-    city_brick_mapping = df_filtered.groupby(['CITY_NORMALIZED', 'TERRITORIES']).agg({
-        cols['pf']: 'sum'
-    }).reset_index()
-    
-    city_brick_mapping.columns = ['City', 'Brick', 'PF_Satis']
-    
-    # Şehir stratejileri ile birleştir
-    city_brick_mapping = city_brick_mapping.merge(
-        investment_df[['City', 'Yatırım_Stratejisi']],
-        on='City',
-        how='left'
-    )
-    
-    # Brick BCG kategorileri ile birleştir
-    city_brick_mapping = city_brick_mapping.merge(
-        bcg_df[['Brick', 'BCG_Kategori']],
-        on='Brick',
-        how='left'
-    )
-    
-    # BCG kategorisi olmayan Brick'ler için varsayılan değer
-    city_brick_mapping['BCG_Kategori'] = city_brick_mapping['BCG_Kategori'].fillna('🐶 Dog')
-    
-    # 4. ŞEHİR BAZLI ANALİZ
-    results = []
-    
-    for city in city_brick_mapping['City'].unique():
-        city_data = city_brick_mapping[city_brick_mapping['City'] == city]
-        
-        if city_data.empty:
-            continue
-        
-        # Şehir stratejisi
-        city_strategy = city_data['Yatırım_Stratejisi'].iloc[0]
-        
-        # Brick dağılımı
-        brick_distribution = city_data.groupby('BCG_Kategori').agg({
-            'PF_Satis': ['sum', 'count']
-        }).reset_index()
-        
-        brick_distribution.columns = ['BCG_Kategori', 'Toplam_Ciro', 'Brick_Sayisi']
-        
-        # Toplam ciro
-        total_ciro = brick_distribution['Toplam_Ciro'].sum()
-        
-        # BCG kategorilerine göre yüzde dağılımı
-        brick_distribution['Ciro_Pay_%'] = (brick_distribution['Toplam_Ciro'] / total_ciro * 100) if total_ciro > 0 else 0
-        
-        # 5. STRATEJİK UYUM SKORU HESAPLA
-        strategic_fit_score, fit_category = calculate_strategic_fit_score(city_strategy, brick_distribution)
-        
-        # 6. TEK CÜMLELİK YÖNETİCİ İÇGÖRÜSÜ
-        executive_insight = generate_executive_insight(city, city_strategy, brick_distribution, strategic_fit_score)
-        
-        # 7. YATIRIM KOMİTESİ KARAR ÖZETİ
-        decision_summary = generate_decision_summary(city_strategy, brick_distribution, strategic_fit_score)
-        
-        # 8. DETAYLI BRICK LİSTESİ (ilk 5)
-        top_bricks = city_data.nlargest(5, 'PF_Satis')
-        brick_details = []
-        for _, brick_row in top_bricks.iterrows():
-            brick_share = (brick_row['PF_Satis'] / total_ciro * 100) if total_ciro > 0 else 0
-            brick_details.append(f"• {brick_row['Brick']} [{brick_row['BCG_Kategori']}]: {format_number(brick_row['PF_Satis'])} (%{brick_share:.1f})")
-        
-        results.append({
-            'Şehir': city,
-            'Şehir_Yatırım_Stratejisi': city_strategy,
-            'Toplam_Ciro': total_ciro,
-            'Brick_Sayisi': len(city_data),
-            'BCG_Dağılımı': brick_distribution.to_dict('records'),
-            'Stratejik_Uyum_Skoru': strategic_fit_score,
-            'Uyum_Kategorisi': fit_category,
-            'Yönetici_İçgörüsü': executive_insight,
-            'Karar_Önerisi': decision_summary['decision'],
-            'Karar_Gerekçesi': decision_summary['rationale'],
-            'Detaylı_Brick_Listesi': "\n".join(brick_details) if brick_details else "Brick verisi bulunamadı",
-            'BCG_Star_%': brick_distribution[brick_distribution['BCG_Kategori'] == '⭐ Star']['Ciro_Pay_%'].sum(),
-            'BCG_CashCow_%': brick_distribution[brick_distribution['BCG_Kategori'] == '🐄 Cash Cow']['Ciro_Pay_%'].sum(),
-            'BCG_Question_%': brick_distribution[brick_distribution['BCG_Kategori'] == '❓ Question Mark']['Ciro_Pay_%'].sum(),
-            'BCG_Dog_%': brick_distribution[brick_distribution['BCG_Kategori'] == '🐶 Dog']['Ciro_Pay_%'].sum()
-        })
-    
-    results_df = pd.DataFrame(results)
-    
-    # Sıralama: Önce uyum skoru (düşükten yükseğe), sonra ciro (yüksekten düşüğe)
-    results_df = results_df.sort_values(['Stratejik_Uyum_Skoru', 'Toplam_Ciro'], ascending=[True, False])
-    
-    return results_df
-
-def calculate_strategic_fit_score(city_strategy, brick_distribution):
-    """
-    Şehir stratejisi ile Brick BCG dağılımı arasındaki uyum skorunu hesapla
-    
-    Skor mantığı:
-    0-49: Stratejik Kopuş
-    50-79: Kısmi Uyum
-    80-100: Güçlü Uyum
-    """
-    # BCG dağılımını dictionary'ye çevir
-    bcg_dict = {}
-    for _, row in brick_distribution.iterrows():
-        bcg_dict[row['BCG_Kategori']] = row['Ciro_Pay_%']
-    
-    # Varsayılan değerler
-    star_percent = bcg_dict.get('⭐ Star', 0)
-    cashcow_percent = bcg_dict.get('🐄 Cash Cow', 0)
-    question_percent = bcg_dict.get('❓ Question Mark', 0)
-    dog_percent = bcg_dict.get('🐶 Dog', 0)
-    
-    # Şehir stratejisine göre ideal BCG dağılımı
-    ideal_distributions = {
-        '🚀 Agresif': {'star': 40, 'question': 30, 'cashcow': 20, 'dog': 10},
-        '⚡ Hızlandırılmış': {'star': 30, 'question': 25, 'cashcow': 30, 'dog': 15},
-        '🛡️ Koruma': {'star': 15, 'question': 20, 'cashcow': 50, 'dog': 15},
-        '💎 Potansiyel': {'star': 20, 'question': 40, 'cashcow': 20, 'dog': 20},
-        '👁️ İzleme': {'star': 10, 'question': 20, 'cashcow': 30, 'dog': 40}
-    }
-    
-    if city_strategy not in ideal_distributions:
-        city_strategy = '👁️ İzleme'  # Varsayılan
-    
-    ideal = ideal_distributions[city_strategy]
-    
-    # Skor hesapla (ideal dağılıma yakınlık)
-    score = 100 - (
-        abs(star_percent - ideal['star']) * 0.3 +
-        abs(cashcow_percent - ideal['cashcow']) * 0.2 +
-        abs(question_percent - ideal['question']) * 0.3 +
-        abs(dog_percent - ideal['dog']) * 0.2
-    )
-    
-    # Skoru 0-100 arasına sınırla
-    score = max(0, min(100, score))
-    
-    # Kategori belirle
-    if score >= 80:
-        fit_category = "Güçlü Uyum"
-    elif score >= 50:
-        fit_category = "Kısmi Uyum"
-    else:
-        fit_category = "Stratejik Kopuş"
-    
-    return round(score, 1), fit_category
-
-def generate_executive_insight(city, city_strategy, brick_distribution, strategic_fit_score):
-    """
-    Tek cümlelik yönetici içgörüsü üret
-    
-    Format:
-    [ŞEHİR]: [Şehir yatırım stratejisi], ancak [baskın brick BCG durumu] nedeniyle [net risk/fırsat yorumu].
-    """
-    # En baskın BCG kategorisini bul
-    dominant_bcg = brick_distribution.loc[brick_distribution['Ciro_Pay_%'].idxmax(), 'BCG_Kategori']
-    dominant_percent = brick_distribution.loc[brick_distribution['Ciro_Pay_%'].idxmax(), 'Ciro_Pay_%']
-    
-    # İçgörü mantığı
-    if strategic_fit_score >= 80:
-        # Güçlü uyum
-        if city_strategy in ['🚀 Agresif', '⚡ Hızlandırılmış']:
-            insight = f"{city}: {city_strategy} stratejisi, {dominant_bcg} brick'lerin %{dominant_percent:.1f} ciro payı ile güçlü şekilde destekleniyor."
-        else:
-            insight = f"{city}: {city_strategy} stratejisi, mevcut brick portföyü ile uyumlu ve risk düzeyi kontrollü."
-    
-    elif strategic_fit_score >= 50:
-        # Kısmi uyum
-        if dominant_bcg in ['🐄 Cash Cow', '🐶 Dog'] and city_strategy in ['🚀 Agresif', '⚡ Hızlandırılmış']:
-            insight = f"{city}: {city_strategy} stratejisi, ancak cironun %{dominant_percent:.1f}'inin {dominant_bcg} brick'lerde olması büyüme hızını kısıtlıyor."
-        elif dominant_bcg == '⭐ Star' and city_strategy in ['🛡️ Koruma', '👁️ İzleme']:
-            insight = f"{city}: {city_strategy} stratejisi, ancak cironun %{dominant_percent:.1f}'inin {dominant_bcg} brick'lerde olması stratejik tutarsızlık riski taşıyor."
-        else:
-            insight = f"{city}: {city_strategy} stratejisi ile brick portföyü kısmen uyumlu, ancak optimizasyon gerekiyor."
-    
-    else:
-        # Stratejik kopuş
-        if dominant_bcg == '🐶 Dog' and city_strategy in ['🚀 Agresif', '⚡ Hızlandırılmış']:
-            insight = f"{city}: {city_strategy} stratejisi, ancak cironun %{dominant_percent:.1f}'inin {dominant_bcg} brick'lerde olması ciddi stratejik kopuşa işaret ediyor."
-        elif dominant_bcg == '⭐ Star' and city_strategy == '👁️ İzleme':
-            insight = f"{city}: {city_strategy} stratejisi, ancak cironun %{dominant_percent:.1f}'inin {dominant_bcg} brick'lerde olması yatırım eksikliğini gösteriyor."
-        else:
-            insight = f"{city}: Şehir stratejisi ile brick portföyü arasında ciddi uyumsuzluk var. Acil müdahale gerekiyor."
-    
-    return insight
-
-def generate_decision_summary(city_strategy, brick_distribution, strategic_fit_score):
-    """
-    Yatırım komitesi için karar özeti oluştur
-    
-    Karar seçenekleri:
-    - Yatırımı Artır
-    - Seçici Yatırım Yap
-    - Yeniden Dengele
-    - Mevcut Yapıyı Koru
-    - Yatırımı Azalt / Çekil
-    """
-    # En baskın BCG kategorisini bul
-    dominant_bcg = brick_distribution.loc[brick_distribution['Ciro_Pay_%'].idxmax(), 'BCG_Kategori']
-    dominant_percent = brick_distribution.loc[brick_distribution['Ciro_Pay_%'].idxmax(), 'Ciro_Pay_%']
-    
-    # Karar mantığı
-    if strategic_fit_score >= 80:
-        # Güçlü uyum
-        if city_strategy in ['🚀 Agresif', '⚡ Hızlandırılmış']:
-            decision = "Yatırımı Artır"
-            rationale = "Şehir stratejisi ile brick portföyü güçlü uyum içinde. Başarı modelini ölçeklendirmek için yatırım artırılmalı."
-        else:
-            decision = "Mevcut Yapıyı Koru"
-            rationale = "Strateji-portföy uyumu optimal seviyede. Mevcut yapı korunarak karlılık sürdürülmeli."
-    
-    elif strategic_fit_score >= 50:
-        # Kısmi uyum
-        if city_strategy in ['🚀 Agresif', '⚡ Hızlandırılmış']:
-            if dominant_bcg in ['🐄 Cash Cow', '🐶 Dog']:
-                decision = "Yeniden Dengele"
-                rationale = f"Cironun %{dominant_percent:.1f}'i {dominant_bcg} brick'lerde. Büyüme stratejisi için brick portföyü yeniden dengelenmeli."
-            else:
-                decision = "Seçici Yatırım Yap"
-                rationale = "Strateji-portföy uyumu kısmen var. Star ve Question Mark brick'lere odaklanarak seçici yatırım yapılmalı."
-        else:
-            decision = "Seçici Yatırım Yap"
-            rationale = "Portföyde optimizasyon fırsatları var. Yüksek potansiyelli brick'lere odaklanarak seçici yatırım yapılmalı."
-    
-    else:
-        # Stratejik kopuş
-        if dominant_bcg == '🐶 Dog' and city_strategy in ['🚀 Agresif', '⚡ Hızlandırılmış']:
-            decision = "Yatırımı Azalt / Çekil"
-            rationale = f"Cironun %{dominant_percent:.1f}'i Dog brick'lerde. Büyüme stratejisi ile uyumsuz. Yatırım azaltılmalı veya strateji revize edilmeli."
-        elif dominant_bcg == '⭐ Star' and city_strategy == '👁️ İzleme':
-            decision = "Yatırımı Artır"
-            rationale = "Star brick'lere rağmen izleme stratejisi uygulanıyor. Potansiyeli değerlendirmek için yatırım artırılmalı."
-        else:
-            decision = "Yeniden Dengele"
-            rationale = "Ciddi stratejik kopuş var. Brick portföyü şehir stratejisiyle uyumlu hale getirilmeli."
-    
-    return {
-        'decision': decision,
-        'rationale': rationale
-    }
-
 def create_strategic_fit_dashboard(alignment_df):
     """
     Stratejik uyum dashboard'ı oluştur
@@ -1180,382 +615,6 @@ def create_strategy_bcg_matrix(alignment_df):
     
     return fig
 
-# =============================================================================
-# YENİ ANALİZ FONKSİYONLARI
-# =============================================================================
-
-def calculate_region_comparative_analysis(df, product, date_filter=None):
-    """
-    Bölgeler arası karşılaştırmalı analiz
-    
-    Her bölge için:
-    - PF Satış Toplamı
-    - Toplam Pazar Büyüklüğü
-    - Pazar Payı
-    - Bölge İçi Pay (Bölgedeki PF Satışın Türkiye'deki PF Satışa Oranı)
-    - Yoğunluk (Birim Şehir Başına PF Satış)
-    """
-    cols = get_product_columns(product)
-    
-    if date_filter:
-        df = df[(df['DATE'] >= date_filter[0]) & (df['DATE'] <= date_filter[1])]
-    
-    # Türkiye toplamları
-    total_pf_turkey = df[cols['pf']].sum()
-    total_market_turkey = (df[cols['pf']] + df[cols['rakip']]).sum()
-    
-    # Bölge bazlı analiz
-    region_analysis = df.groupby('REGION').agg({
-        cols['pf']: 'sum',
-        cols['rakip']: 'sum'
-    }).reset_index()
-    
-    region_analysis.columns = ['Region', 'PF_Satis', 'Rakip_Satis']
-    region_analysis['Toplam_Pazar'] = region_analysis['PF_Satis'] + region_analysis['Rakip_Satis']
-    region_analysis['Pazar_Payi_%'] = safe_divide(region_analysis['PF_Satis'], region_analysis['Toplam_Pazar']) * 100
-    
-    # Bölge içi pay (Türkiye'deki toplam PF satışa göre)
-    region_analysis['Bolge_Ici_Pay_%'] = safe_divide(region_analysis['PF_Satis'], total_pf_turkey) * 100
-    
-    # Şehir sayısı ve yoğunluk
-    city_count = df.groupby('REGION')['CITY_NORMALIZED'].nunique().reset_index()
-    city_count.columns = ['Region', 'Sehir_Sayisi']
-    region_analysis = region_analysis.merge(city_count, on='Region', how='left')
-    region_analysis['Sehir_Sayisi'] = region_analysis['Sehir_Sayisi'].fillna(0)
-    region_analysis['Yogunluk'] = safe_divide(region_analysis['PF_Satis'], region_analysis['Sehir_Sayisi'])
-    
-    # Performans skoru (çok boyutlu)
-    max_pf = region_analysis['PF_Satis'].max() if region_analysis['PF_Satis'].max() > 0 else 1
-    max_share = region_analysis['Pazar_Payi_%'].max() if region_analysis['Pazar_Payi_%'].max() > 0 else 1
-    max_density = region_analysis['Yogunluk'].max() if region_analysis['Yogunluk'].max() > 0 else 1
-    
-    region_analysis['Performans_Skoru'] = (
-        (region_analysis['Bolge_Ici_Pay_%'] / 100) * 0.4 +          # Bölge içi ağırlık
-        (region_analysis['Pazar_Payi_%'] / max_share) * 0.3 +      # Pazar payı
-        (region_analysis['Yogunluk'] / max_density) * 0.3          # Yoğunluk
-    ) * 100
-    
-    # Sıralama
-    region_analysis = region_analysis.sort_values('Performans_Skoru', ascending=False)
-    
-    return region_analysis
-
-def calculate_intra_region_performance(df, product, selected_region, date_filter=None):
-    """
-    Seçilen bir bölge içindeki detaylı performans analizi
-    
-    Bölge içindeki:
-    - Şehirlerin PF Satış Dağılımı
-    - Brick Performansları
-    - Manager Performansları
-    - Zaman İçinde Gelişim
-    """
-    cols = get_product_columns(product)
-    
-    if date_filter:
-        df = df[(df['DATE'] >= date_filter[0]) & (df['DATE'] <= date_filter[1])]
-    
-    # Bölgeyi filtrele
-    df_region = df[df['REGION'] == selected_region].copy()
-    
-    if len(df_region) == 0:
-        return None, None, None, None
-    
-    # 1. ŞEHİR BAZLI ANALİZ
-    city_analysis = df_region.groupby('CITY_NORMALIZED').agg({
-        cols['pf']: 'sum',
-        cols['rakip']: 'sum'
-    }).reset_index()
-    
-    city_analysis.columns = ['City', 'PF_Satis', 'Rakip_Satis']
-    city_analysis['Toplam_Pazar'] = city_analysis['PF_Satis'] + city_analysis['Rakip_Satis']
-    city_analysis['Pazar_Payi_%'] = safe_divide(city_analysis['PF_Satis'], city_analysis['Toplam_Pazar']) * 100
-    
-    region_total_pf = city_analysis['PF_Satis'].sum()
-    city_analysis['Bolge_Ici_Pay_%'] = safe_divide(city_analysis['PF_Satis'], region_total_pf) * 100
-    
-    city_analysis = city_analysis.sort_values('PF_Satis', ascending=False)
-    
-    # 2. Brick BAZLI ANALİZ
-    brick_analysis = df_region.groupby('TERRITORIES').agg({
-        cols['pf']: 'sum',
-        cols['rakip']: 'sum',
-        'MANAGER': 'first',
-        'CITY_NORMALIZED': lambda x: ', '.join(sorted(set(x)))  # Brick'nin kapsadığı şehirler
-    }).reset_index()
-    
-    brick_analysis.columns = ['Brick', 'PF_Satis', 'Rakip_Satis', 'Manager', 'Kapsadigi_Sehirler']
-    brick_analysis['Toplam_Pazar'] = brick_analysis['PF_Satis'] + brick_analysis['Rakip_Satis']
-    brick_analysis['Pazar_Payi_%'] = safe_divide(brick_analysis['PF_Satis'], brick_analysis['Toplam_Pazar']) * 100
-    brick_analysis['Bolge_Ici_Pay_%'] = safe_divide(brick_analysis['PF_Satis'], region_total_pf) * 100
-    
-    brick_analysis = brick_analysis.sort_values('PF_Satis', ascending=False)
-    
-    # 3. MANAGER BAZLI ANALİZ
-    manager_analysis = df_region.groupby('MANAGER').agg({
-        cols['pf']: 'sum',
-        cols['rakip']: 'sum',
-        'TERRITORIES': 'nunique',  # Kaç Brick yönetiyor
-        'CITY_NORMALIZED': 'nunique'  # Kaç şehirde çalışıyor
-    }).reset_index()
-    
-    manager_analysis.columns = ['Manager', 'PF_Satis', 'Rakip_Satis', 'Brick_Sayisi', 'Sehir_Sayisi']
-    manager_analysis['Toplam_Pazar'] = manager_analysis['PF_Satis'] + manager_analysis['Rakip_Satis']
-    manager_analysis['Pazar_Payi_%'] = safe_divide(manager_analysis['PF_Satis'], manager_analysis['Toplam_Pazar']) * 100
-    manager_analysis['Ortalama_Brick_Performansi'] = safe_divide(manager_analysis['PF_Satis'], manager_analysis['Brick_Sayisi'])
-    
-    manager_analysis = manager_analysis.sort_values('PF_Satis', ascending=False)
-    
-    # 4. ZAMAN İÇİ GELİŞİM (Aylık)
-    monthly_analysis = df_region.groupby('YIL_AY').agg({
-        cols['pf']: 'sum',
-        cols['rakip']: 'sum'
-    }).reset_index().sort_values('YIL_AY')
-    
-    monthly_analysis.columns = ['YIL_AY', 'PF_Satis', 'Rakip_Satis']
-    monthly_analysis['Toplam_Pazar'] = monthly_analysis['PF_Satis'] + monthly_analysis['Rakip_Satis']
-    monthly_analysis['Pazar_Payi_%'] = safe_divide(monthly_analysis['PF_Satis'], monthly_analysis['Toplam_Pazar']) * 100
-    
-    # Büyüme oranları
-    monthly_analysis['PF_Buyume_%'] = monthly_analysis['PF_Satis'].pct_change() * 100
-    
-    return city_analysis, brick_analysis, manager_analysis, monthly_analysis
-
-# =============================================================================
-# GELİŞTİRİLMİŞ ZAMAN SERİSİ ANALİZ FONKSİYONLARI
-# =============================================================================
-
-def calculate_advanced_time_series(df, product, brick=None, date_filter=None):
-    """GELİŞTİRİLMİŞ zaman serisi analizi"""
-    cols = get_product_columns(product)
-    
-    df_filtered = df.copy()
-    if brick and brick != "TÜMÜ":
-        df_filtered = df_filtered[df_filtered['TERRITORIES'] == brick]
-    
-    if date_filter:
-        df_filtered = df_filtered[(df_filtered['DATE'] >= date_filter[0]) & 
-                                   (df_filtered['DATE'] <= date_filter[1])]
-    
-    # Aylık gruplama
-    monthly = df_filtered.groupby('YIL_AY').agg({
-        cols['pf']: 'sum',
-        cols['rakip']: 'sum',
-        'DATE': 'first'
-    }).reset_index().sort_values('YIL_AY')
-    
-    monthly.columns = ['YIL_AY', 'PF_Satis', 'Rakip_Satis', 'DATE']
-    monthly['Toplam_Pazar'] = monthly['PF_Satis'] + monthly['Rakip_Satis']
-    monthly['Pazar_Payi_%'] = safe_divide(monthly['PF_Satis'], monthly['Toplam_Pazar']) * 100
-    
-    # Temel büyüme oranları
-    monthly['PF_Buyume_%'] = monthly['PF_Satis'].pct_change() * 100
-    monthly['Rakip_Buyume_%'] = monthly['Rakip_Satis'].pct_change() * 100
-    monthly['Goreceli_Buyume_%'] = monthly['PF_Buyume_%'] - monthly['Rakip_Buyume_%']
-    
-    # GELİŞTİRİLMİŞ Hareketli Ortalamalar
-    monthly['MA_3'] = monthly['PF_Satis'].rolling(window=3, min_periods=1).mean()
-    monthly['MA_6'] = monthly['PF_Satis'].rolling(window=6, min_periods=1).mean()
-    monthly['MA_12'] = monthly['PF_Satis'].rolling(window=12, min_periods=1).mean()
-    
-    # GELİŞTİRİLMİŞ Hareketli Ortalama Büyüme
-    monthly['MA_3_Growth'] = monthly['MA_3'].pct_change() * 100
-    monthly['MA_6_Growth'] = monthly['MA_6'].pct_change() * 100
-    monthly['MA_12_Growth'] = monthly['MA_12'].pct_change() * 100
-    
-    # Pazar Payı Hareketli Ortalamaları
-    monthly['PP_MA_3'] = monthly['Pazar_Payi_%'].rolling(window=3, min_periods=1).mean()
-    monthly['PP_MA_6'] = monthly['Pazar_Payi_%'].rolling(window=6, min_periods=1).mean()
-    
-    # Yıllık Büyüme (YoY)
-    monthly['DATE_DT'] = pd.to_datetime(monthly['YIL_AY'] + '-01', errors='coerce')
-    monthly['Year'] = monthly['DATE_DT'].dt.year
-    monthly['Month'] = monthly['DATE_DT'].dt.month
-    
-    # YoY büyümesini hesapla
-    for idx, row in monthly.iterrows():
-        if idx >= 12:
-            same_month_last_year = monthly[(monthly['Year'] == row['Year'] - 1) & 
-                                          (monthly['Month'] == row['Month'])]
-            if not same_month_last_year.empty:
-                monthly.loc[idx, 'YoY_PF_Growth'] = ((row['PF_Satis'] / same_month_last_year['PF_Satis'].values[0]) - 1) * 100
-                monthly.loc[idx, 'YoY_Rakip_Growth'] = ((row['Rakip_Satis'] / same_month_last_year['Rakip_Satis'].values[0]) - 1) * 100
-    
-    # Mevsimsellik indeksi (basitleştirilmiş)
-    if len(monthly) >= 12:
-        monthly_grouped = monthly.groupby('Month')['PF_Satis'].mean()
-        seasonality_base = monthly_grouped.mean()
-        if seasonality_base > 0:
-            monthly['Seasonality_Index'] = monthly.apply(
-                lambda x: (monthly_grouped[x['Month']] / seasonality_base * 100) if x['Month'] in monthly_grouped.index else 100,
-                axis=1
-            )
-    
-    # Trend analizi
-    if len(monthly) >= 3:
-        # Son 3 ay vs Önceki 3 ay
-        if len(monthly) >= 6:
-            recent_3m = monthly.tail(3)['PF_Satis'].mean()
-            previous_3m = monthly.tail(6).head(3)['PF_Satis'].mean()
-            if previous_3m > 0:
-                monthly.loc[monthly.index[-1], 'QoQ_Growth_3M'] = ((recent_3m / previous_3m) - 1) * 100
-        
-        # Son 6 ay vs Önceki 6 ay
-        if len(monthly) >= 12:
-            recent_6m = monthly.tail(6)['PF_Satis'].mean()
-            previous_6m = monthly.tail(12).head(6)['PF_Satis'].mean()
-            if previous_6m > 0:
-                monthly.loc[monthly.index[-1], 'QoQ_Growth_6M'] = ((recent_6m / previous_6m) - 1) * 100
-    
-    # Volatilite hesaplama
-    monthly['PF_Volatility'] = monthly['PF_Satis'].rolling(window=6, min_periods=3).std()
-    monthly['PF_CV'] = safe_divide(monthly['PF_Volatility'], monthly['PF_Satis']) * 100
-    
-    # Momentum indikatörleri
-    if len(monthly) >= 3:
-        monthly['Momentum_3M'] = monthly['PF_Satis'] - monthly['PF_Satis'].shift(3)
-        monthly['Momentum_6M'] = monthly['PF_Satis'] - monthly['PF_Satis'].shift(6)
-    
-    # Performans skoru (basitleştirilmiş)
-    monthly['Performance_Score'] = (
-        (monthly['Pazar_Payi_%'] / 100) * 0.4 +
-        (np.minimum(monthly['PF_Buyume_%'].fillna(0), 50) / 50) * 0.3 +
-        (1 - np.minimum(monthly['PF_CV'].fillna(50), 100) / 100) * 0.3
-    ) * 100
-    
-    return monthly
-
-def perform_trend_analysis(monthly_df):
-    """Detaylı trend analizi"""
-    if len(monthly_df) < 6:
-        return {"error": "Yetersiz veri"}
-    
-    analysis = {}
-    
-    # 1. Temel trend analizi
-    pf_values = monthly_df['PF_Satis'].values
-    pf_slope = calculate_trend_slope(pf_values)
-    pf_trend = classify_trend(pf_slope, pf_values)
-    
-    # 2. Hareketli ortalamalara göre trend
-    if 'MA_3' in monthly_df.columns:
-        ma3_slope = calculate_trend_slope(monthly_df['MA_3'].dropna().values)
-        ma3_trend = classify_trend(ma3_slope, monthly_df['MA_3'].dropna().values)
-        ma6_slope = calculate_trend_slope(monthly_df['MA_6'].dropna().values)
-        ma6_trend = classify_trend(ma6_slope, monthly_df['MA_6'].dropna().values)
-    else:
-        ma3_trend = "Hesaplanamadı"
-        ma6_trend = "Hesaplanamadı"
-    
-    # 3. Mevsimsellik analizi
-    seasonality_type, period = calculate_seasonality(pf_values)
-    
-    # 4. Dönemsel büyüme analizi
-    growth_metrics = {}
-    
-    if len(monthly_df) >= 4:
-        # Son 1 ay vs Önceki 1 ay
-        if len(monthly_df) >= 2:
-            last_month = monthly_df['PF_Satis'].iloc[-1]
-            prev_month = monthly_df['PF_Satis'].iloc[-2] if len(monthly_df) >= 2 else 0
-            if prev_month > 0:
-                growth_metrics['MoM_Growth'] = ((last_month / prev_month) - 1) * 100
-        
-        # Son 3 ay vs Önceki 3 ay
-        if len(monthly_df) >= 6:
-            recent_3m = monthly_df['PF_Satis'].tail(3).mean()
-            previous_3m = monthly_df['PF_Satis'].tail(6).head(3).mean()
-            if previous_3m > 0:
-                growth_metrics['QoQ_3M_Growth'] = ((recent_3m / previous_3m) - 1) * 100
-        
-        # Son 6 ay vs Önceki 6 ay
-        if len(monthly_df) >= 12:
-            recent_6m = monthly_df['PF_Satis'].tail(6).mean()
-            previous_6m = monthly_df['PF_Satis'].tail(12).head(6).mean()
-            if previous_6m > 0:
-                growth_metrics['QoQ_6M_Growth'] = ((recent_6m / previous_6m) - 1) * 100
-    
-    # 5. Pazar payı trendi
-    if 'Pazar_Payi_%' in monthly_df.columns:
-        pp_slope = calculate_trend_slope(monthly_df['Pazar_Payi_%'].values)
-        pp_trend = classify_trend(pp_slope, monthly_df['Pazar_Payi_%'].values)
-    else:
-        pp_trend = "Hesaplanamadı"
-    
-    # 6. Volatilite analizi
-    volatility = monthly_df['PF_Satis'].std() if len(monthly_df) > 1 else 0
-    mean_value = monthly_df['PF_Satis'].mean() if len(monthly_df) > 0 else 0
-    cv = (volatility / mean_value * 100) if mean_value > 0 else 0
-    
-    if cv < 20:
-        volatility_class = "Düşük"
-    elif cv < 50:
-        volatility_class = "Orta"
-    else:
-        volatility_class = "Yüksek"
-    
-    # 7. Momentum analizi
-    if len(monthly_df) >= 3:
-        momentum_3m = monthly_df['PF_Satis'].iloc[-1] - monthly_df['PF_Satis'].iloc[-4] if len(monthly_df) >= 4 else 0
-        momentum_6m = monthly_df['PF_Satis'].iloc[-1] - monthly_df['PF_Satis'].iloc[-7] if len(monthly_df) >= 7 else 0
-    else:
-        momentum_3m = 0
-        momentum_6m = 0
-    
-    analysis = {
-        "temel_trend": pf_trend,
-        "hareketli_ortalama_3m_trend": ma3_trend,
-        "hareketli_ortalama_6m_trend": ma6_trend,
-        "mevsimsellik": seasonality_type,
-        "mevsimsel_periyot": period,
-        "pazar_payi_trendi": pp_trend,
-        "volatilite": volatility_class,
-        "volatilite_degeri": round(cv, 1),
-        "momentum_3m": round(momentum_3m, 0),
-        "momentum_6m": round(momentum_6m, 0),
-        "buyume_metrikleri": growth_metrics,
-        "trend_egimi": round(pf_slope, 2)
-    }
-    
-    return analysis
-
-def create_comparative_analysis(monthly_df, periods=[3, 6, 12]):
-    """Karşılaştırmalı dönem analizi"""
-    if len(monthly_df) < max(periods):
-        return None
-    
-    comparisons = []
-    
-    for period in periods:
-        if len(monthly_df) >= period:
-            recent_data = monthly_df.tail(period)
-            previous_data = monthly_df.tail(period*2).head(period)
-            
-            recent_avg = recent_data['PF_Satis'].mean()
-            previous_avg = previous_data['PF_Satis'].mean()
-            
-            recent_share = recent_data['Pazar_Payi_%'].mean()
-            previous_share = previous_data['Pazar_Payi_%'].mean()
-            
-            growth_rate = ((recent_avg / previous_avg) - 1) * 100 if previous_avg > 0 else 0
-            share_change = recent_share - previous_share
-            
-            comparisons.append({
-                'period': f'Son {period} ay',
-                'ortalama_satis': recent_avg,
-                'onceki_ortalama': previous_avg,
-                'buyume_orani': growth_rate,
-                'pazar_payi': recent_share,
-                'pay_degisimi': share_change,
-                'volatilite': recent_data['PF_Satis'].std(),
-                'trend': classify_trend(
-                    calculate_trend_slope(recent_data['PF_Satis'].values),
-                    recent_data['PF_Satis'].values
-                )
-            })
-    
-    return pd.DataFrame(comparisons)
-
 # =============================================================================
 # DATA LOADING
 # =============================================================================
@@ -1563,24 +622,14 @@ def create_comparative_analysis(monthly_df, periods=[3, 6, 12]):
 @st.cache_data
 def load_excel_data(file):
     """Excel dosyasını yükle"""
-    df = pd.read_excel(file)
-    df['DATE'] = pd.to_datetime(df['DATE'])
-    df['YIL_AY'] = df['DATE'].dt.strftime('%Y-%m')
-    df['AY'] = df['DATE'].dt.month
-    df['YIL'] = df['DATE'].dt.year
-    
-    df['TERRITORIES'] = df['TERRITORIES'].str.upper().str.strip()
-    df['CITY'] = df['CITY'].str.strip()
-    df['CITY_NORMALIZED'] = df['CITY'].apply(normalize_city_name_fixed)
-    df['REGION'] = df['REGION'].str.upper().str.strip()
-    df['MANAGER'] = df['MANAGER'].str.upper().str.strip()
-    
-    return df
+    return load_sales_data(file)
 
 @st.cache_resource
 def load_geojson_gpd():
     """GeoPandas ile GeoJSON yükle"""
     try:
+        # geopandas sadece harita için gerekli, ilk kullanımda yüklenir
+        import geopandas as gpd
         gdf = gpd.read_file("turkey.geojson")
         return gdf
     except Exception as e:
@@ -1603,6 +652,8 @@ def load_geojson_json():
 
 def lines_to_lonlat(geom):
     """LineString veya MultiLineString'den koordinatları al"""
+    from shapely.geometry import LineString, MultiLineString
+    
     lons, lats = [], []
     if isinstance(geom, LineString):
         xs, ys = geom.xy
@@ -1626,9 +677,12 @@ def get_region_center(gdf_region):
 # MODERN HARİTA OLUŞTURUCU - GELİŞTİRİLMİŞ
 # =============================================================================
 
-def create_modern_turkey_map(city_data, gdf, title="Türkiye Satış Haritası", view_mode="Bölge Görünümü", filtered_pf_toplam=None):
+def create_modern_turkey_map(city_data, gdf, title="Türkiye Satış Haritası", view_mode="Bölge Görünümü", filtered_pf_toplam=None,
+                             anomaly_data=None):
     """
     Modern Türkiye haritası - Mavi Kurumsal Tema
+    
+    anomaly_data verilirse (şehir bazlı anomali satırları) ilgili şehirler işaretlenir.
     """
     if gdf is None:
         st.error("❌ GeoJSON yüklenemedi")
@@ -1710,11 +764,13 @@ def create_modern_turkey_map(city_data, gdf, title="Türkiye Satış Haritası",
             marker_line_width=2,
             marker_line_color='rgba(255, 255, 255, 0.8)',
             showscale=False,
+            # Son alan: verideki şehir adı (çapraz filtre); pazarı olmayan illerde boş
             customdata=list(zip(
                 region_data['name'],
                 region_data['Region'],
                 region_data['PF_Satis'],
-                region_data['Pazar_Payi_%']
+                region_data['Pazar_Payi_%'],
+                region_data['City'].where(region_data['Toplam_Pazar'].fillna(0) > 0, None)
             )),
             hovertemplate=(
                 "<b>%{customdata[0]}</b><br>"
@@ -1812,6 +868,42 @@ def create_modern_turkey_map(city_data, gdf, title="Türkiye Satış Haritası",
             showlegend=False
         ))
     
+    # Anomali vurguları
+    if anomaly_data is not None and not anomaly_data.empty:
+        city_anomalies = anomaly_data.assign(City_Fixed=anomaly_data['Ad'].str.upper())
+        city_anomalies = city_anomalies.sort_values('Robust_Z', key=np.abs, ascending=False).drop_duplicates('City_Fixed')
+        city_anomalies = merged[['name', 'name_fixed', 'geometry']].merge(
+            city_anomalies, left_on='name_fixed', right_on='City_Fixed'
+        )
+        
+        if not city_anomalies.empty:
+            fig.add_trace(go.Scattermapbox(
+                lon=[geom.centroid.x for geom in city_anomalies.geometry],
+                lat=[geom.centroid.y for geom in city_anomalies.geometry],
+                mode='markers',
+                marker=dict(
+                    size=18,
+                    color=np.where(city_anomalies['Robust_Z'] < 0, PERFORMANCE_COLORS['warning'], PERFORMANCE_COLORS['info']).tolist(),
+                    opacity=0.9
+                ),
+                customdata=list(zip(
+                    city_anomalies['name'],
+                    city_anomalies['Seri'],
+                    city_anomalies['Ay'],
+                    city_anomalies['Değer'],
+                    city_anomalies['Beklenen'],
+                    city_anomalies['Robust_Z']
+                )),
+                hovertemplate=(
+                    "<b>⚠️ %{customdata[0]}</b><br>"
+                    "Seri: %{customdata[1]} | Ay: %{customdata[2]}<br>"
+                    "Değer: %{customdata[3]:,.0f} (Beklenen %{customdata[4]:,.0f})<br>"
+                    "Robust Z: %{customdata[5]:.1f}"
+                    "<extra></extra>"
+                ),
+                showlegend=False
+            ))
+    
     # Modern layout ayarları
     fig.update_layout(
         mapbox_style="carto-darkmatter",
@@ -1847,420 +939,6 @@ def create_modern_turkey_map(city_data, gdf, title="Türkiye Satış Haritası",
     
     return fig
 
-# =============================================================================
-# ML FEATURE ENGINEERING - GELİŞTİRİLMİŞ
-# =============================================================================
-
-def create_advanced_ml_features(df):
-    """GELİŞTİRİLMİŞ ML için feature oluştur"""
-    df = df.copy()
-    df = df.sort_values('DATE').reset_index(drop=True)
-    
-    # Lag features (3, 6, 12 ay)
-    for lag in [1, 2, 3, 4, 5, 6, 12]:
-        if lag < len(df):
-            df[f'lag_{lag}'] = df['PF_Satis'].shift(lag)
-    
-    # Rolling statistics
-    windows = [3, 6, 12]
-    for window in windows:
-        if window <= len(df):
-            df[f'rolling_mean_{window}'] = df['PF_Satis'].rolling(window=window, min_periods=1).mean()
-            df[f'rolling_std_{window}'] = df['PF_Satis'].rolling(window=window, min_periods=1).std()
-            df[f'rolling_min_{window}'] = df['PF_Satis'].rolling(window=window, min_periods=1).min()
-            df[f'rolling_max_{window}'] = df['PF_Satis'].rolling(window=window, min_periods=1).max()
-    
-    # Exponential moving averages
-    for span in [3, 6, 12]:
-        if span <= len(df):
-            df[f'ema_{span}'] = df['PF_Satis'].ewm(span=span, adjust=False).mean()
-    
-    # Date features
-    df['month'] = df['DATE'].dt.month
-    df['quarter'] = df['DATE'].dt.quarter
-    df['year'] = df['DATE'].dt.year
-    df['month_sin'] = np.sin(2 * np.pi * df['month'] / 12)
-    df['month_cos'] = np.cos(2 * np.pi * df['month'] / 12)
-    df['quarter_sin'] = np.sin(2 * np.pi * df['quarter'] / 4)
-    df['quarter_cos'] = np.cos(2 * np.pi * df['quarter'] / 4)
-    df['trend_index'] = range(len(df))
-    
-    # Seasonal features
-    df['is_q1'] = (df['quarter'] == 1).astype(int)
-    df['is_q2'] = (df['quarter'] == 2).astype(int)
-    df['is_q3'] = (df['quarter'] == 3).astype(int)
-    df['is_q4'] = (df['quarter'] == 4).astype(int)
-    
-    # Interaction features
-    if 'Pazar_Payi_%' in df.columns:
-        df['share_trend'] = df['Pazar_Payi_%'].rolling(window=3, min_periods=1).mean()
-    
-    # Growth features
-    df['growth_1m'] = df['PF_Satis'].pct_change(periods=1) * 100
-    df['growth_3m'] = df['PF_Satis'].pct_change(periods=3) * 100
-    df['growth_6m'] = df['PF_Satis'].pct_change(periods=6) * 100
-    
-    # Momentum features
-    if len(df) >= 3:
-        df['momentum_3m'] = df['PF_Satis'] - df['PF_Satis'].shift(3)
-        df['momentum_6m'] = df['PF_Satis'] - df['PF_Satis'].shift(6)
-    
-    # Volatility features
-    df['volatility_3m'] = df['PF_Satis'].rolling(window=3, min_periods=1).std()
-    df['volatility_6m'] = df['PF_Satis'].rolling(window=6, min_periods=1).std()
-    
-    # Fill NaN
-    df = df.fillna(method='bfill').fillna(method='ffill').fillna(0)
-    
-    return df
-
-def train_advanced_ml_models(df, forecast_periods=3):
-    """GELİŞTİRİLMİŞ ML modelleri ile tahmin"""
-    if len(df) < 24:  # En az 2 yıllık veri
-        return None, None, None
-    
-    df_features = create_advanced_ml_features(df)
-    
-    # Feature selection
-    feature_cols = [
-        'lag_1', 'lag_2', 'lag_3', 'lag_6', 'lag_12',
-        'rolling_mean_3', 'rolling_mean_6', 'rolling_mean_12',
-        'rolling_std_3', 'rolling_std_6',
-        'ema_3', 'ema_6',
-        'month', 'quarter', 'year',
-        'month_sin', 'month_cos',
-        'trend_index',
-        'growth_1m', 'growth_3m',
-        'momentum_3m', 'momentum_6m',
-        'volatility_3m'
-    ]
-    
-    # Sadece mevcut kolonları kullan
-    available_cols = [col for col in feature_cols if col in df_features.columns]
-    
-    # Train/Test split (zaman bazlı - son %20 test)
-    split_idx = int(len(df_features) * 0.8)
-    
-    train_df = df_features.iloc[:split_idx]
-    test_df = df_features.iloc[split_idx:]
-    
-    X_train = train_df[available_cols]
-    y_train = train_df['PF_Satis']
-    X_test = test_df[available_cols]
-    y_test = test_df['PF_Satis']
-    
-    # Gelişmiş modeller
-    models = {
-        'Linear Regression': LinearRegression(),
-        'Ridge Regression': Ridge(alpha=1.0),
-        'Random Forest': RandomForestRegressor(
-            n_estimators=200,
-            random_state=42,
-            max_depth=10,
-            min_samples_split=5,
-            n_jobs=-1
-        )
-    }
-    
-    results = {}
-    
-    for name, model in models.items():
-        try:
-            model.fit(X_train, y_train)
-            y_pred = model.predict(X_test)
-            
-            # Negatif tahminleri 0 yap
-            y_pred = np.maximum(y_pred, 0)
-            
-            mae = mean_absolute_error(y_test, y_pred)
-            rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-            mape = np.mean(np.abs((y_test - y_pred) / np.maximum(y_test, 1))) * 100
-            r2 = r2_score(y_test, y_pred)
-            
-            results[name] = {
-                'model': model,
-                'MAE': mae,
-                'RMSE': rmse,
-                'MAPE': mape,
-                'R2': r2,
-                'y_pred': y_pred
-            }
-        except Exception as e:
-            st.warning(f"{name} modeli eğitilemedi: {str(e)}")
-            continue
-    
-    if not results:
-        return None, None, None
-    
-    # En iyi model (MAPE'e göre)
-    best_model_name = min(results.keys(), key=lambda x: results[x]['MAPE'])
-    best_model = results[best_model_name]['model']
-    
-    # Gelecek tahmin için basitleştirilmiş yöntem
-    forecast_data = []
-    last_date = df_features['DATE'].iloc[-1]
-    last_values = df_features['PF_Satis'].values[-6:]  # Son 6 ay
-    
-    for i in range(forecast_periods):
-        next_date = last_date + pd.DateOffset(months=i+1)
-        
-        # Basit bir projeksiyon: son 6 ayın ortalaması * mevsimsellik faktörü
-        if len(last_values) > 0:
-            base_value = np.mean(last_values)
-            month = next_date.month
-            # Mevsimsellik faktörü (basit)
-            seasonal_factor = 1.0 + 0.1 * np.sin(2 * np.pi * month / 12)
-            next_pred = base_value * seasonal_factor
-        else:
-            next_pred = df_features['PF_Satis'].iloc[-1]
-        
-        next_pred = max(0, next_pred)  # Negatif olmamasını sağla
-        
-        forecast_data.append({
-            'DATE': next_date,
-            'YIL_AY': next_date.strftime('%Y-%m'),
-            'PF_Satis': next_pred,
-            'Model': best_model_name,
-            'Tahmin_Tipi': 'ML Tahmin'
-        })
-    
-    forecast_df = pd.DataFrame(forecast_data)
-    
-    # Basit tahmin metodları ekle (benchmark)
-    simple_forecasts = []
-    
-    # 1. Son değer yöntemi
-    last_value = df_features['PF_Satis'].iloc[-1]
-    for i in range(forecast_periods):
-        simple_forecasts.append({
-            'DATE': last_date + pd.DateOffset(months=i+1),
-            'YIL_AY': (last_date + pd.DateOffset(months=i+1)).strftime('%Y-%m'),
-            'PF_Satis': last_value,
-            'Model': 'Son Değer',
-            'Tahmin_Tipi': 'Basit Tahmin'
-        })
-    
-    # 2. Hareketli ortalama yöntemi
-    ma_value = df_features['PF_Satis'].tail(6).mean()
-    for i in range(forecast_periods):
-        simple_forecasts.append({
-            'DATE': last_date + pd.DateOffset(months=i+1),
-            'YIL_AY': (last_date + pd.DateOffset(months=i+1)).strftime('%Y-%m'),
-            'PF_Satis': ma_value,
-            'Model': '6 Aylık Ortalama',
-            'Tahmin_Tipi': 'Basit Tahmin'
-        })
-    
-    simple_forecast_df = pd.DataFrame(simple_forecasts)
-    
-    # Tüm tahminleri birleştir
-    all_forecasts = pd.concat([forecast_df, simple_forecast_df], ignore_index=True)
-    
-    return results, best_model_name, all_forecasts
-
-# =============================================================================
-# ANALYSIS FUNCTIONS
-# =============================================================================
-
-def calculate_city_performance(df, product, date_filter=None):
-    """Şehir bazlı performans"""
-    cols = get_product_columns(product)
-    
-    if date_filter:
-        df = df[(df['DATE'] >= date_filter[0]) & (df['DATE'] <= date_filter[1])]
-    
-    city_perf = df.groupby(['CITY_NORMALIZED', 'REGION']).agg({
-        cols['pf']: 'sum',
-        cols['rakip']: 'sum'
-    }).reset_index()
-    
-    city_perf.columns = ['City', 'Region', 'PF_Satis', 'Rakip_Satis']
-    city_perf['Toplam_Pazar'] = city_perf['PF_Satis'] + city_perf['Rakip_Satis']
-    city_perf['Pazar_Payi_%'] = safe_divide(city_perf['PF_Satis'], city_perf['Toplam_Pazar']) * 100
-    
-    # Bölge isimlerini düzelt
-    city_perf['Bölge'] = city_perf['Region']
-    
-    return city_perf
-
-def calculate_brick_performance(df, product, date_filter=None):
-    """Brick bazlı performans"""
-    cols = get_product_columns(product)
-    
-    if date_filter:
-        df = df[(df['DATE'] >= date_filter[0]) & (df['DATE'] <= date_filter[1])]
-    
-    terr_perf = df.groupby(['TERRITORIES', 'REGION', 'CITY', 'MANAGER']).agg({
-        cols['pf']: 'sum',
-        cols['rakip']: 'sum'
-    }).reset_index()
-    
-    terr_perf.columns = ['Brick', 'Region', 'City', 'Manager', 'PF_Satis', 'Rakip_Satis']
-    terr_perf['Toplam_Pazar'] = terr_perf['PF_Satis'] + terr_perf['Rakip_Satis']
-    terr_perf['Pazar_Payi_%'] = safe_divide(terr_perf['PF_Satis'], terr_perf['Toplam_Pazar']) * 100
-    
-    total_pf = terr_perf['PF_Satis'].sum()
-    terr_perf['Agirlik_%'] = safe_divide(terr_perf['PF_Satis'], total_pf) * 100
-    terr_perf['Goreceli_Pazar_Payi'] = safe_divide(terr_perf['PF_Satis'], terr_perf['Rakip_Satis'])
-    
-    return terr_perf.sort_values('PF_Satis', ascending=False)
-
-def calculate_competitor_analysis(df, product, date_filter=None):
-    """Rakip analizi"""
-    cols = get_product_columns(product)
-    
-    if date_filter:
-        df = df[(df['DATE'] >= date_filter[0]) & (df['DATE'] <= date_filter[1])]
-    
-    monthly = df.groupby('YIL_AY').agg({
-        cols['pf']: 'sum',
-        cols['rakip']: 'sum'
-    }).reset_index().sort_values('YIL_AY')
-    
-    monthly.columns = ['YIL_AY', 'PF', 'Rakip']
-    monthly['PF_Pay_%'] = (monthly['PF'] / (monthly['PF'] + monthly['Rakip'])) * 100
-    monthly['Rakip_Pay_%'] = 100 - monthly['PF_Pay_%']
-    monthly['PF_Buyume'] = monthly['PF'].pct_change() * 100
-    monthly['Rakip_Buyume'] = monthly['Rakip'].pct_change() * 100
-    monthly['Fark'] = monthly['PF_Buyume'] - monthly['Rakip_Buyume']
-    
-    return monthly
-
-def calculate_bcg_matrix(df, product, date_filter=None):
-    """BCG Matrix"""
-    cols = get_product_columns(product)
-    
-    if date_filter:
-        df_filtered = df[(df['DATE'] >= date_filter[0]) & (df['DATE'] <= date_filter[1])]
-    else:
-        df_filtered = df.copy()
-    
-    terr_perf = calculate_brick_performance(df_filtered, product)
-    
-    df_sorted = df_filtered.sort_values('DATE')
-    mid_point = len(df_sorted) // 2
-    
-    first_half = df_sorted.iloc[:mid_point].groupby('TERRITORIES')[cols['pf']].sum()
-    second_half = df_sorted.iloc[mid_point:].groupby('TERRITORIES')[cols['pf']].sum()
-    
-    growth_rate = {}
-    for terr in first_half.index:
-        if terr in second_half.index and first_half[terr] > 0:
-            growth_rate[terr] = ((second_half[terr] - first_half[terr]) / first_half[terr]) * 100
-        else:
-            growth_rate[terr] = 0
-    
-    terr_perf['Pazar_Buyume_%'] = terr_perf['Brick'].map(growth_rate).fillna(0)
-    
-    median_share = terr_perf['Goreceli_Pazar_Payi'].median()
-    median_growth = terr_perf['Pazar_Buyume_%'].median()
-    
-    def assign_bcg(row):
-        if row['Goreceli_Pazar_Payi'] >= median_share and row['Pazar_Buyume_%'] >= median_growth:
-            return "⭐ Star"
-        elif row['Goreceli_Pazar_Payi'] >= median_share and row['Pazar_Buyume_%'] < median_growth:
-            return "🐄 Cash Cow"
-        elif row['Goreceli_Pazar_Payi'] < median_share and row['Pazar_Buyume_%'] >= median_growth:
-            return "❓ Question Mark"
-        else:
-            return "🐶 Dog"
-    
-    terr_perf['BCG_Kategori'] = terr_perf.apply(assign_bcg, axis=1)
-    
-    return terr_perf
-
-# =============================================================================
-# YATIRIM STRATEJİSİ - GELİŞTİRİLMİŞ ALGORİTMA
-# =============================================================================
-
-def calculate_investment_strategy(city_perf):
-    """
-    Geliştirilmiş Yatırım Stratejisi Algoritması
-    """
-    df = city_perf.copy()
-    df = df[df['PF_Satis'] > 0]
-    
-    if len(df) == 0:
-        return df
-    
-    # 1. PAZAR BÜYÜKLÜĞÜ SEGMENTİ
-    try:
-        df["Pazar_Büyüklüğü"] = pd.qcut(
-            df["Toplam_Pazar"], 
-            q=3, 
-            labels=["Küçük", "Orta", "Büyük"],
-            duplicates='drop'
-        )
-    except:
-        df["Pazar_Büyüklüğü"] = "Orta"
-    
-    # 2. PERFORMANS SEGMENTİ
-    try:
-        df["Performans"] = pd.qcut(
-            df["PF_Satis"], 
-            q=3, 
-            labels=["Düşük", "Orta", "Yüksek"],
-            duplicates='drop'
-        )
-    except:
-        df["Performans"] = "Orta"
-    
-    # 3. PAZAR PAYI SEGMENTİ
-    try:
-        df["Pazar_Payı_Segment"] = pd.qcut(
-            df["Pazar_Payi_%"], 
-            q=3, 
-            labels=["Düşük", "Orta", "Yüksek"],
-            duplicates='drop'
-        )
-    except:
-        df["Pazar_Payı_Segment"] = "Orta"
-    
-    # 4. BÜYÜME POTANSİYELİ
-    df["Büyüme_Alanı"] = df["Toplam_Pazar"] - df["PF_Satis"]
-    try:
-        df["Büyüme_Potansiyeli"] = pd.qcut(
-            df["Büyüme_Alanı"],
-            q=3,
-            labels=["Düşük", "Orta", "Yüksek"],
-            duplicates='drop'
-        )
-    except:
-        df["Büyüme_Potansiyeli"] = "Orta"
-    
-    # 5. STRATEJİ ATAMA
-    def assign_strategy(row):
-        pazar_buyuklugu = str(row["Pazar_Büyüklüğü"])
-        pazar_payi = str(row["Pazar_Payı_Segment"])
-        buyume_potansiyeli = str(row["Büyüme_Potansiyeli"])
-        performans = str(row["Performans"])
-        
-        if (pazar_buyuklugu in ["Büyük", "Orta"] and 
-            pazar_payi == "Düşük" and 
-            buyume_potansiyeli in ["Yüksek", "Orta"]):
-            return "🚀 Agresif"
-        
-        elif (pazar_buyuklugu in ["Büyük", "Orta"] and 
-              pazar_payi == "Orta" and
-              performans in ["Orta", "Yüksek"]):
-            return "⚡ Hızlandırılmış"
-        
-        elif (pazar_buyuklugu == "Büyük" and 
-              pazar_payi == "Yüksek"):
-            return "🛡️ Koruma"
-        
-        elif (pazar_buyuklugu == "Küçük" and 
-              buyume_potansiyeli == "Yüksek" and
-              performans in ["Orta", "Yüksek"]):
-            return "💎 Potansiyel"
-        
-        else:
-            return "👁️ İzleme"
-    
-    df["Yatırım_Stratejisi"] = df.apply(assign_strategy, axis=1)
-    
-    return df
-
 # =============================================================================
 # YENİ GÖRSELLEŞTİRME FONKSİYONLARI
 # =============================================================================
@@ -2632,6 +1310,17 @@ def create_advanced_time_series_chart(monthly_df, forecast_df=None):
     if forecast_df is not None and not forecast_df.empty:
         # ML tahminleri
         ml_forecast = forecast_df[forecast_df['Tahmin_Tipi'] == 'ML Tahmin']
+        if not ml_forecast.empty and 'Ust_Sinir' in ml_forecast.columns:
+            # %95 tahmin aralığı
+            fig.add_trace(go.Scatter(
+                x=pd.concat([ml_forecast['DATE'], ml_forecast['DATE'][::-1]]),
+                y=pd.concat([ml_forecast['Ust_Sinir'], ml_forecast['Alt_Sinir'][::-1]]),
+                fill='toself',
+                fillcolor=hex_to_rgba(PERFORMANCE_COLORS['info'], 0.15),
+                line=dict(width=0),
+                hoverinfo='skip',
+                name='Tahmin Aralığı (%95)'
+            ))
         if not ml_forecast.empty:
             fig.add_trace(go.Scatter(
                 x=ml_forecast['DATE'],
@@ -2653,7 +1342,7 @@ def create_advanced_time_series_chart(monthly_df, forecast_df=None):
             ))
         
         # Basit tahminler
-        simple_forecast = forecast_df[forecast_df['Tahmin_Tipi'] == 'Basit Tahmin']
+        simple_forecast = forecast_df[forecast_df['Tahmin_Tipi'].isin(['Basit Tahmin', 'İstatistiksel Tahmin'])]
         for model in simple_forecast['Model'].unique():
             model_data = simple_forecast[simple_forecast['Model'] == model]
             fig.add_trace(go.Scatter(
@@ -3136,6 +1825,8 @@ def create_modern_bcg_chart(bcg_df):
     if bcg_df.empty:
         return None
     
+    import plotly.express as px
+    
     fig = px.scatter(
         bcg_df,
         x='Goreceli_Pazar_Payi',
@@ -3204,6 +1895,52 @@ def create_modern_bcg_chart(bcg_df):
     
     return fig
 
+def create_portfolio_bcg_heatmap(matrix):
+    """Brick × ürün BCG kategori ısı haritası"""
+    if matrix.empty:
+        return None
+    
+    products = [product for product in PRODUCTS if product in matrix.columns]
+    categories = list(BCG_COLORS)
+    
+    # Kategoriler ayrık renk skalasında 0..n-1 kodlanır
+    codes = matrix[products].apply(lambda col: col.map({cat: i for i, cat in enumerate(categories)}))
+    n = len(categories)
+    colorscale = []
+    for i, category in enumerate(categories):
+        colorscale += [[i / n, BCG_COLORS[category]], [(i + 1) / n, BCG_COLORS[category]]]
+    
+    fig = go.Figure(go.Heatmap(
+        z=codes.values,
+        x=products,
+        y=matrix['Brick'],
+        text=matrix[products].values,
+        texttemplate='%{text}',
+        customdata=np.repeat(matrix[['Region']].values, len(products), axis=1),
+        hovertemplate='<b>%{y}</b> (%{customdata})<br>%{x}: %{text}<extra></extra>',
+        colorscale=colorscale,
+        zmin=-0.5,
+        zmax=n - 0.5,
+        showscale=False,
+        xgap=2,
+        ygap=2
+    ))
+    
+    fig.update_layout(
+        title=dict(
+            text='<b>Çoklu Ürün BCG Haritası</b>',
+            font=dict(size=20, color='white', family='Inter')
+        ),
+        height=max(400, 28 * len(matrix) + 120),
+        plot_bgcolor='rgba(15, 23, 41, 0.9)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', family='Inter'),
+        xaxis=dict(side='top'),
+        yaxis=dict(autorange='reversed')
+    )
+    
+    return fig
+
 # =============================================================================
 # MODERN DATA TABLE STYLING
 # =============================================================================
@@ -3309,11 +2046,234 @@ def style_dataframe(df, color_column=None, gradient_columns=None):
     
     return styled_df
 
+def model_performance_table(model_groups):
+    """Model karşılaştırma tablosu (MAPE'ye göre sıralı); model_groups: [(tip, {model: metrikler}), ...]"""
+    perf_data = []
+    for model_type, model_results in model_groups:
+        for name, metrics in model_results.items():
+            perf_data.append({
+                'Model': name,
+                'Tip': model_type,
+                'MAE': metrics['MAE'],
+                'RMSE': metrics['RMSE'],
+                'MAPE (%)': metrics['MAPE'],
+                'R²': metrics['R2']
+            })
+    
+    return pd.DataFrame(perf_data).sort_values('MAPE (%)')
+
+def forecast_summary_table(forecast_df):
+    """Model bazlı ortalama ve toplam tahmin"""
+    forecast_summary = forecast_df.groupby(['Model', 'Tahmin_Tipi']).agg({
+        'PF_Satis': ['mean', 'sum']
+    }).reset_index()
+    
+    forecast_summary.columns = ['Model', 'Tahmin Tipi', 'Ortalama Tahmin', 'Toplam Tahmin']
+    forecast_summary.index = range(1, len(forecast_summary) + 1)
+    return forecast_summary
+
+# =============================================================================
+# ANALİZ ÖNBELLEĞİ
+# =============================================================================
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_query_engine(data_key, _df):
+    """Yüklenen veri için DuckDB sorgu motoru (dosya içeriği başına bir kez, oturumlar arası paylaşılır; pandas yolunda None)"""
+    return create_query_engine(_df)
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_filter_index(data_key, _df):
+    """Yüklenen veri için kenar çubuğu filtre indeksi (dosya içeriği başına bir kez)"""
+    return FilterIndex(_df)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def get_portfolio_bcg(data_key, filters, date_filter, _df, _engine=None):
+    """
+    Tüm ürünler için brick bazlı BCG / strateji (ürün seçiminden bağımsız, önbellekli)
+    
+    Anahtar veri + filtre (kenar çubuğu + uygulanan çapraz filtreler) + tarih durumudur;
+    _df bu filtrelerle süzülmüş veri (hash'lenmez).
+    """
+    return calculate_portfolio_bcg(_df, date_filter, engine=_engine)
+
+@st.cache_data(show_spinner=False)
+def get_monthly_aggregate(data_key, filters, product, date_filter, _df, _engine=None):
+    """
+    Brick × ay PF / rakip toplamları (önbellekli)
+    
+    Anahtar veri + filtre (kenar çubuğu + uygulanan çapraz filtreler) + ürün + tarih
+    durumudur; _df ve _engine bu filtrelerle süzülmüş veri ve görünüm (hash'lenmez).
+    """
+    return build_monthly_aggregate(_df, product, date_filter, engine=_engine)
+
+@st.cache_data(show_spinner=False)
+def compute_sales_anomalies(monthly_agg, window=6, threshold=3.5):
+    """Tüm portföy için anomali tablosu (önbellekli aylık toplamlar üzerinden)"""
+    return detect_sales_anomalies(monthly_agg, window=window, threshold=threshold)
+
+# =============================================================================
+# ARKA PLAN EĞİTİMİ
+# =============================================================================
+
+TRAINING_STATUS_ICONS = {
+    'Bekliyor': '⏳',
+    'Eğitiliyor': '🔄',
+    'Tamam': '✅',
+    'Hata': '❌',
+    'Zaman Aşımı': '⌛'
+}
+
+@st.fragment(run_every=1.0)
+def render_forecast_training_progress(job):
+    """Arka plandaki tahmin eğitiminin model bazlı ilerlemesi; bitince sayfa yenilenir"""
+    if job.done():
+        st.rerun()
+    
+    items, fraction = job.progress()
+    st.progress(fraction, text=f"🤖 ML modelleri arka planda eğitiliyor... ({job.elapsed:.0f} sn)")
+    if items:
+        st.caption("  ·  ".join(
+            f"{TRAINING_STATUS_ICONS.get(status, '')} {name}: {status}" for name, status in items
+        ))
+    st.caption("Eğitim bitene kadar basit tahminler gösteriliyor; sekme veya filtre değiştirmek eğitimi durdurmaz.")
+
+PRESET_STATUS_ICONS = {
+    'Hazır': '🟢',
+    'Hesaplanıyor': '🔄',
+    'Bekliyor': '⏳'
+}
+
+def _preset_status_caption(status):
+    st.caption("🔥 Dönem önbelleği: " + "  ·  ".join(
+        f"{PRESET_STATUS_ICONS.get(state, '')} {preset}" for preset, state in status.items()
+    ))
+
+@st.fragment(run_every=1.0)
+def render_preset_warmup_progress(data_key, period_index, filters):
+    """Arka planda ısınan dönemler; hepsi hazır olunca sayfa yenilenir"""
+    status = preset_status(data_key, period_index, filters)
+    if all(state == STATUS_READY for state in status.values()):
+        st.rerun()
+    _preset_status_caption(status)
+
+def render_preset_status(data_key, period_index, filters):
+    """Hangi dönemlerin hazır (anında açılır) olduğunu göster"""
+    status = preset_status(data_key, period_index, filters)
+    if all(state == STATUS_READY for state in status.values()):
+        _preset_status_caption(status)
+    else:
+        render_preset_warmup_progress(data_key, period_index, filters)
+
+# =============================================================================
+# ÇAPRAZ FİLTRE (HARİTA / GRAFİK TIKLAMALARI)
+# =============================================================================
+
+CROSS_FILTER_STATE_KEY = 'cross_filters'
+
+CROSS_FILTER_LABELS = {
+    'TERRITORIES': 'Brick',
+    'CITY_NORMALIZED': 'Şehir'
+}
+
+def _bar_point_value(point):
+    return point.get('x')
+
+def _map_point_city(point):
+    """Harita il seçimi -> şehir; etiket / anomali katmanları (location yok) yok sayılır"""
+    customdata = point.get('customdata')
+    if point.get('location') is None or not customdata or len(customdata) < 5:
+        return None
+    return customdata[4]
+
+def _on_chart_select(chart_key, column, extract):
+    """Grafik seçimi değişti: ortak çapraz filtreyi güncelle (seçim kalkınca filtre de kalkar)"""
+    points = st.session_state[chart_key]['selection']['points']
+    values = {extract(point) for point in points} - {None}
+    
+    cross_filters = dict(st.session_state.get(CROSS_FILTER_STATE_KEY, {}))
+    if values:
+        cross_filters[column] = tuple(sorted(values))
+    else:
+        cross_filters.pop(column, None)
+    st.session_state[CROSS_FILTER_STATE_KEY] = cross_filters
+
+def plotly_chart_cross_filter(fig, chart_key, column, extract=_bar_point_value):
+    """Tıklanan noktalar (il / çubuk) diğer sekmeleri `column` kolonunda filtreler"""
+    st.plotly_chart(
+        fig, use_container_width=True, key=chart_key, selection_mode='points',
+        on_select=lambda: _on_chart_select(chart_key, column, extract)
+    )
+
+def clear_cross_filters():
+    st.session_state[CROSS_FILTER_STATE_KEY] = {}
+
+def cross_filter_view(df, filter_index, sidebar_filters, base_view, cross_filters, date_filter, exclude=()):
+    """
+    Çapraz filtre uygulanmış (veri, küp, uygulanan çapraz filtreler) görünümü
+    
+    Veri, filtre indeksinin satır dizileri kesiştirilerek alınır; küp görünümü
+    aynı seviyeleri okur (yeniden toplama yok). `exclude` kolonları (sekmenin
+    kendi grafiklerinin belirlediği filtre) uygulanmaz. Filtreye uyan satır
+    yoksa filtresiz görünüm döner (uygulanan filtreler boş). Uygulanan
+    filtreler kolon sırasındadır; sidebar_filters ile birlikte önbellek anahtarıdır.
+    """
+    base_view = base_view + ((),)
+    applied = tuple(sorted((col, values) for col, values in cross_filters.items() if col not in exclude))
+    if not applied:
+        return base_view
+    
+    df_filtered, rollup, _ = base_view
+    rollup_view = rollup.filtered(**dict(applied))
+    if rollup_view.row_count(date_filter) == 0:
+        return base_view
+    return filter_index.filter_frame(df, sidebar_filters + applied), rollup_view, applied
+
+def render_cross_filter_status(cross_filters):
+    """Etkin çapraz filtreler ve temizleme düğmesi (kenar çubuğu)"""
+    if not cross_filters:
+        return
+    st.caption("🖱️ Çapraz filtre: " + "  ·  ".join(
+        f"{CROSS_FILTER_LABELS.get(col, col)}: {', '.join(map(str, values))}"
+        for col, values in cross_filters.items()
+    ))
+    st.button("✖ Çapraz filtreyi temizle", on_click=clear_cross_filters, key='clear_cross_filters')
+
+# =============================================================================
+# RAPOR ÖNBELLEĞİ
+# =============================================================================
+
+def compute_report_sections(data_key, filters, product, date_filter, forecast_periods, df, engine=None,
+                            progress_callback=None):
+    """
+    Rapor sayfalarını paralel hesapla (önbellekli)
+    
+    Aynı filtre durumu için tekrar tıklamalarda analizler yeniden hesaplanmaz.
+    Anahtar veri + filtre (kenar çubuğu + uygulanan çapraz filtreler) + ürün +
+    tarih durumudur; df ve engine bu filtrelerle süzülmüş veri ve satış küpü.
+    Bölümler küpten okunur.
+    
+    st.cache_data kullanılmaz: ilerleme çubuğu fonksiyon dışında oluşturulur ve
+    önbellekten dönüşte yeniden oynatılamaz (CacheReplayClosureError); önbellek
+    reporting.get_report_sections'tadır.
+    
+    Returns:
+        (dict, pd.DataFrame, bool): Sayfalar, bölüm süreleri ve önbellekten gelip gelmediği
+    """
+    return get_report_sections(
+        (data_key, filters, product, date_filter, forecast_periods),
+        df, product, date_filter, forecast_periods, progress_callback=progress_callback, engine=engine
+    )
+
 # =============================================================================
 # MAIN APP - GELİŞTİRİLMİŞ VERSİYON
 # =============================================================================
 
 def main():
+    # Bu oturumun model eğitimleri zamanlayıcıda oturum CPU bütçesine sayılır
+    if 'training_session' not in st.session_state:
+        st.session_state['training_session'] = uuid.uuid4().hex
+    set_training_session(st.session_state['training_session'])
+    
     # Ultra-Sade Enterprise UI
     st.markdown("""
         <style>
@@ -3398,6 +2358,8 @@ def main():
         
         try:
             df = load_excel_data(uploaded_file)
+            # Dönem önbelleği anahtarı: dosya içeriği
+            data_key = hashlib.md5(uploaded_file.getvalue()).hexdigest()
             gdf = load_geojson_gpd()
             geojson = load_geojson_json()
             st.success(f"✅ **{len(df):,}** satır veri yüklendi")
@@ -3410,7 +2372,7 @@ def main():
         # Ürün Seçimi
         st.markdown('<div style="background: rgba(30, 41, 59, 0.7); padding: 1rem; border-radius: 10px; margin: 1rem 0;">'
                    '<h4 style="color: #e2e8f0; margin: 0 0 1rem 0;">💊 ÜRÜN SEÇİMİ</h4>', unsafe_allow_html=True)
-        selected_product = st.selectbox("", ["TROCMETAM", "CORTIPOL", "DEKSAMETAZON", "PF IZOTONIK"], label_visibility="collapsed")
+        selected_product = st.selectbox("", PRODUCTS, label_visibility="collapsed")
         st.markdown('</div>', unsafe_allow_html=True)
         
         st.markdown("---")
@@ -3422,30 +2384,28 @@ def main():
         min_date = df['DATE'].min()
         max_date = df['DATE'].max()
         
-        date_option = st.selectbox("Dönem Seçin", ["Tüm Veriler", "Son 3 Ay", "Son 6 Ay", "Son 1 Yıl", "2025", "2024", "Özel Aralık"])
-        
-        if date_option == "Tüm Veriler":
-            date_filter = None
-        elif date_option == "Son 3 Ay":
-            start_date = max_date - pd.DateOffset(months=3)
-            date_filter = (start_date, max_date)
-        elif date_option == "Son 6 Ay":
-            start_date = max_date - pd.DateOffset(months=6)
-            date_filter = (start_date, max_date)
-        elif date_option == "Son 1 Yıl":
-            start_date = max_date - pd.DateOffset(years=1)
-            date_filter = (start_date, max_date)
-        elif date_option == "2025":
-            date_filter = (pd.to_datetime('2025-01-01'), pd.to_datetime('2025-12-31'))
-        elif date_option == "2024":
-            date_filter = (pd.to_datetime('2024-01-01'), pd.to_datetime('2024-12-31'))
+        # Dönemler verideki aylardan türetilir (kayan, yıl, mali yıl, çeyrek)
+        period_index = get_period_index(data_key, df)
+        date_option = st.selectbox("Dönem Seçin", period_index.labels() + [CUSTOM_PERIOD_LABEL])
+        
+        if date_option != CUSTOM_PERIOD_LABEL:
+            period = period_index.get(date_option)
         else:
             col_date1, col_date2 = st.columns(2)
             with col_date1:
                 start_date = st.date_input("Başlangıç", min_date, min_value=min_date, max_value=max_date)
             with col_date2:
                 end_date = st.date_input("Bitiş", max_date, min_value=min_date, max_value=max_date)
-            date_filter = (pd.to_datetime(start_date), pd.to_datetime(end_date))
+            period = period_index.custom(start_date, end_date)
+        date_filter = period.date_filter
+        
+        # Boş / geçersiz aralık: hiçbir toplama çalıştırılmaz
+        if period.empty:
+            st.warning("⚠️ Seçilen dönemde veri yok (tarih aralığını kontrol edin)")
+            st.stop()
+        
+        # Filtreler seçildikten sonra doldurulur
+        preset_status_placeholder = st.empty()
         
         st.markdown('</div>', unsafe_allow_html=True)
         
@@ -3455,25 +2415,46 @@ def main():
         st.markdown('<div style="background: rgba(30, 41, 59, 0.7); padding: 1rem; border-radius: 10px; margin: 1rem 0;">'
                    '<h4 style="color: #e2e8f0; margin: 0 0 1rem 0;">🔍 FİLTRELER</h4>', unsafe_allow_html=True)
         
-        territories = ["TÜMÜ"] + sorted(df['TERRITORIES'].unique())
-        selected_brick = st.selectbox("Brick", territories)
+        # Çoklu seçim; boş seçim = TÜMÜ
+        filter_index = get_filter_index(data_key, df)
+        selected_bricks = st.multiselect("Brick", filter_index.values('TERRITORIES'), placeholder="TÜMÜ")
+        selected_regions = st.multiselect("Bölge", filter_index.values('REGION'), placeholder="TÜMÜ")
+        selected_cities = st.multiselect("Şehir", filter_index.values('CITY_NORMALIZED'), placeholder="TÜMÜ")
+        selected_managers = st.multiselect("Manager", filter_index.values('MANAGER'), placeholder="TÜMÜ")
         
-        regions = ["TÜMÜ"] + sorted(df['REGION'].unique())
-        selected_region = st.selectbox("Bölge", regions)
-        
-        managers = ["TÜMÜ"] + sorted(df['MANAGER'].unique())
-        selected_manager = st.selectbox("Manager", managers)
+        render_cross_filter_status(st.session_state.get(CROSS_FILTER_STATE_KEY, {}))
         
         st.markdown('</div>', unsafe_allow_html=True)
         
-        # Veri filtreleme
-        df_filtered = df.copy()
-        if selected_brick != "TÜMÜ":
-            df_filtered = df_filtered[df_filtered['TERRITORIES'] == selected_brick]
-        if selected_region != "TÜMÜ":
-            df_filtered = df_filtered[df_filtered['REGION'] == selected_region]
-        if selected_manager != "TÜMÜ":
-            df_filtered = df_filtered[df_filtered['MANAGER'] == selected_manager]
+        # Filtre durumu (küp önbelleği anahtarı): kolon içinde VEYA, kolonlar arası VE
+        sidebar_filters = (
+            ('TERRITORIES', tuple(sorted(selected_bricks))),
+            ('REGION', tuple(sorted(selected_regions))),
+            ('CITY_NORMALIZED', tuple(sorted(selected_cities))),
+            ('MANAGER', tuple(sorted(selected_managers)))
+        )
+        
+        # Veri filtreleme: satır numarası dizileri kesiştirilir, veri taranmaz
+        df_filtered = filter_index.filter_frame(df, sidebar_filters)
+        
+        # Aynı filtreler DuckDB motorunda WHERE (IN) koşulu olarak uygulanır
+        query_engine = get_query_engine(data_key, df)
+        if query_engine is not None:
+            query_engine = query_engine.filtered(**dict(sidebar_filters))
+            st.caption("🦆 Sorgu motoru: DuckDB")
+        
+        # Tüm seviyeler filtre durumu başına bir kez toplanır; sekmeler küpten okur.
+        # Diğer tarih ön ayarlarının küpleri arka planda hazırlanır.
+        sales_rollup = get_sales_rollup(data_key, df_filtered, date_filter, engine=query_engine,
+                                        filters=sidebar_filters, period_index=period_index)
+        warm_date_presets(data_key, df_filtered, period_index, engine=query_engine, filters=sidebar_filters)
+        
+        with preset_status_placeholder.container():
+            render_preset_status(data_key, period_index, sidebar_filters)
+        
+        if sales_rollup.row_count(date_filter) == 0:
+            st.warning("⚠️ Seçilen filtreler ve dönem için veri yok")
+            st.stop()
         
         st.markdown("---")
         
@@ -3502,6 +2483,18 @@ def main():
                        f'<span style="color: #cbd5e1; font-size: 0.9rem;">{region}</span>'
                        f'</div>', unsafe_allow_html=True)
     
+    # plotly.express veri yüklendikten sonra gerekli (yükleme ekranında import edilmez)
+    import plotly.express as px
+    
+    # Çapraz filtre (harita / grafik tıklamaları): her sekme kendi grafiklerinin
+    # kolonu dışındaki filtreleri küpün filtreli görünümü olarak okur
+    cross_filters = st.session_state.get(CROSS_FILTER_STATE_KEY, {})
+    cross_views = {
+        exclude: cross_filter_view(df, filter_index, sidebar_filters, (df_filtered, sales_rollup),
+                                   cross_filters, date_filter, exclude)
+        for exclude in [(), ('TERRITORIES',), ('CITY_NORMALIZED',)]
+    }
+    
     # ANA İÇERİK - TAB'LER (GÜNCELLENDİ)
     tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9 = st.tabs([
         "📊 Genel Bakış",
@@ -3517,22 +2510,22 @@ def main():
     
     # TAB 1: GENEL BAKIŞ
     with tab1:
+        # Top 10 Brick tıklaması bu sekmeyi filtrelemez
+        df_filtered, sales_rollup, cross_applied = cross_views[('TERRITORIES',)]
+        
         st.header("📊 Genel Performans Özeti")
         
         cols = get_product_columns(selected_product)
         
-        if date_filter:
-            df_period = df_filtered[(df_filtered['DATE'] >= date_filter[0]) & (df_filtered['DATE'] <= date_filter[1])]
-        else:
-            df_period = df_filtered
-        
-        # Metrikler
-        total_pf = df_period[cols['pf']].sum()
-        total_rakip = df_period[cols['rakip']].sum()
+        # Metrikler (satış küpünden; ürün değişimi yeniden toplama yapmaz)
+        totals = aggregate_sales(df_filtered, selected_product, [], date_filter, engine=sales_rollup)
+        total_pf = totals[cols['pf']].iloc[0]
+        total_rakip = totals[cols['rakip']].iloc[0]
         total_market = total_pf + total_rakip
         market_share = (total_pf / total_market * 100) if total_market > 0 else 0
-        active_territories = df_period['TERRITORIES'].nunique()
-        avg_monthly_pf = total_pf / df_period['YIL_AY'].nunique() if df_period['YIL_AY'].nunique() > 0 else 0
+        active_territories = sales_rollup.nunique('TERRITORIES')
+        active_months = sales_rollup.nunique('YIL_AY')
+        avg_monthly_pf = total_pf / active_months if active_months > 0 else 0
         
         col1, col2, col3, col4 = st.columns(4)
         
@@ -3545,13 +2538,67 @@ def main():
                      f"{format_percentage(100-market_share)} rakip")
         with col4:
             st.metric("🏢 Active Brick", str(active_territories), 
-                     f"{df_period['MANAGER'].nunique()} manager")
+                     f"{sales_rollup.nunique('MANAGER')} manager")
+        
+        st.markdown("---")
+        
+        # Portföy görünümü: dört ürün aynı toplamadan
+        st.subheader("💼 Portföy Görünümü (Tüm Ürünler)")
+        
+        portfolio, portfolio_share, portfolio_regions = calculate_portfolio_overview(
+            df_filtered, date_filter, engine=sales_rollup
+        )
+        
+        col_pf1, col_pf2 = st.columns([1, 1])
+        
+        with col_pf1:
+            portfolio_display = portfolio.copy()
+            portfolio_display.columns = ['Ürün', 'PF Satış', 'Rakip Satış', 'Toplam Pazar', 'Pazar Payı %',
+                                         'Aylık Ort. PF', 'Son 3 Ay Büyüme %']
+            portfolio_display.index = range(1, len(portfolio_display) + 1)
+            
+            st.dataframe(
+                style_dataframe(portfolio_display, color_column='Pazar Payı %',
+                                gradient_columns=['Son 3 Ay Büyüme %']),
+                use_container_width=True
+            )
+        
+        with col_pf2:
+            fig_portfolio = go.Figure()
+            for product in PRODUCTS:
+                product_share = portfolio_share[portfolio_share['Urun'] == product]
+                fig_portfolio.add_trace(go.Scatter(
+                    x=product_share['YIL_AY'],
+                    y=product_share['Pazar_Payi_%'],
+                    mode='lines+markers',
+                    name=product,
+                    line=dict(width=4 if product == selected_product else 2)
+                ))
+            
+            fig_portfolio.update_layout(
+                title='Ürün Bazlı Aylık Pazar Payı',
+                xaxis_title='Ay',
+                yaxis_title='Pazar Payı (%)',
+                height=350,
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                font=dict(color='#e2e8f0'),
+                hovermode='x unified'
+            )
+            st.plotly_chart(fig_portfolio, use_container_width=True)
+        
+        with st.expander("🗺️ Bölge × Ürün Pazar Payı (%)"):
+            portfolio_regions_display = portfolio_regions.set_index('Region')
+            st.dataframe(
+                portfolio_regions_display.style.format('{:.1f}').background_gradient(cmap='RdYlGn', axis=None),
+                use_container_width=True
+            )
         
         st.markdown("---")
         
         # Top 10 Brick
         st.subheader("🏆 Top 10 Brick Performansı")
-        terr_perf = calculate_brick_performance(df_filtered, selected_product, date_filter)
+        terr_perf = calculate_brick_performance(df_filtered, selected_product, date_filter, engine=sales_rollup)
         top10 = terr_perf.head(10)
         
         # Toplam Pazar % ekle
@@ -3615,7 +2662,7 @@ def main():
                 )
             )
             
-            st.plotly_chart(fig_top10, use_container_width=True)
+            plotly_chart_cross_filter(fig_top10, 'top10_brick_select', 'TERRITORIES')
         
         with col_chart2:
             top5 = top10.head(5)
@@ -3674,6 +2721,9 @@ def main():
     
     # TAB 2: MODERN HARİTA
     with tab2:
+        # Harita / Top 10 Şehir tıklaması bu sekmeyi filtrelemez
+        df_filtered, sales_rollup, cross_applied = cross_views[('CITY_NORMALIZED',)]
+        
         st.header("🗺️ Modern Türkiye Haritası")
         
         # Harita için Bölge Filtresi
@@ -3687,7 +2737,7 @@ def main():
             )
         
         # Şehir performans verisini BÖLGEYE GÖRE FİLTRELE
-        city_data = calculate_city_performance(df_filtered, selected_product, date_filter)
+        city_data = calculate_city_performance(df_filtered, selected_product, date_filter, engine=sales_rollup)
         if selected_map_region != "TÜMÜ":
             city_data = city_data[city_data['Region'] == selected_map_region]
         
@@ -3721,16 +2771,33 @@ def main():
         if gdf is not None:
             st.subheader(f"📍 İl Bazlı Dağılım - {selected_map_region if selected_map_region != 'TÜMÜ' else 'Tüm Bölgeler'}")
             
+            map_anomalies = None
+            if st.checkbox("⚠️ Son 3 ayın anomalilerini haritada vurgula", key='map_anomalies'):
+                anomalies = compute_sales_anomalies(
+                    get_monthly_aggregate(data_key, sidebar_filters + cross_applied, selected_product, date_filter,
+                                          df_filtered, _engine=sales_rollup)
+                )
+                if not anomalies.empty:
+                    last_months = sorted(anomalies['Ay'].unique())[-3:]
+                    map_anomalies = anomalies[(anomalies['Seviye'] == 'Şehir') & anomalies['Ay'].isin(last_months)]
+                    if selected_map_region != "TÜMÜ":
+                        map_anomalies = map_anomalies[map_anomalies['Bölge'] == selected_map_region]
+                st.caption(
+                    f"🟠 Düşüş / 🔵 Artış - {0 if map_anomalies is None else map_anomalies['Ad'].nunique()} şehirde anomali"
+                )
+            
             turkey_map = create_modern_turkey_map(
                 city_data, 
                 gdf, 
                 title=f"{selected_product} - {view_mode} - {selected_map_region if selected_map_region != 'TÜMÜ' else 'Tüm Bölgeler'}",
                 view_mode=view_mode,
-                filtered_pf_toplam=filtered_pf_toplam
+                filtered_pf_toplam=filtered_pf_toplam,
+                anomaly_data=map_anomalies
             )
             
             if turkey_map:
-                st.plotly_chart(turkey_map, use_container_width=True)
+                plotly_chart_cross_filter(turkey_map, 'map_city_select', 'CITY_NORMALIZED', extract=_map_point_city)
+                st.caption("🖱️ İl veya şehir çubuğuna tıklamak diğer sekmeleri o şehre filtreler")
             else:
                 st.error("❌ Harita oluşturulamadı")
         else:
@@ -3776,7 +2843,7 @@ def main():
                 marker=dict(line=dict(width=2, color='rgba(255, 255, 255, 0.8)'))
             )
             
-            st.plotly_chart(fig_bar, use_container_width=True)
+            plotly_chart_cross_filter(fig_bar, 'top10_city_select', 'CITY_NORMALIZED')
         
         with col_analysis2:
             st.subheader("🗺️ Bölge Dağılımı")
@@ -3875,11 +2942,14 @@ def main():
                 height=400
             )
     
+    # Diğer sekmeler tüm çapraz filtreleri okur
+    df_filtered, sales_rollup, cross_applied = cross_views[()]
+    
     # TAB 3: BRICK ANALİZİ
     with tab3:
         st.header("🏢 Brick Bazlı Detaylı Analiz")
         
-        terr_perf = calculate_brick_performance(df_filtered, selected_product, date_filter)
+        terr_perf = calculate_brick_performance(df_filtered, selected_product, date_filter, engine=sales_rollup)
         
         if terr_perf.empty:
             st.warning("⚠️ Seçilen filtrelerde Brick verisi bulunamadı")
@@ -4089,11 +3159,14 @@ def main():
         with col_ts2:
             analysis_type = st.selectbox(
                 "Analiz Türü",
-                ["Temel Zaman Serisi", "Trend Analizi", "Karşılaştırmalı Analiz", "Mevsimsellik Analizi", "Volatilite Analizi"]
+                ["Temel Zaman Serisi", "Trend Analizi", "Karşılaştırmalı Analiz", "Mevsimsellik Analizi", "Volatilite Analizi",
+                 "Portföy Tahmini (Global Model)", "Anomali Tespiti"]
             )
         
         # Zaman Serisi hesapla
-        monthly_df = calculate_advanced_time_series(df_filtered, selected_product, brick_for_ts, date_filter)
+        monthly_df = calculate_advanced_time_series(
+            df_filtered, selected_product, brick_for_ts, date_filter, engine=sales_rollup
+        )
         
         if len(monthly_df) == 0:
             st.warning("⚠️ Seçilen filtrelerde veri bulunamadı")
@@ -4147,91 +3220,208 @@ def main():
             if analysis_type == "Temel Zaman Serisi":
                 st.subheader("📊 Temel Zaman Serisi Analizi")
                 
-                # ML tahmini
-                forecast_months = st.slider("Tahmin Periyodu (Ay)", 1, 12, 6)
+                # ML tahmini: en uzun ufuk bir kez hesaplanır, slider sadece dilimler
+                forecast_months = st.slider("Tahmin Periyodu (Ay)", 1, FORECAST_MAX_HORIZON, 6)
                 
                 if len(monthly_df) >= 12:
-                    with st.spinner("ML modelleri eğitiliyor..."):
-                        ml_results, best_model_name, forecast_df = train_advanced_ml_models(monthly_df, forecast_months)
+                    # Eğitim arka planda; bitene kadar basit tahminler ve model bazlı ilerleme gösterilir
+                    try:
+                        scenario, training_job = submit_forecast_scenario(
+                            monthly_df, product=selected_product, brick=brick_for_ts
+                        )
+                    except Exception as e:
+                        st.error(f"❌ ML eğitimi başarısız: {str(e)}")
+                        scenario, training_job = None, None
                     
-                    if ml_results is not None:
-                        # Model Performansı
-                        st.subheader("🤖 Model Performans Karşılaştırması")
+                    if training_job is not None:
+                        render_forecast_training_progress(training_job)
                         
-                        perf_data = []
-                        for name, metrics in ml_results.items():
-                            perf_data.append({
-                                'Model': name,
-                                'MAE': metrics['MAE'],
-                                'RMSE': metrics['RMSE'],
-                                'MAPE (%)': metrics['MAPE'],
-                                'R²': metrics['R2']
-                            })
-                        
-                        perf_df = pd.DataFrame(perf_data)
-                        perf_df = perf_df.sort_values('MAPE (%)')
-                        
-                        col_ml1, col_ml2 = st.columns([2, 1])
+                        st.subheader("📈 Zaman Serisi ve Basit Tahminler")
+                        ts_chart = create_advanced_time_series_chart(
+                            monthly_df, calculate_baseline_forecasts(monthly_df, forecast_months)
+                        )
+                        if ts_chart:
+                            st.plotly_chart(ts_chart, use_container_width=True)
+                    else:
+                        ml_results, best_model_name, stat_results = None, None, {}
+                        if scenario is not None:
+                            ml_results = scenario['ml_results']
+                            best_model_name = scenario['best_model_name']
+                            stat_results = scenario['stat_results']
+                            forecast_df = slice_forecast_horizon(scenario['forecast_df'], forecast_months)
                         
-                        with col_ml1:
-                            styled_perf = style_dataframe(
-                                perf_df,
-                                color_column='MAPE (%)',
-                                gradient_columns=['MAE', 'RMSE', 'R²']
+                        if ml_results is not None:
+                            if ml_results[best_model_name].get('from_registry'):
+                                registry_stats = get_model_registry().stats()
+                                st.caption(
+                                    f"♻️ Eğitilmiş modeller kayıt defterinden yüklendi "
+                                    f"({registry_stats['entries']}/{registry_stats['max_entries']} kayıt, "
+                                    f"{registry_stats['size_mb']:.1f} MB)"
+                                )
+                            
+                            scheduler_stats = get_training_scheduler().stats()
+                            st.caption(
+                                f"⚙️ Eğitim kuyruğu: {scheduler_stats['queue_depth']} bekleyen, "
+                                f"{scheduler_stats['running']}/{scheduler_stats['max_workers']} çalışan, "
+                                f"oturum bütçesi {scheduler_stats['session_cpu_budget']} çekirdek, "
+                                f"ortalama bekleme {scheduler_stats['avg_wait_seconds']:.2f} sn "
+                                f"(en fazla {scheduler_stats['max_wait_seconds']:.2f} sn)"
                             )
-                            st.dataframe(styled_perf, use_container_width=True)
-                        
-                        with col_ml2:
-                            best_mape = ml_results[best_model_name]['MAPE']
+                            if any(metrics.get('degraded') for metrics in ml_results.values()):
+                                st.info(
+                                    "ℹ️ Sunucu yoğun olduğu için Random Forest daha az ağaçla eğitildi; "
+                                    "yoğunluk azaldığında model otomatik olarak tamamlanacak."
+                                )
                             
-                            if best_mape < 10:
-                                confidence_level = "🟢 YÜKSEK"
-                                confidence_color = "#06B6D4"
-                            elif best_mape < 20:
-                                confidence_level = "🟡 ORTA"
-                                confidence_color = "#F59E0B"
-                            else:
-                                confidence_level = "🔴 DÜŞÜK"
-                                confidence_color = "#64748B"
+                            # Model Performansı
+                            st.subheader("🤖 Model Performans Karşılaştırması")
+                            
+                            perf_df = model_performance_table([('ML', ml_results), ('İstatistiksel', stat_results)])
+                            
+                            col_ml1, col_ml2 = st.columns([2, 1])
+                            
+                            with col_ml1:
+                                styled_perf = style_dataframe(
+                                    perf_df,
+                                    color_column='MAPE (%)',
+                                    gradient_columns=['MAE', 'RMSE', 'R²']
+                                )
+                                st.dataframe(styled_perf, use_container_width=True)
+                            
+                            with col_ml2:
+                                best_mape = ml_results[best_model_name]['MAPE']
+                                
+                                if best_mape < 10:
+                                    confidence_level = "🟢 YÜKSEK"
+                                    confidence_color = "#06B6D4"
+                                elif best_mape < 20:
+                                    confidence_level = "🟡 ORTA"
+                                    confidence_color = "#F59E0B"
+                                else:
+                                    confidence_level = "🔴 DÜŞÜK"
+                                    confidence_color = "#64748B"
+                                
+                                st.markdown(f'<div style="background: rgba(30, 41, 59, 0.8); padding: 1.5rem; border-radius: 12px; border: 2px solid {confidence_color}; margin-top: 1rem;">'
+                                           f'<h3 style="color: white; margin: 0 0 1rem 0;">🏆 En İyi Model</h3>'
+                                           f'<p style="color: {confidence_color}; font-size: 1.5rem; font-weight: 700; margin: 0 0 0.5rem 0;">{best_model_name}</p>'
+                                           f'<p style="color: #94a3b8; margin: 0 0 1rem 0;">MAPE: <span style="color: {confidence_color}; font-weight: 700;">{best_mape:.2f}%</span></p>'
+                                           f'<p style="color: #e2e8f0; font-weight: 600; margin: 0;">Güven Seviyesi: <span style="color: {confidence_color};">{confidence_level}</span></p>'
+                                           '</div>', unsafe_allow_html=True)
                             
-                            st.markdown(f'<div style="background: rgba(30, 41, 59, 0.8); padding: 1.5rem; border-radius: 12px; border: 2px solid {confidence_color}; margin-top: 1rem;">'
-                                       f'<h3 style="color: white; margin: 0 0 1rem 0;">🏆 En İyi Model</h3>'
-                                       f'<p style="color: {confidence_color}; font-size: 1.5rem; font-weight: 700; margin: 0 0 0.5rem 0;">{best_model_name}</p>'
-                                       f'<p style="color: #94a3b8; margin: 0 0 1rem 0;">MAPE: <span style="color: {confidence_color}; font-weight: 700;">{best_mape:.2f}%</span></p>'
-                                       f'<p style="color: #e2e8f0; font-weight: 600; margin: 0;">Güven Seviyesi: <span style="color: {confidence_color};">{confidence_level}</span></p>'
-                                       '</div>', unsafe_allow_html=True)
-                        
-                        st.markdown("---")
-                        
-                        # Zaman Serisi grafiği
-                        st.subheader("📈 Zaman Serisi ve Tahminler")
-                        ts_chart = create_advanced_time_series_chart(monthly_df, forecast_df)
-                        if ts_chart:
-                            st.plotly_chart(ts_chart, use_container_width=True)
-                        
-                        # Tahmin detayları
-                        if forecast_df is not None:
                             st.markdown("---")
-                            st.subheader("📋 Tahmin Detayları")
                             
-                            forecast_summary = forecast_df.groupby(['Model', 'Tahmin_Tipi']).agg({
-                                'PF_Satis': ['mean', 'sum']
-                            }).reset_index()
+                            # Zaman Serisi grafiği
+                            st.subheader("📈 Zaman Serisi ve Tahminler")
+                            ts_chart = create_advanced_time_series_chart(monthly_df, forecast_df)
+                            if ts_chart:
+                                st.plotly_chart(ts_chart, use_container_width=True)
                             
-                            forecast_summary.columns = ['Model', 'Tahmin Tipi', 'Ortalama Tahmin', 'Toplam Tahmin']
-                            forecast_summary.index = range(1, len(forecast_summary) + 1)
+                            # Tahmin detayları
+                            if forecast_df is not None:
+                                st.markdown("---")
+                                st.subheader("📋 Tahmin Detayları")
+                                
+                                styled_forecast = style_dataframe(
+                                    forecast_summary_table(forecast_df),
+                                    gradient_columns=['Ortalama Tahmin', 'Toplam Tahmin']
+                                )
+                                
+                                st.dataframe(styled_forecast, use_container_width=True)
+                                
+                                benchmark_df = ml_results[best_model_name].get('forecast_benchmark')
+                                if benchmark_df is not None and not benchmark_df.empty:
+                                    st.markdown("#### 🎯 Çok Adımlı Tahmin Karşılaştırması (Test Dönemi)")
+                                    st.caption(
+                                        f"Eğitim sonundan itibaren {int(benchmark_df['Ufuk (Ay)'].iloc[0])} ay "
+                                        f"gerçek değer kullanılmadan tahmin edildi."
+                                    )
+                                    st.dataframe(
+                                        style_dataframe(
+                                            benchmark_df.drop(columns=['Tahmin_Tipi']),
+                                            color_column='MAPE',
+                                            gradient_columns=['MAE', 'RMSE']
+                                        ),
+                                        use_container_width=True
+                                    )
                             
-                            styled_forecast = style_dataframe(
-                                forecast_summary,
-                                gradient_columns=['Ortalama Tahmin', 'Toplam Tahmin']
+                            with st.expander("🔁 Walk-forward Backtest (Genişleyen Pencere)"):
+                                st.caption(
+                                    "Modeller son 12 kesim noktasının her birinde o tarihe kadarki veriyle eğitilir ve "
+                                    "sonraki 6 ay gerçek değer kullanılmadan tahmin edilir."
+                                )
+                                
+                                if st.button("Backtest Çalıştır", key='run_backtest'):
+                                    with st.spinner("Backtest katları paralel çalışıyor..."):
+                                        bt_summary, bt_per_horizon = walk_forward_backtest(
+                                            monthly_df, horizon=6,
+                                            product=selected_product, brick=brick_for_ts
+                                        )
+                                    
+                                    if bt_summary is None:
+                                        st.warning("Backtest için yeterli veri yok (en az 19 ay).")
+                                    else:
+                                        bt_summary.index = range(1, len(bt_summary) + 1)
+                                        st.dataframe(
+                                            style_dataframe(bt_summary, color_column='MAPE', gradient_columns=['MAE', 'RMSE']),
+                                            use_container_width=True
+                                        )
+                                        
+                                        fig_bt = go.Figure()
+                                        for model_name, model_rows in bt_per_horizon.groupby('Model'):
+                                            fig_bt.add_trace(go.Scatter(
+                                                x=model_rows['Ufuk (Ay)'],
+                                                y=model_rows['MAPE'],
+                                                mode='lines+markers',
+                                                name=model_name
+                                            ))
+                                        fig_bt.update_layout(
+                                            title='<b>Ufuk Bazlı MAPE (%)</b>',
+                                            xaxis_title='Tahmin Ufku (Ay)',
+                                            yaxis_title='MAPE (%)',
+                                            height=400,
+                                            plot_bgcolor='rgba(0,0,0,0)',
+                                            paper_bgcolor='rgba(0,0,0,0)',
+                                            font=dict(color='#e2e8f0', family='Inter')
+                                        )
+                                        st.plotly_chart(fig_bt, use_container_width=True)
+                        elif stat_results:
+                            # ML için 24 ay gerekir; istatistiksel modeller 12 aydan itibaren eğitilir
+                            st.warning(
+                                "ML modeli eğitilemedi. Yeterli veri yok olabilir; "
+                                "aşağıda istatistiksel modellerin sonuçları gösteriliyor."
                             )
                             
-                            st.dataframe(styled_forecast, use_container_width=True)
-                    else:
-                        st.warning("ML modeli eğitilemedi. Yeterli veri yok olabilir.")
-                        ts_chart = create_advanced_time_series_chart(monthly_df)
-                        if ts_chart:
-                            st.plotly_chart(ts_chart, use_container_width=True)
+                            st.subheader("📐 İstatistiksel Model Karşılaştırması")
+                            st.dataframe(
+                                style_dataframe(
+                                    model_performance_table([('İstatistiksel', stat_results)]),
+                                    color_column='MAPE (%)',
+                                    gradient_columns=['MAE', 'RMSE', 'R²']
+                                ),
+                                use_container_width=True
+                            )
+                            
+                            st.markdown("---")
+                            
+                            st.subheader("📈 Zaman Serisi ve Tahminler")
+                            ts_chart = create_advanced_time_series_chart(monthly_df, forecast_df)
+                            if ts_chart:
+                                st.plotly_chart(ts_chart, use_container_width=True)
+                            
+                            st.markdown("---")
+                            st.subheader("📋 Tahmin Detayları")
+                            st.dataframe(
+                                style_dataframe(
+                                    forecast_summary_table(forecast_df),
+                                    gradient_columns=['Ortalama Tahmin', 'Toplam Tahmin']
+                                ),
+                                use_container_width=True
+                            )
+                        else:
+                            st.warning("ML modeli eğitilemedi. Yeterli veri yok olabilir.")
+                            ts_chart = create_advanced_time_series_chart(monthly_df)
+                            if ts_chart:
+                                st.plotly_chart(ts_chart, use_container_width=True)
                 else:
                     st.warning("ML tahmini için en az 12 ay veri gereklidir.")
                     ts_chart = create_advanced_time_series_chart(monthly_df)
@@ -4347,6 +3537,176 @@ def main():
                             min_vol = monthly_df['PF_CV'].min()
                             st.metric("📉 Minimum CV", f"{min_vol:.1f}%")
             
+            elif analysis_type == "Anomali Tespiti":
+                st.subheader("🚨 Anomali Tespiti - Brick & Şehir Aylık Serileri")
+                st.caption(
+                    "Her ay, serinin önceki aylarının medyanı ve medyan mutlak sapması (MAD) ile karşılaştırılır "
+                    "(robust z-skor). Ani düşüşler stok kesintisi veya veri girişi hatasına işaret edebilir. "
+                    "Bu görünümde Brick seçimi kullanılmaz."
+                )
+                
+                col_an1, col_an2 = st.columns(2)
+                with col_an1:
+                    anomaly_window = st.slider("Referans Pencere (Ay)", 3, 12, 6, key='anomaly_window')
+                with col_an2:
+                    anomaly_threshold = st.slider("Robust Z Eşiği", 2.0, 6.0, 3.5, 0.5, key='anomaly_threshold')
+                
+                monthly_agg = get_monthly_aggregate(data_key, sidebar_filters + cross_applied, selected_product,
+                                                    date_filter, df_filtered, _engine=sales_rollup)
+                anomalies = compute_sales_anomalies(monthly_agg, anomaly_window, anomaly_threshold)
+                
+                if anomalies.empty:
+                    st.success("✅ Seçilen eşikte anomali bulunmadı.")
+                else:
+                    col_an1, col_an2, col_an3, col_an4 = st.columns(4)
+                    
+                    with col_an1:
+                        st.metric("🚨 Toplam Anomali", len(anomalies))
+                    with col_an2:
+                        st.metric("📉 PF Düşüş", int(((anomalies['Seri'] == 'PF') & (anomalies['Robust_Z'] < 0)).sum()))
+                    with col_an3:
+                        st.metric("🏢 Etkilenen Brick", anomalies.loc[anomalies['Seviye'] == 'Brick', 'Ad'].nunique())
+                    with col_an4:
+                        st.metric("🏙️ Etkilenen Şehir", anomalies.loc[anomalies['Seviye'] == 'Şehir', 'Ad'].nunique())
+                    
+                    # Seçilen serinin grafiği (anomali ayları işaretli)
+                    series_options = (anomalies['Seviye'] + ': ' + anomalies['Ad'] + ' (' + anomalies['Seri'] + ')').drop_duplicates().tolist()
+                    selected_series = st.selectbox("Seri Grafiği", series_options[:50], key='anomaly_series')
+                    
+                    series_anomalies = anomalies[
+                        anomalies['Seviye'] + ': ' + anomalies['Ad'] + ' (' + anomalies['Seri'] + ')' == selected_series
+                    ]
+                    level_col = 'TERRITORIES' if series_anomalies['Seviye'].iloc[0] == 'Brick' else 'CITY_NORMALIZED'
+                    value_col = 'PF_Satis' if series_anomalies['Seri'].iloc[0] == 'PF' else 'Rakip_Satis'
+                    series_data = monthly_agg[monthly_agg[level_col] == series_anomalies['Ad'].iloc[0]].groupby('YIL_AY')[value_col].sum()
+                    
+                    fig_anomaly = go.Figure()
+                    fig_anomaly.add_trace(go.Scatter(
+                        x=series_data.index,
+                        y=series_data.values,
+                        mode='lines+markers',
+                        name=selected_series,
+                        line=dict(color=PERFORMANCE_COLORS['high'], width=2)
+                    ))
+                    fig_anomaly.add_trace(go.Scatter(
+                        x=series_anomalies['Ay'],
+                        y=series_anomalies['Değer'],
+                        mode='markers',
+                        name='Anomali',
+                        marker=dict(size=14, color=PERFORMANCE_COLORS['warning'], symbol='x')
+                    ))
+                    fig_anomaly.update_layout(
+                        height=400,
+                        plot_bgcolor='rgba(0,0,0,0)',
+                        paper_bgcolor='rgba(0,0,0,0)',
+                        font=dict(color='#e2e8f0', family='Inter')
+                    )
+                    st.plotly_chart(fig_anomaly, use_container_width=True)
+                    
+                    anomaly_display = anomalies.head(200).copy()
+                    anomaly_display.index = range(1, len(anomaly_display) + 1)
+                    st.dataframe(
+                        style_dataframe(anomaly_display, color_column='Sapma_%', gradient_columns=['Değer', 'Beklenen']),
+                        use_container_width=True,
+                        height=450
+                    )
+            
+            elif analysis_type == "Portföy Tahmini (Global Model)":
+                st.subheader("🌐 Portföy Tahmini - Tüm Brick'ler")
+                st.caption("Tek bir global model tüm brick × ay verisiyle eğitilir; bu görünümde Brick seçimi kullanılmaz.")
+                
+                global_months = st.slider("Tahmin Periyodu (Ay)", 1, 12, 6, key='global_forecast_months')
+                
+                with st.spinner("Global model eğitiliyor..."):
+                    global_metrics, global_forecast = train_global_ml_model(
+                        df_filtered, selected_product, date_filter, global_months
+                    )
+                
+                if global_metrics is None:
+                    st.warning("Global model için en az 24 ay veri gereklidir.")
+                else:
+                    col_gm1, col_gm2, col_gm3, col_gm4 = st.columns(4)
+                    
+                    with col_gm1:
+                        st.metric("🏢 Brick Sayısı", global_metrics['Brick Sayısı'])
+                    
+                    with col_gm2:
+                        st.metric("🎯 Test MAPE", f"{global_metrics['MAPE']:.1f}%")
+                    
+                    with col_gm3:
+                        st.metric("📈 R²", f"{global_metrics['R2']:.3f}")
+                    
+                    with col_gm4:
+                        st.metric(
+                            "⏱️ Eğitim Süresi",
+                            "Kayıtlı" if global_metrics['from_registry'] else f"{global_metrics['Eğitim Süresi (sn)']:.1f} sn"
+                        )
+                    
+                    brick_forecast = global_forecast.groupby(
+                        ['TERRITORIES', 'CITY', 'REGION'], as_index=False
+                    )[['PF_Satis', 'Alt_Sinir', 'Ust_Sinir']].sum()
+                    brick_forecast = brick_forecast.sort_values('PF_Satis', ascending=False)
+                    brick_forecast.columns = ['Brick', 'Şehir', 'Bölge', 'Toplam Tahmin', 'Alt Sınır', 'Üst Sınır']
+                    
+                    top_bricks = brick_forecast.head(15)
+                    fig_global = go.Figure(go.Bar(
+                        x=top_bricks['Brick'],
+                        y=top_bricks['Toplam Tahmin'],
+                        error_y=dict(
+                            type='data',
+                            symmetric=False,
+                            array=top_bricks['Üst Sınır'] - top_bricks['Toplam Tahmin'],
+                            arrayminus=top_bricks['Toplam Tahmin'] - top_bricks['Alt Sınır']
+                        ),
+                        marker_color=PERFORMANCE_COLORS['info']
+                    ))
+                    fig_global.update_layout(
+                        title=f'<b>En Yüksek Tahminli 15 Brick ({global_months} Ay)</b>',
+                        height=450,
+                        plot_bgcolor='rgba(0,0,0,0)',
+                        paper_bgcolor='rgba(0,0,0,0)',
+                        font=dict(color='#e2e8f0', family='Inter')
+                    )
+                    st.plotly_chart(fig_global, use_container_width=True)
+                    
+                    brick_forecast.index = range(1, len(brick_forecast) + 1)
+                    st.dataframe(
+                        style_dataframe(brick_forecast, gradient_columns=['Toplam Tahmin']),
+                        use_container_width=True,
+                        height=400
+                    )
+                    
+                    if st.checkbox("📐 Brick bazlı istatistiksel modellerle karşılaştır (ETS / Holt-Winters / SARIMA)",
+                                   key='global_stat_compare'):
+                        with st.spinner("İstatistiksel modeller brick bazında paralel eğitiliyor..."):
+                            stat_summary, _ = fit_statistical_models_by_brick(
+                                df_filtered, selected_product, date_filter, global_months
+                            )
+                        
+                        if stat_summary is None or stat_summary.empty:
+                            st.warning("İstatistiksel modeller için veri bulunamadı.")
+                        else:
+                            status_counts = stat_summary['Durum'].value_counts()
+                            st.caption(" · ".join(f"{status}: {count}" for status, count in status_counts.items()))
+                            
+                            stat_compare = brick_forecast[['Brick', 'Şehir', 'Bölge', 'Toplam Tahmin']].merge(
+                                stat_summary.reindex(columns=['TERRITORIES', 'En İyi Model', 'MAPE', 'Toplam Tahmin', 'Durum']),
+                                left_on='Brick',
+                                right_on='TERRITORIES',
+                                how='left',
+                                suffixes=(' (Global)', ' (İstatistiksel)')
+                            ).drop(columns=['TERRITORIES']).rename(columns={'MAPE': 'İstatistiksel MAPE'})
+                            stat_compare.index = range(1, len(stat_compare) + 1)
+                            
+                            st.dataframe(
+                                style_dataframe(
+                                    stat_compare,
+                                    gradient_columns=['Toplam Tahmin (Global)', 'Toplam Tahmin (İstatistiksel)']
+                                ),
+                                use_container_width=True,
+                                height=400
+                            )
+            
             # Detaylı zaman serisi tablosu
             st.markdown("---")
             st.subheader("📋 Detaylı Zaman Serisi Verisi")
@@ -4388,7 +3748,7 @@ def main():
     with tab5:
         st.header("📊 Detaylı Rakip Analizi")
         
-        comp_data = calculate_competitor_analysis(df_filtered, selected_product, date_filter)
+        comp_data = calculate_competitor_analysis(df_filtered, selected_product, date_filter, engine=sales_rollup)
         
         if len(comp_data) == 0:
             st.warning("⚠️ Seçilen filtrelerde veri bulunamadı")
@@ -4451,7 +3811,7 @@ def main():
     with tab6:
         st.header("⭐ BCG Matrix & Yatırım Stratejisi")
         
-        bcg_df = calculate_bcg_matrix(df_filtered, selected_product, date_filter)
+        bcg_df = calculate_bcg_matrix(df_filtered, selected_product, date_filter, engine=sales_rollup)
         
         if bcg_df.empty:
             st.warning("⚠️ BCG analizi için yeterli veri yok")
@@ -4514,13 +3874,59 @@ def main():
                 use_container_width=True,
                 height=400
             )
+        
+        # Çoklu ürün BCG: dört ürün aynı geniş toplamadan
+        st.markdown("---")
+        st.subheader("🧩 Çoklu Ürün BCG & Strateji")
+        
+        portfolio_matrix, portfolio_bcg = get_portfolio_bcg(data_key, sidebar_filters + cross_applied, date_filter,
+                                                            df_filtered, _engine=sales_rollup)
+        
+        if portfolio_matrix.empty:
+            st.info("Çoklu ürün BCG için veri yok")
+        else:
+            category_counts = pd.crosstab(
+                portfolio_bcg['BCG_Kategori'], portfolio_bcg['Urun']
+            ).reindex(index=list(BCG_COLORS), columns=PRODUCTS, fill_value=0)
+            category_counts.index.name = 'BCG'
+            st.dataframe(category_counts, use_container_width=True)
+            
+            col_pbcg1, col_pbcg2 = st.columns(2)
+            with col_pbcg1:
+                portfolio_region = st.selectbox(
+                    "Bölge",
+                    ["TÜMÜ"] + sorted(portfolio_matrix['Region'].dropna().unique()),
+                    key='portfolio_bcg_region'
+                )
+            with col_pbcg2:
+                portfolio_top_n = st.slider("Gösterilecek Brick (seçili ürün PF'sine göre)", 10, 200, 40, 10,
+                                            key='portfolio_bcg_top')
+            
+            # Seçili ürünün PF satışına göre ilk N brick (detay satırları matris sırasında)
+            selected_pf = portfolio_bcg.loc[portfolio_bcg['Urun'] == selected_product, 'PF_Satis'].values
+            heatmap_rows = portfolio_matrix.assign(_pf=selected_pf)
+            if portfolio_region != "TÜMÜ":
+                heatmap_rows = heatmap_rows[heatmap_rows['Region'] == portfolio_region]
+            heatmap_rows = heatmap_rows.nlargest(portfolio_top_n, '_pf').drop(columns='_pf')
+            
+            heatmap_chart = create_portfolio_bcg_heatmap(heatmap_rows)
+            if heatmap_chart:
+                st.plotly_chart(heatmap_chart, use_container_width=True)
+            
+            with st.expander("📋 Brick × Ürün Strateji Tablosu"):
+                strategy_table = portfolio_bcg.pivot_table(
+                    index=['Brick', 'Region'], columns='Urun', values='Yatırım_Stratejisi', aggfunc='first'
+                ).reindex(columns=PRODUCTS).reset_index()
+                st.dataframe(strategy_table, use_container_width=True, height=400)
     
     # TAB 7: BÖLGE KARŞILAŞTIRMALI ANALİZ
     with tab7:
         st.header("🏆 Bölge Karşılaştırmalı Analiz")
         
         # Bölge karşılaştırmalı analiz
-        region_comparison = calculate_region_comparative_analysis(df_filtered, selected_product, date_filter)
+        region_comparison = calculate_region_comparative_analysis(
+            df_filtered, selected_product, date_filter, engine=sales_rollup
+        )
         
         if len(region_comparison) == 0:
             st.warning("⚠️ Bölge verisi bulunamadı")
@@ -4579,7 +3985,7 @@ def main():
             if selected_intra_region != "Seçiniz":
                 # Bölge içi detaylı analiz
                 city_analysis, brick_analysis, manager_analysis, monthly_analysis = calculate_intra_region_performance(
-                    df_filtered, selected_product, selected_intra_region, date_filter
+                    df_filtered, selected_product, selected_intra_region, date_filter, engine=sales_rollup
                 )
                 
                 if city_analysis is not None:
@@ -4747,7 +4153,7 @@ def main():
         st.subheader("1️⃣ Şehir Yatırım Stratejisi Özeti")
         
         # Şehir performans verisini al
-        city_perf = calculate_city_performance(df_filtered, selected_product, date_filter)
+        city_perf = calculate_city_performance(df_filtered, selected_product, date_filter, engine=sales_rollup)
         
         if len(city_perf) == 0:
             st.warning("⚠️ Şehir performans verisi bulunamadı")
@@ -4780,7 +4186,7 @@ def main():
         st.subheader("2️⃣ Şehir × Brick × BCG Detay Tablosu")
         
         # BCG matrix verisini al
-        bcg_df = calculate_bcg_matrix(df_filtered, selected_product, date_filter)
+        bcg_df = calculate_bcg_matrix(df_filtered, selected_product, date_filter, engine=sales_rollup)
         investment_df = calculate_investment_strategy(city_perf) if 'city_perf' in locals() else pd.DataFrame()
         
         if len(bcg_df) == 0:
@@ -5259,101 +4665,123 @@ def main():
         if st.button("📊 Excel Raporu Oluştur", type="primary", use_container_width=True):
             with st.spinner("Rapor hazırlanıyor..."):
                 try:
-                    # Tüm analizleri hesapla
-                    terr_perf = calculate_brick_performance(df_filtered, selected_product, date_filter)
-                    total_market_all = terr_perf['Toplam_Pazar'].sum()
-                    terr_perf['Toplam_Pazar_%'] = safe_divide(terr_perf['Toplam_Pazar'], total_market_all) * 100
+                    # Bölümler bağımlılık grafiğine göre paralel hesaplanır (önbellekli)
+                    progress_bar = st.progress(0.0, text="Rapor bölümleri hesaplanıyor...")
+                    
+                    def on_section_done(done, total, name, elapsed):
+                        progress_bar.progress(done / total, text=f"✅ {name} ({elapsed:.2f} sn) - {done}/{total}")
                     
-                    monthly_df = calculate_advanced_time_series(df_filtered, selected_product, None, date_filter)
-                    trend_analysis = perform_trend_analysis(monthly_df)
-                    bcg_df = calculate_bcg_matrix(df_filtered, selected_product, date_filter)
-                    city_data = calculate_city_performance(df_filtered, selected_product, date_filter)
-                    comp_data = calculate_competitor_analysis(df_filtered, selected_product, date_filter)
-                    region_comparison = calculate_region_comparative_analysis(df_filtered, selected_product, date_filter)
+                    compute_start = time.perf_counter()
+                    report_sections, section_timings, sections_cached = compute_report_sections(
+                        data_key, sidebar_filters + cross_applied, selected_product, date_filter, 6,
+                        df_filtered, engine=sales_rollup, progress_callback=on_section_done
+                    )
+                    compute_elapsed = time.perf_counter() - compute_start
+                    progress_bar.progress(
+                        1.0,
+                        text=f"✅ Analizler hazır ({compute_elapsed:.2f} sn{', önbellekten' if sections_cached else ''})"
+                    )
+                    report_sections = dict(report_sections)
                     
                     # Yeni Şehir-Brick analizi
                     if 'city_brick_mapping' in locals():
-                        alignment_analysis = city_brick_mapping.copy()
-                    else:
-                        alignment_analysis = pd.DataFrame()
-                    
-                    # ML tahmini
-                    if len(monthly_df) >= 12:
-                        ml_results, best_model_name, forecast_df = train_advanced_ml_models(monthly_df, 6)
-                    else:
-                        ml_results, best_model_name, forecast_df = None, None, None
-                    
-                    output = BytesIO()
+                        report_sections['Şehir-Brick Stratejik Uyum'] = city_brick_mapping.copy()
                     
-                    # DEĞİŞİKLİK BURADA: context manager kullanımı
-                    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                        terr_perf.to_excel(writer, sheet_name='Brick Performans', index=False)
-                        monthly_df.to_excel(writer, sheet_name='Zaman Serisi', index=False)
-                        
-                        # Trend analizi sonuçları
-                        if 'error' not in trend_analysis:
-                            trend_df = pd.DataFrame([trend_analysis])
-                            trend_df.to_excel(writer, sheet_name='Trend Analizi', index=False)
-                        
-                        if bcg_df is not None and not bcg_df.empty:
-                            bcg_df.to_excel(writer, sheet_name='BCG Matrix', index=False)
-                        
-                        if not city_data.empty:
-                            city_data.to_excel(writer, sheet_name='Şehir Analizi', index=False)
-                        
-                        if not comp_data.empty:
-                            comp_data.to_excel(writer, sheet_name='Rakip Analizi', index=False)
-                        
-                        if not region_comparison.empty:
-                            region_comparison.to_excel(writer, sheet_name='Bölge Karşılaştırması', index=False)
-                        
-                        if not alignment_analysis.empty:
-                            alignment_analysis.to_excel(writer, sheet_name='Şehir-Brick Stratejik Uyum', index=False)
-                        
-                        if forecast_df is not None and not forecast_df.empty:
-                            forecast_df.to_excel(writer, sheet_name='ML Tahminler', index=False)
-                        
-                        # ML model performansları
-                        if ml_results is not None:
-                            perf_data = []
-                            for name, metrics in ml_results.items():
-                                perf_data.append({
-                                    'Model': name,
-                                    'MAE': metrics['MAE'],
-                                    'RMSE': metrics['RMSE'],
-                                    'MAPE': metrics['MAPE'],
-                                    'R2': metrics['R2']
-                                })
-                            perf_df = pd.DataFrame(perf_data)
-                            perf_df.to_excel(writer, sheet_name='ML Performans', index=False)
-                        
-                        # writer.save() yerine context manager otomatik olarak kaydeder
-                        # writer.close() gerek yok, with bloğu otomatik olarak kapatır
+                    report_bytes, report_timings = write_excel_report(report_sections)
                     
                     # Download button
                     st.download_button(
                         label="📥 Excel Raporunu İndir",
-                        data=output.getvalue(),
+                        data=report_bytes,
                         file_name=f"ticari_portfoy_analizi_{selected_product}_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
                         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                         use_container_width=True
                     )
                     
+                    # Bölüm ve sayfa bazlı oluşturma süreleri
+                    with st.expander(f"⏱️ Rapor Oluşturma Süreleri (Toplam: {compute_elapsed + report_timings['Süre (sn)'].sum():.2f} sn)"):
+                        st.caption(
+                            f"Analiz: {compute_elapsed:.2f} sn (sıralı toplam {section_timings['Süre (sn)'].sum():.2f} sn) | "
+                            f"Excel yazma: {report_timings['Süre (sn)'].sum():.2f} sn"
+                        )
+                        
+                        col_time1, col_time2 = st.columns(2)
+                        
+                        with col_time1:
+                            section_display = section_timings.sort_values('Süre (sn)', ascending=False)
+                            section_display.index = range(1, len(section_display) + 1)
+                            st.dataframe(
+                                section_display.style.format({'Süre (sn)': '{:.3f}'}),
+                                use_container_width=True
+                            )
+                        
+                        with col_time2:
+                            timings_display = report_timings.copy()
+                            timings_display.index = range(1, len(timings_display) + 1)
+                            st.dataframe(
+                                timings_display.style.format({'Süre (sn)': '{:.3f}'}),
+                                use_container_width=True
+                            )
+                    
                 except Exception as e:
                     st.error(f"❌ Rapor oluşturulurken hata: {str(e)}")
                     st.error(f"Hata detayı: {type(e).__name__}")
+        
+        st.markdown("---")
+        
+        # Toplu rapor üretimi
+        st.subheader("📦 Toplu Rapor Üretimi")
+        st.caption("Her ürün × bölge/manager kombinasyonu için ayrı Excel raporu üretir ve tek zip dosyasında indirir.")
+        
+        col_batch1, col_batch2 = st.columns(2)
+        
+        with col_batch1:
+            batch_group_by = st.radio(
+                "Gruplama",
+                list(BATCH_GROUP_OPTIONS.keys()),
+                format_func=lambda x: BATCH_GROUP_OPTIONS[x],
+                horizontal=True,
+                key='batch_group_by'
+            )
+        
+        with col_batch2:
+            batch_products = st.multiselect("Ürünler", PRODUCTS, default=PRODUCTS, key='batch_products')
+        
+        if st.button("📦 Toplu Rapor Oluştur", use_container_width=True, disabled=not batch_products):
+            try:
+                batch_progress = st.progress(0.0, text="Toplu raporlar hazırlanıyor...")
+                
+                def on_report_done(done, total, file_name, elapsed):
+                    batch_progress.progress(done / total, text=f"✅ {file_name} ({elapsed:.2f} sn) - {done}/{total}")
+                
+                zip_bytes, batch_log = generate_batch_reports(
+                    df_filtered,
+                    products=batch_products,
+                    group_by=batch_group_by,
+                    date_filter=date_filter,
+                    progress_callback=on_report_done
+                )
+                
+                batch_progress.progress(1.0, text=f"✅ {len(batch_log)} rapor hazır ({batch_log.attrs['total_seconds']:.2f} sn)")
+                
+                st.download_button(
+                    label="📥 Toplu Raporları İndir (.zip)",
+                    data=zip_bytes,
+                    file_name=f"toplu_raporlar_{batch_group_by.lower()}_{datetime.now().strftime('%Y%m%d_%H%M')}.zip",
+                    mime="application/zip",
+                    use_container_width=True
+                )
+                
+                batch_display = batch_log.copy()
+                batch_display.index = range(1, len(batch_display) + 1)
+                st.dataframe(
+                    batch_display.style.format({'Boyut (KB)': '{:.1f}', 'Süre (sn)': '{:.3f}'}),
+                    use_container_width=True,
+                    height=400
+                )
+                
+            except Exception as e:
+                st.error(f"❌ Toplu rapor oluşturulurken hata: {str(e)}")
 
 if __name__ == "__main__":
     main()
-
-
-
-
-
-
-
-
-
-
-
-
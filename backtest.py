@@ -0,0 +1,171 @@
+"""🔁 WALK-FORWARD BACKTEST
+
+Tek bir 80/20 ayrımı yerine genişleyen pencere ile çok sayıda kesim
+noktasında model kalitesini ölçer.
+
+- Her kesimde modeller o tarihe kadarki veriyle eğitilir ve sonraki
+  `horizon` ay özyinelemeli olarak tahmin edilir (gerçek değer kullanılmaz)
+- Katlar (kesim noktaları) süreç havuzunda paralel çalışır
+- Ufuk bazlı MAE / RMSE / MAPE model kayıt defterinde saklanır; aynı veri
+  ile tekrar çalıştırma anında döner
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from analytics import (
+    ML_FEATURE_COLS,
+    ML_MODEL_CONFIG_VERSION,
+    build_ml_models,
+    create_advanced_ml_features,
+    recursive_ml_forecast
+)
+from model_registry import get_model_registry, series_fingerprint
+from training_scheduler import get_training_scheduler
+
+logger = logging.getLogger(__name__)
+
+BASELINE_MODELS = ['Son Değer', '6 Aylık Ortalama']
+
+def _run_fold(features, feature_cols, cutoff, horizon):
+    """
+    Tek kesim noktası: eğit, özyinelemeli tahmin et, gerçekle karşılaştır
+    
+    Süreç havuzunda çalıştığı için sadece picklable argüman alır.
+    
+    Returns:
+        list: {'Model', 'Kesim', 'Ufuk (Ay)', 'Gerçek', 'Tahmin'} satırları
+    """
+    train_df = features.iloc[:cutoff]
+    actual = features['PF_Satis'].values[cutoff:cutoff + horizon]
+    history = train_df['PF_Satis'].values
+    last_date = train_df['DATE'].iloc[-1]
+    steps = len(actual)
+    
+    paths = {
+        'Son Değer': np.full(steps, history[-1]),
+        '6 Aylık Ortalama': np.full(steps, history[-6:].mean())
+    }
+    
+    # Süreç içinde tek çekirdek (katlar zaten paralel)
+    for name, model in build_ml_models(n_jobs=1).items():
+        try:
+            model.fit(train_df[feature_cols], train_df['PF_Satis'])
+            paths[name] = recursive_ml_forecast(
+                model, feature_cols, history, last_date, steps
+            )['PF_Satis'].values
+        except Exception as e:
+            logger.warning("%s modeli %d. kesimde eğitilemedi: %s", name, cutoff, e)
+    
+    rows = []
+    for name, path in paths.items():
+        for step in range(steps):
+            rows.append({
+                'Model': name,
+                'Kesim': cutoff,
+                'Ufuk (Ay)': step + 1,
+                'Gerçek': actual[step],
+                'Tahmin': path[step]
+            })
+    return rows
+
+def summarize_backtest(folds):
+    """Kat sonuçlarından ufuk bazlı MAE / RMSE / MAPE tablosu"""
+    folds = folds.assign(
+        _abs_err=(folds['Gerçek'] - folds['Tahmin']).abs(),
+        _sq_err=(folds['Gerçek'] - folds['Tahmin']) ** 2
+    )
+    folds['_pct_err'] = folds['_abs_err'] / np.maximum(folds['Gerçek'], 1) * 100
+    
+    per_horizon = folds.groupby(['Model', 'Ufuk (Ay)']).agg(
+        MAE=('_abs_err', 'mean'),
+        RMSE=('_sq_err', 'mean'),
+        MAPE=('_pct_err', 'mean'),
+        Kat_Sayisi=('Kesim', 'nunique')
+    ).reset_index()
+    per_horizon['RMSE'] = np.sqrt(per_horizon['RMSE'])
+    per_horizon = per_horizon.rename(columns={'Kat_Sayisi': 'Kat Sayısı'})
+    
+    return per_horizon
+
+def walk_forward_backtest(monthly_df, horizon=6, min_train_months=18, step=1, max_folds=12,
+                          max_workers=None, product=None, brick=None, registry=None):
+    """
+    Genişleyen pencereli walk-forward backtest
+    
+    Args:
+        monthly_df: calculate_advanced_time_series çıktısı (DATE, PF_Satis)
+        horizon: Her kesimden sonra tahmin edilecek ay sayısı
+        min_train_months: İlk kesimdeki minimum eğitim uzunluğu
+        step: Kesim noktaları arası ay
+        max_folds: En fazla bu kadar (en güncel) kesim kullanılır
+        max_workers: Süreç havuzu üst sınırı (1 = seri çalıştır); havuz,
+            oturumun eğitim zamanlayıcısından aldığı çekirdek sayısını aşmaz
+    
+    Returns:
+        (summary, per_horizon): model bazlı ortalama ve ufuk bazlı metrikler;
+        yetersiz veride (None, None)
+    """
+    features = create_advanced_ml_features(monthly_df)
+    n_months = len(features)
+    
+    cutoffs = list(range(min_train_months, n_months, step))[-max_folds:]
+    if not cutoffs:
+        return None, None
+    
+    feature_cols = [col for col in ML_FEATURE_COLS if col in features.columns]
+    
+    if registry is None:
+        registry = get_model_registry()
+    
+    registry_key = registry.make_key(
+        series_fingerprint(features, ['DATE', 'PF_Satis']),
+        product,
+        brick,
+        feature_cols + ['backtest', str(horizon), str(min_train_months), str(step),
+                        str(max_folds), ML_MODEL_CONFIG_VERSION]
+    )
+    
+    cached = registry.get(registry_key)
+    if cached is not None:
+        return cached
+    
+    fold_args = [(features, feature_cols, cutoff, horizon) for cutoff in cutoffs]
+    rows = []
+    
+    with get_training_scheduler().slot(max_cpus=max_workers) as plan:
+        if plan.n_jobs == 1:
+            for args in fold_args:
+                rows.extend(_run_fold(*args))
+        else:
+            try:
+                # spawn: Streamlit sunucusunun thread'leri fork ile kopyalanmaz
+                with ProcessPoolExecutor(max_workers=plan.n_jobs,
+                                         mp_context=multiprocessing.get_context('spawn')) as executor:
+                    for fold_rows in executor.map(_run_fold, *zip(*fold_args)):
+                        rows.extend(fold_rows)
+            except (BrokenProcessPool, OSError) as e:
+                # Süreç açılamayan ortamlarda seri çalış
+                logger.warning("Backtest süreç havuzu kullanılamadı, seri çalışılıyor: %s", e)
+                rows = []
+                for args in fold_args:
+                    rows.extend(_run_fold(*args))
+    
+    per_horizon = summarize_backtest(pd.DataFrame(rows))
+    
+    summary = per_horizon.groupby('Model').agg(
+        MAE=('MAE', 'mean'),
+        RMSE=('RMSE', 'mean'),
+        MAPE=('MAPE', 'mean'),
+        Kat_Sayisi=('Kat Sayısı', 'max')
+    ).reset_index().rename(columns={'Kat_Sayisi': 'Kat Sayısı'})
+    summary['Tip'] = np.where(summary['Model'].isin(BASELINE_MODELS), 'Basit Tahmin', 'ML')
+    summary = summary.sort_values('MAPE').reset_index(drop=True)
+    
+    registry.put(registry_key, (summary, per_horizon))
+    
+    return summary, per_horizon
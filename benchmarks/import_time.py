@@ -0,0 +1,77 @@
+"""⏱️ IMPORT SÜRESİ BENCHMARK'I
+
+Soğuk başlangıçta (yeni Python süreci) modül import sürelerini ölçer ve
+ertelenmiş (lazy) import'ların kazancını, ağır kütüphanelerin eskisi gibi
+modül seviyesinde yüklendiği senaryoyla karşılaştırır.
+
+Kullanım:
+    python benchmarks/import_time.py --repeat 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Önceden app.py / analytics.py başında import edilen ağır kütüphaneler
+EAGER_ML_IMPORTS = [
+    "sklearn.linear_model",
+    "sklearn.ensemble",
+    "sklearn.metrics",
+    "statsmodels.tsa.seasonal",
+    "statsmodels.tsa.stattools",
+    "scipy.stats",
+]
+EAGER_UI_IMPORTS = EAGER_ML_IMPORTS + [
+    "plotly.express",
+    "geopandas",
+    "shapely.geometry",
+]
+
+SCENARIOS = [
+    ("analytics (lazy)", ["analytics"]),
+    ("analytics + eski eager import'lar", ["analytics"] + EAGER_ML_IMPORTS),
+    ("app (lazy)", ["app"]),
+    ("app + eski eager import'lar", ["app"] + EAGER_UI_IMPORTS),
+]
+
+
+def time_imports(modules):
+    """Yeni bir süreçte verilen modüllerin toplam import süresini ölç (sn)"""
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        + "".join(f"import {module}\n" for module in modules)
+        + "print(time.perf_counter() - start)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soğuk başlangıç import süresi benchmark'ı")
+    parser.add_argument("--repeat", type=int, default=5, help="Her senaryo için tekrar sayısı")
+    args = parser.parse_args(argv)
+
+    print(f"{'Senaryo':<40}{'Medyan (sn)':>14}{'Min (sn)':>12}")
+    medians = {}
+    for name, modules in SCENARIOS:
+        timings = [time_imports(modules) for _ in range(args.repeat)]
+        medians[name] = statistics.median(timings)
+        print(f"{name:<40}{medians[name]:>14.3f}{min(timings):>12.3f}")
+
+    for lazy, eager in [(SCENARIOS[0][0], SCENARIOS[1][0]), (SCENARIOS[2][0], SCENARIOS[3][0])]:
+        saved = medians[eager] - medians[lazy]
+        print(f"{lazy}: {saved:.3f} sn kazanç (%{saved / medians[eager] * 100:.0f})")
+
+
+if __name__ == "__main__":
+    main()
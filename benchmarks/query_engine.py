@@ -0,0 +1,138 @@
+"""🦆 SORGU MOTORU BENCHMARK'I
+
+Sentetik satış verisi üzerinde kenar çubuğu toplamalarını (şehir, brick,
+bölge, bölge içi, rakip, aylık) pandas ve DuckDB yollarıyla çalıştırır;
+süreleri karşılaştırır ve iki yolun sonuçlarının aynı olduğunu doğrular.
+
+duckdb kurulu olmalıdır (pip install duckdb).
+
+Kullanım:
+    python benchmarks/query_engine.py --sizes 100000 1000000 10000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from analytics import (  # noqa: E402
+    PRODUCTS,
+    build_monthly_aggregate,
+    calculate_advanced_time_series,
+    calculate_brick_performance,
+    calculate_city_performance,
+    calculate_competitor_analysis,
+    calculate_intra_region_performance,
+    calculate_region_comparative_analysis,
+    get_product_columns
+)
+from query_engine import SalesQueryEngine  # noqa: E402
+
+REGIONS = ['MARMARA', 'EGE', 'AKDENİZ', 'İÇ ANADOLU', 'KARADENİZ', 'DOĞU ANADOLU', 'GÜNEYDOĞU ANADOLU']
+
+
+def make_sales_data(n_rows, n_bricks=800, n_months=36, seed=0):
+    """Normalize edilmiş (load_sales_data çıktısı biçiminde) sentetik satış verisi"""
+    rng = np.random.default_rng(seed)
+
+    brick_ids = rng.integers(0, n_bricks, n_rows)
+    city_ids = brick_ids % 81
+    dates = pd.date_range('2023-01-01', periods=n_months, freq='MS')
+    month_ids = rng.integers(0, n_months, n_rows)
+
+    cities = np.array([f'ŞEHİR {i:02d}' for i in range(81)], dtype=object)
+    df = pd.DataFrame({
+        'DATE': dates[month_ids],
+        'TERRITORIES': np.array([f'BRICK {i:04d}' for i in range(n_bricks)], dtype=object)[brick_ids],
+        'CITY': cities[city_ids],
+        'CITY_NORMALIZED': cities[city_ids],
+        'REGION': np.array(REGIONS, dtype=object)[city_ids % len(REGIONS)],
+        'MANAGER': np.array([f'MANAGER {i:02d}' for i in range(40)], dtype=object)[brick_ids % 40]
+    })
+    df['YIL_AY'] = df['DATE'].dt.strftime('%Y-%m')
+
+    for product in PRODUCTS:
+        cols = get_product_columns(product)
+        df[cols['pf']] = rng.gamma(2.0, 50.0, n_rows)
+        df[cols['rakip']] = rng.gamma(2.0, 80.0, n_rows)
+
+    return df
+
+
+def aggregations(df, product, date_filter):
+    """(ad, engine -> sonuç) çiftleri; engine None ise pandas yolu"""
+    region = REGIONS[0]
+    return [
+        ('Şehir', lambda engine: calculate_city_performance(df, product, date_filter, engine=engine)),
+        ('Brick', lambda engine: calculate_brick_performance(df, product, date_filter, engine=engine)),
+        ('Bölge Karşılaştırma', lambda engine: calculate_region_comparative_analysis(
+            df, product, date_filter, engine=engine)),
+        ('Bölge İçi', lambda engine: calculate_intra_region_performance(
+            df, product, region, date_filter, engine=engine)),
+        ('Rakip', lambda engine: calculate_competitor_analysis(df, product, date_filter, engine=engine)),
+        ('Zaman Serisi', lambda engine: calculate_advanced_time_series(
+            df, product, None, date_filter, engine=engine)),
+        ('Aylık Brick', lambda engine: build_monthly_aggregate(df, product, date_filter, engine=engine)),
+        # Kenar çubuğu bölge filtresi: pandas tarafında filtreli kopya
+        ('Şehir (bölge filtreli)', lambda engine: calculate_city_performance(
+            df[df['REGION'] == region] if engine is None else df, product, date_filter,
+            engine=engine.filtered(REGION=region) if engine is not None else None)),
+    ]
+
+
+def assert_same(expected, actual, name):
+    if isinstance(expected, tuple):
+        for part, (left, right) in enumerate(zip(expected, actual)):
+            assert_same(left, right, f"{name}[{part}]")
+        return
+    pd.testing.assert_frame_equal(expected, actual, check_exact=False, rtol=1e-9, obj=name)
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="pandas / DuckDB toplama benchmark'ı")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000],
+                        help="Satır sayıları")
+    parser.add_argument("--repeat", type=int, default=3, help="Her ölçüm için tekrar (en iyisi alınır)")
+    parser.add_argument("--product", default=PRODUCTS[0], choices=PRODUCTS)
+    parser.add_argument("--threads", type=int, default=None, help="DuckDB thread sayısı")
+    args = parser.parse_args(argv)
+
+    for n_rows in args.sizes:
+        df = make_sales_data(n_rows)
+        date_filter = (df['DATE'].max() - pd.DateOffset(months=12), df['DATE'].max())
+
+        engine, load_seconds = timed(lambda: SalesQueryEngine(df, threads=args.threads), 1)
+
+        print(f"\n{n_rows:,} satır (DuckDB tablo yükleme: {load_seconds:.3f} sn)")
+        print(f"{'Toplama':<26}{'pandas (sn)':>14}{'DuckDB (sn)':>14}{'Hızlanma':>10}")
+
+        total_pandas = total_duckdb = 0.0
+        for name, run in aggregations(df, args.product, date_filter):
+            expected, pandas_seconds = timed(lambda: run(None), args.repeat)
+            actual, duckdb_seconds = timed(lambda: run(engine), args.repeat)
+            assert_same(expected, actual, name)
+
+            total_pandas += pandas_seconds
+            total_duckdb += duckdb_seconds
+            print(f"{name:<26}{pandas_seconds:>14.4f}{duckdb_seconds:>14.4f}{pandas_seconds / duckdb_seconds:>9.1f}x")
+
+        print(f"{'Toplam':<26}{total_pandas:>14.4f}{total_duckdb:>14.4f}{total_pandas / total_duckdb:>9.1f}x")
+        print("Sonuçlar pandas ile aynı ✓")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""🖥️ TİCARİ PORTFÖY ANALİZİ - KOMUT SATIRI
+
+Streamlit başlatmadan analizleri hesaplayıp dışa aktarır (cron / zamanlanmış işler için).
+
+Örnekler:
+    python cli.py analyze veri.xlsx --product CORTIPOL --start 2024-01-01 --end 2024-12-31 --output rapor.xlsx
+    python cli.py analyze veri.parquet --region MARMARA --csv-dir ./cikti
+    python cli.py batch veri.xlsx --group-by MANAGER --output toplu_raporlar.zip
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import pandas as pd
+
+from analytics import (
+    PRODUCTS,
+    load_sales_data,
+    calculate_city_performance,
+    calculate_investment_strategy,
+    analyze_city_brick_strategic_alignment
+)
+from reporting import (
+    BATCH_GROUP_OPTIONS,
+    assemble_report_sections,
+    write_excel_report,
+    generate_batch_reports
+)
+
+warnings.filterwarnings("ignore")
+
+
+def parse_date_filter(start, end):
+    """--start/--end parametrelerinden tarih filtresi oluştur"""
+    if not start and not end:
+        return None
+    return (
+        pd.to_datetime(start) if start else pd.Timestamp.min,
+        pd.to_datetime(end) if end else pd.Timestamp.max
+    )
+
+
+def apply_filters(df, brick=None, region=None, manager=None):
+    """Arayüzdeki Brick / Bölge / Manager filtrelerinin karşılığı"""
+    if brick:
+        df = df[df['TERRITORIES'] == brick.upper().strip()]
+    if region:
+        df = df[df['REGION'] == region.upper().strip()]
+    if manager:
+        df = df[df['MANAGER'] == manager.upper().strip()]
+    return df
+
+
+def run_analyze(args):
+    """Tek ürün için tüm analizleri hesapla ve Excel / CSV olarak yaz"""
+    start = time.perf_counter()
+    df = load_sales_data(args.input)
+    print(f"{len(df):,} satır yüklendi ({time.perf_counter() - start:.2f} sn)")
+
+    df = apply_filters(df, args.brick, args.region, args.manager)
+    if df.empty:
+        print("Seçilen filtrelerde veri bulunamadı", file=sys.stderr)
+        return 1
+
+    date_filter = parse_date_filter(args.start, args.end)
+
+    def log_section(done, total, name, elapsed):
+        print(f"[{done}/{total}] {name}: {elapsed:.2f} sn")
+
+    sections, _ = assemble_report_sections(
+        df, args.product, date_filter, args.forecast_periods,
+        progress_callback=log_section,
+        max_workers=args.workers
+    )
+
+    sections['Yatırım Stratejisi'] = calculate_investment_strategy(
+        calculate_city_performance(df, args.product, date_filter)
+    )
+    sections['Şehir-Brick Stratejik Uyum'] = analyze_city_brick_strategic_alignment(df, args.product, date_filter)
+
+    if args.csv_dir:
+        os.makedirs(args.csv_dir, exist_ok=True)
+        for sheet_name, data in sections.items():
+            if data is None or data.empty:
+                continue
+            data.to_csv(os.path.join(args.csv_dir, f"{sheet_name}.csv"), index=False)
+        print(f"CSV dosyaları -> {args.csv_dir}")
+
+    if args.output:
+        report_bytes, report_timings = write_excel_report(sections)
+        with open(args.output, 'wb') as f:
+            f.write(report_bytes)
+        print(f"Excel raporu -> {args.output} (yazma {report_timings['Süre (sn)'].sum():.2f} sn)")
+
+    print(f"Toplam süre: {time.perf_counter() - start:.2f} sn")
+    return 0
+
+
+def run_batch(args):
+    """Her ürün × bölge/manager kombinasyonu için rapor üret ve zip'le"""
+    df = load_sales_data(args.input)
+    df = apply_filters(df, args.brick, args.region, args.manager)
+
+    def log_report(done, total, file_name, elapsed):
+        print(f"[{done}/{total}] {file_name}: {elapsed:.2f} sn")
+
+    zip_bytes, batch_log = generate_batch_reports(
+        df,
+        products=args.products,
+        group_by=args.group_by,
+        date_filter=parse_date_filter(args.start, args.end),
+        forecast_periods=args.forecast_periods,
+        max_workers=args.workers,
+        progress_callback=log_report
+    )
+
+    with open(args.output, 'wb') as f:
+        f.write(zip_bytes)
+
+    print(f"{len(batch_log)} rapor -> {args.output} (toplam {batch_log.attrs['total_seconds']:.2f} sn)")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Ticari Portföy Analizi - komut satırı")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_common(sub):
+        sub.add_argument('input', help="Girdi dosyası (.xlsx, .xls, .csv, .parquet)")
+        sub.add_argument('--start', help="Başlangıç tarihi (YYYY-MM-DD)")
+        sub.add_argument('--end', help="Bitiş tarihi (YYYY-MM-DD)")
+        sub.add_argument('--brick', help="Sadece bu Brick")
+        sub.add_argument('--region', help="Sadece bu bölge")
+        sub.add_argument('--manager', help="Sadece bu manager")
+        sub.add_argument('--forecast-periods', type=int, default=6, help="ML tahmin periyodu (ay)")
+        sub.add_argument('--workers', type=int, default=None, help="Paralel çalışan sayısı")
+
+    analyze = subparsers.add_parser('analyze', help="Tek ürün için analizleri hesapla ve dışa aktar")
+    add_common(analyze)
+    analyze.add_argument('--product', default=PRODUCTS[0], choices=PRODUCTS)
+    analyze.add_argument('--output', default='ticari_portfoy_analizi.xlsx', help="Excel rapor dosyası")
+    analyze.add_argument('--csv-dir', help="Her sayfayı ayrı CSV olarak bu klasöre yaz")
+    analyze.set_defaults(func=run_analyze)
+
+    batch = subparsers.add_parser('batch', help="Ürün × Bölge/Manager toplu Excel rapor üretimi")
+    add_common(batch)
+    batch.add_argument('--output', default='toplu_raporlar.zip', help="Çıktı zip dosyası")
+    batch.add_argument('--group-by', default='REGION', choices=list(BATCH_GROUP_OPTIONS), help="Rapor gruplama kolonu")
+    batch.add_argument('--products', nargs='+', choices=PRODUCTS, default=PRODUCTS, help="Rapor üretilecek ürünler")
+    batch.set_defaults(func=run_batch)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,377 @@
+"""📅 TARİH ÖN AYARLARI VE ARKA PLAN ISINMASI
+
+Kenar çubuğundaki dönemler verideki YIL_AY değerlerinden türetilir: tüm veri,
+kayan dönemler (son 3 / 6 / 12 ay), veride bulunan yıllar, çeyrekler ve
+(yapılandırılmışsa) mali yıllar. Her dönem tarih sıralı indekste bir satır
+aralığına karşılık gelir; boş veya geçersiz aralıklar hiçbir hesaplama
+yapılmadan ayıklanır.
+
+Dönemlerin satış küpü (bkz. sales_rollup) veri yüklenir yüklenmez arka plan
+thread'lerinde hesaplanır; dönem değiştirmek hazır küpü okumaktır.
+
+Önbellek bağımlılık farkındadır: istenen filtre durumunu kapsayan (daha geniş
+filtreli ve / veya daha uzun dönemli) bir küp önbellekteyse yeni küp onun
+taneciğinden seçilerek türetilir; tam aylık dönem toplamları yükleme başına
+bir kez kurulan aylık önek toplamlarının farkıdır (bkz. prefix_sums). Ham
+veri sadece kapsayan küp yoksa taranır.
+
+Yapılandırma (ortam değişkenleri):
+    PORTFOY_FISCAL_YEAR_START_MONTH  Mali yılın başladığı ay (1-12, varsayılan: 1;
+                                     1 ise mali yıl takvim yılıdır, ayrıca listelenmez)
+
+- Süreç içi LRU önbellek: anahtar veri kimliği + kenar çubuğu filtreleri +
+  tarih aralığı; "Özel Aralık" küpleri de aynı önbelleğe yazılır
+- Isınma sürerken istenen dönem yeniden hesaplanmaz, o iş beklenir
+- preset_status() hangi dönemlerin hazır olduğunu döndürür (kenar çubuğu göstergesi)
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from filter_index import active_filters
+from prefix_sums import MonthlyPrefixSums
+from sales_rollup import build_sales_rollup
+
+logger = logging.getLogger(__name__)
+
+ALL_PERIODS_LABEL = "Tüm Veriler"
+CUSTOM_PERIOD_LABEL = "Özel Aralık"
+
+# Kayan dönemler: (etiket, son kaç takvim ayı)
+ROLLING_PERIODS = [("Son 3 Ay", 3), ("Son 6 Ay", 6), ("Son 1 Yıl", 12)]
+
+FISCAL_YEAR_START_MONTH = int(os.environ.get('PORTFOY_FISCAL_YEAR_START_MONTH', 1))
+
+# Arka planda ısıtılan dönem türleri (çeyrekler seçildiğinde hesaplanır)
+WARM_PERIOD_KINDS = ('all', 'rolling', 'year', 'fiscal')
+
+# Süreç içi önbellekte tutulacak küp sayısı (veri × filtre × dönem)
+ROLLUP_CACHE_SIZE = 64
+
+# Süreç içi önbellekte tutulacak dönem indeksi sayısı (yüklenen veri başına bir)
+PERIOD_INDEX_CACHE_SIZE = 8
+
+PRESET_WARMUP_WORKERS = 2
+
+STATUS_READY = 'Hazır'
+STATUS_RUNNING = 'Hesaplanıyor'
+STATUS_PENDING = 'Bekliyor'
+
+_rollups = OrderedDict()
+_period_indexes = OrderedDict()
+_pending = {}
+# RLock: iş gönderilirken bitmişse tamamlama geri çağrısı aynı thread'de çalışır
+_lock = threading.RLock()
+_executor = None
+
+class Period(namedtuple('Period', ['label', 'kind', 'date_filter', 'start', 'stop'])):
+    """Dönem: tarih filtresi ve tarih sıralı indeksteki [start, stop) satır aralığı"""
+    
+    __slots__ = ()
+    
+    @property
+    def rows(self):
+        return max(self.stop - self.start, 0)
+    
+    @property
+    def empty(self):
+        """Boş veya geçersiz (başlangıç > bitiş) aralık"""
+        return self.rows == 0
+
+class PeriodIndex:
+    """
+    Verideki aylardan türetilen dönemler
+    
+    Tarihler bir kez sıralanır; her ayın satır aralığı ikili aramayla bulunur,
+    dönemler ay aralıklarının birleşimidir. Sadece veri içeren dönemler listelenir.
+    Aynı ay ekseninde aylık önek toplamları (prefix_sums) tutulur.
+    """
+    
+    def __init__(self, df, fiscal_start_month=None):
+        fiscal_start_month = fiscal_start_month or FISCAL_YEAR_START_MONTH
+        if not 1 <= fiscal_start_month <= 12:
+            raise ValueError(f"Geçersiz mali yıl başlangıç ayı: {fiscal_start_month}")
+        
+        self.dates = np.sort(df['DATE'].dropna().values)
+        
+        self.month_labels = np.sort(df['YIL_AY'].dropna().unique())
+        months = pd.DatetimeIndex(pd.to_datetime(self.month_labels, format='%Y-%m'))
+        self.months = months
+        # Ay i'nin satırları: [bounds[i], bounds[i + 1])
+        self._bounds = np.append(np.searchsorted(self.dates, months.values, side='left'), len(self.dates))
+        
+        self.periods = OrderedDict()
+        self.prefix_sums = None
+        if len(months) == 0:
+            return
+        
+        self.prefix_sums = MonthlyPrefixSums(df, self.month_labels)
+        
+        self._add(ALL_PERIODS_LABEL, 'all', None, 0, len(self.dates))
+        
+        last_month = months[-1]
+        for label, n_months in ROLLING_PERIODS:
+            first = months.searchsorted(last_month - pd.DateOffset(months=n_months - 1))
+            if first > 0:  # tüm veriyi kapsayan kayan dönem listelenmez
+                self._add_months(label, 'rolling', first, len(months) - 1)
+        
+        for year, first, last in self._groups(months.year)[::-1]:
+            self._add_months(str(year), 'year', first, last)
+        
+        if fiscal_start_month != 1:
+            fiscal_years = months.year - (months.month < fiscal_start_month)
+            for year, first, last in self._groups(fiscal_years)[::-1]:
+                self._add_months(f"MY {year}/{(year + 1) % 100:02d}", 'fiscal', first, last)
+        
+        quarters = months.year * 10 + months.quarter
+        for quarter, first, last in self._groups(quarters)[::-1]:
+            self._add_months(f"{quarter // 10} Ç{quarter % 10}", 'quarter', first, last)
+    
+    @staticmethod
+    def _groups(keys):
+        """Sıralı anahtar dizisindeki ardışık gruplar: [(anahtar, ilk, son), ...]"""
+        keys = np.asarray(keys)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(keys)] - 1
+        return [(keys[first], first, last) for first, last in zip(starts, ends)]
+    
+    def _add(self, label, kind, date_filter, start, stop):
+        if stop > start:
+            self.periods[label] = Period(label, kind, date_filter, int(start), int(stop))
+    
+    def _add_months(self, label, kind, first, last):
+        """first..last (dahil) aylarını kapsayan dönem; filtre verideki ilk ve son tarih"""
+        start, stop = self._bounds[first], self._bounds[last + 1]
+        if stop > start:
+            date_filter = (pd.Timestamp(self.dates[start]), pd.Timestamp(self.dates[stop - 1]))
+            self._add(label, kind, date_filter, start, stop)
+    
+    def labels(self):
+        return list(self.periods)
+    
+    def get(self, label):
+        try:
+            return self.periods[label]
+        except KeyError:
+            raise ValueError(f"Veride bulunmayan dönem: {label}") from None
+    
+    def custom(self, start_date, end_date):
+        """Özel aralık (bitiş günü dahil); başlangıç > bitiş ise boş dönem"""
+        start_date, end_date = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        start = np.searchsorted(self.dates, start_date.to_datetime64(), side='left')
+        stop = np.searchsorted(self.dates, end_date.to_datetime64(), side='right')
+        return Period(CUSTOM_PERIOD_LABEL, 'custom', (start_date, end_date), int(start), int(stop))
+    
+    def month_span(self, date_filter):
+        """
+        Tarih aralığı verideki tam aylardan oluşuyorsa (ilk ay, son ay + 1)
+        indeksleri; ay ortasında başlayan / biten veya boş aralıkta None
+        """
+        if not date_filter or self.prefix_sums is None:
+            return None
+        
+        period = self.custom(*date_filter)
+        if period.empty:
+            return None
+        
+        first = int(np.searchsorted(self._bounds, period.start, side='left'))
+        stop = int(np.searchsorted(self._bounds, period.stop, side='left'))
+        if self._bounds[first] != period.start or self._bounds[stop] != period.stop:
+            return None
+        return first, stop
+    
+    def warm_periods(self):
+        """Arka planda ısıtılan dönemler"""
+        return [period for period in self.periods.values() if period.kind in WARM_PERIOD_KINDS]
+
+def get_period_index(data_key, df):
+    """Yüklenen veri için dönem indeksi (veri başına bir kez kurulur)"""
+    with _lock:
+        period_index = _period_indexes.get(data_key)
+        if period_index is not None:
+            _period_indexes.move_to_end(data_key)
+            return period_index
+    
+    period_index = PeriodIndex(df)
+    with _lock:
+        _period_indexes[data_key] = period_index
+        while len(_period_indexes) > PERIOD_INDEX_CACHE_SIZE:
+            _period_indexes.popitem(last=False)
+    return period_index
+
+def _rollup_key(data_key, filters, date_filter):
+    if date_filter:
+        date_filter = (pd.Timestamp(date_filter[0]), pd.Timestamp(date_filter[1]))
+    return data_key, tuple(filters), date_filter
+
+def _store(key, rollup):
+    with _lock:
+        _rollups[key] = rollup
+        _rollups.move_to_end(key)
+        while len(_rollups) > ROLLUP_CACHE_SIZE:
+            _rollups.popitem(last=False)
+
+def _finish(key, future):
+    """Isınma işi bitti: başarılıysa önbelleğe yaz"""
+    if future.exception() is not None:
+        logger.warning("Tarih ön ayarı ısınması başarısız (%s): %s", key[2], future.exception())
+    else:
+        _store(key, future.result())
+    with _lock:
+        _pending.pop(key, None)
+
+def _filter_sets(filters):
+    """Kolon -> seçili değer kümesi (filtresiz kolonlar yer almaz)"""
+    sets = {}
+    for col, value in active_filters(filters):
+        values = set(value) if isinstance(value, tuple) else {value}
+        sets[col] = sets[col] & values if col in sets else values
+    return sets
+
+def _covers(parent_filters, parent_date, child_filters, child_date, period_index):
+    """Üst filtre durumunun küpü alt durumun tüm satırlarını içeriyor mu"""
+    parent_sets = _filter_sets(parent_filters)
+    child_sets = _filter_sets(child_filters)
+    if not all(col in child_sets and child_sets[col] <= values for col, values in parent_sets.items()):
+        return False
+    
+    if parent_date == child_date:
+        return True
+    
+    # Farklı dönem: alt dönem tam aylardan oluşmalı ve üst dönemin aylarında kalmalı
+    child_span = period_index.month_span(child_date) if period_index is not None else None
+    if child_span is None:
+        return False
+    if parent_date is None:
+        return True
+    parent_span = period_index.month_span(parent_date)
+    return parent_span is not None and parent_span[0] <= child_span[0] and child_span[1] <= parent_span[1]
+
+def _find_parent_rollup(data_key, filters, date_filter, period_index):
+    """Alt filtre durumunu kapsayan önbellekteki en küçük küp (yoksa None)"""
+    _, filters, date_filter = _rollup_key(data_key, filters, date_filter)
+    with _lock:
+        candidates = [(key, rollup) for key, rollup in _rollups.items() if key[0] == data_key]
+    
+    parent = None
+    for (_, parent_filters, parent_date), rollup in candidates:
+        if not _covers(parent_filters, parent_date, filters, date_filter, period_index):
+            continue
+        if parent is None or len(rollup.grain) < len(parent.grain):
+            parent = rollup
+    return parent
+
+def _derive_rollup(parent, filters, date_filter, period_index):
+    """Üst küpten seçim: filtre kolonları ve (tam aylık dönemde) ay kolonu süzülür"""
+    span = period_index.month_span(date_filter) if period_index is not None else None
+    if span is None:
+        return parent.subset(filters, date_filter=date_filter)
+    
+    first, stop = span
+    return parent.subset(
+        filters, period_index.month_labels[first:stop], date_filter,
+        prefix=period_index.prefix_sums.month_range(first, stop, filters)
+    )
+
+def _build_rollup(data_key, df, date_filter, engine, filters, period_index):
+    """
+    Kapsayan küp önbellekteyse ondan türet; tam aylık dönemde aynı filtrelerin
+    tüm veri küpünden süz; ikisi de yoksa ham veriden kur
+    """
+    parent = _find_parent_rollup(data_key, filters, date_filter, period_index)
+    if parent is not None:
+        return _derive_rollup(parent, filters, date_filter, period_index)
+    
+    if period_index is None or period_index.month_span(date_filter) is None:
+        return build_sales_rollup(df, date_filter, engine=engine)
+    
+    # Tüm veri küpü önbellekte, ısınıyor (kuyrukta önce gönderilir) veya şimdi kurulur
+    base = get_sales_rollup(data_key, df, None, engine=engine, filters=filters, period_index=period_index)
+    return _derive_rollup(base, filters, date_filter, period_index)
+
+def get_sales_rollup(data_key, df, date_filter=None, engine=None, filters=(), period_index=None):
+    """
+    Filtre durumu için satış küpü: önbellekten, ısınma sürüyorsa o işten,
+    yoksa şimdi hesaplanır
+    
+    Args:
+        data_key: Yüklenen verinin kimliği (ör. dosya içeriği özeti)
+        df: Kenar çubuğu filtreleri uygulanmış veri
+        engine: Aynı filtrelerle query_engine görünümü
+        filters: Kenar çubuğu filtreleri ((kolon, değer), ...) - önbellek anahtarı
+        period_index: Verinin dönem indeksi; verilirse tam aylık aralıklar ham
+            veri taranmadan tüm veri küpünden kurulur
+    """
+    key = _rollup_key(data_key, filters, date_filter)
+    
+    with _lock:
+        rollup = _rollups.get(key)
+        if rollup is not None:
+            _rollups.move_to_end(key)
+            return rollup
+        future = _pending.get(key)
+    
+    if future is not None:
+        try:
+            return future.result()
+        except Exception:
+            pass  # aşağıda yeniden denenir
+    
+    rollup = _build_rollup(data_key, df, date_filter, engine, filters, period_index)
+    _store(key, rollup)
+    return rollup
+
+def warm_date_presets(data_key, df, period_index, engine=None, filters=()):
+    """
+    Henüz hesaplanmamış dönemleri arka planda hesaplamaya gönder
+    
+    Aynı filtre durumu için tekrar çağrılması yeni iş başlatmaz.
+    """
+    global _executor
+    
+    with _lock:
+        for period in period_index.warm_periods():
+            date_filter = period.date_filter
+            key = _rollup_key(data_key, filters, date_filter)
+            if key in _rollups or key in _pending:
+                continue
+            
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=PRESET_WARMUP_WORKERS,
+                                               thread_name_prefix='tarih-isinma')
+            # "Tüm Veriler" ilk gönderilir; diğer dönemler onun küpünden süzülür
+            future = _executor.submit(_build_rollup, data_key, df, date_filter, engine, filters, period_index)
+            _pending[key] = future
+            future.add_done_callback(lambda done, key=key: _finish(key, done))
+
+def preset_status(data_key, period_index, filters=()):
+    """
+    Dönem bazında küp durumu (başarısız veya önbellekten düşmüş dönemler
+    'Bekliyor' görünür; sonraki warm_date_presets çağrısı yeniden gönderir)
+    
+    Returns:
+        dict: dönem -> 'Hazır' | 'Hesaplanıyor' | 'Bekliyor'
+    """
+    status = {}
+    with _lock:
+        for period in period_index.warm_periods():
+            key = _rollup_key(data_key, filters, period.date_filter)
+            future = _pending.get(key)
+            if key in _rollups:
+                status[period.label] = STATUS_READY
+            elif future is not None and future.running():
+                status[period.label] = STATUS_RUNNING
+            else:
+                status[period.label] = STATUS_PENDING
+    return status
+
+def clear_sales_rollups():
+    """Süreç içi küp ve dönem indeksi önbelleklerini boşalt (bekleyen ısınma işleri sürer)"""
+    with _lock:
+        _rollups.clear()
+        _period_indexes.clear()
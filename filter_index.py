@@ -0,0 +1,107 @@
+"""🔎 KENAR ÇUBUĞU FİLTRE İNDEKSİ
+
+Yüklenen veri için bir kez kurulur: Brick, Bölge, Manager ve Şehir
+kolonlarının her değeri için sıralı satır numarası dizisi tutulur (CSR
+düzeni: değer kodlarına göre kararlı sıralanmış satırlar + değer başına
+başlangıç ofseti). Çoklu seçim filtreleri veri taranmadan çözülür:
+
+- Kolon içinde seçilen değerler: satır dizilerinin birleşimi (VEYA)
+- Kolonlar arası: sıralı dizilerin kesişimi (VE)
+
+Filtreler ((kolon, (değer, ...)), ...) biçimindedir; boş seçim o kolonda
+filtre yok demektir. Aynı biçim query_engine / sales_rollup / prefix_sums
+görünümlerinde IN koşulu olarak uygulanır.
+"""
+import numpy as np
+import pandas as pd
+
+FILTER_COLUMNS = ['TERRITORIES', 'REGION', 'MANAGER', 'CITY_NORMALIZED']
+
+def active_filters(filters):
+    """
+    Uygulanacak filtreler: None, "TÜMÜ" ve boş seçimler atılır; çoklu seçim
+    demet (tuple), tek elemanlı seçim eşitlik olarak döner
+    """
+    active = []
+    for col, value in filters:
+        if isinstance(value, (list, tuple)):
+            value = tuple(value)
+            if len(value) == 1:
+                value = value[0]
+            elif not value:
+                continue
+        if value is None or value == "TÜMÜ":
+            continue
+        active.append((col, value))
+    return tuple(active)
+
+def _intersect_sorted(small, large):
+    """İki artan satır dizisinin kesişimi (küçük dizinin her elemanı ikili aramayla)"""
+    positions = np.searchsorted(large, small)
+    found = positions < len(large)
+    found[found] = large[positions[found]] == small[found]
+    return small[found]
+
+class FilterIndex:
+    """Kolon değeri -> sıralı satır numaraları"""
+    
+    def __init__(self, df, columns=None):
+        self.n_rows = len(df)
+        self._values = {}
+        self._codes = {}
+        self._rows = {}
+        self._offsets = {}
+        
+        for col in columns or FILTER_COLUMNS:
+            # Eksik değerler -1 kodunu alır, hiçbir seçimle eşleşmez
+            codes, values = pd.factorize(df[col], sort=True)
+            order = np.argsort(codes, kind='stable')
+            self._values[col] = list(values)
+            self._codes[col] = {value: code for code, value in enumerate(values)}
+            self._rows[col] = order
+            self._offsets[col] = np.searchsorted(codes[order], np.arange(len(values) + 1))
+    
+    def values(self, col):
+        """Kolonun sıralı farklı değerleri (seçim listesi)"""
+        return self._values[col]
+    
+    def value_rows(self, col, value):
+        """Değerin satır numaraları (artan sırada); veride yoksa boş dizi"""
+        code = self._codes[col].get(value)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        return self._rows[col][self._offsets[col][code]:self._offsets[col][code + 1]]
+    
+    def rows(self, col, values):
+        """Seçilen değerlerden herhangi birine uyan satırlar (VEYA)"""
+        parts = [self.value_rows(col, value) for value in values]
+        if len(parts) == 1:
+            return parts[0]
+        # Değerlerin satırları ayrık: birleştirip sıralamak yeterli
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+    
+    def select(self, filters):
+        """
+        Filtrelere uyan satır numaraları (artan sırada); filtre yoksa None
+        
+        Args:
+            filters: ((kolon, (değer, ...) | değer), ...); boş seçimli kolonlar yok sayılır
+        """
+        selected = None
+        parts = [
+            self.rows(col, values if isinstance(values, tuple) else (values,))
+            for col, values in active_filters(filters)
+        ]
+        # Küçük diziden başlamak kesişimleri ucuzlatır
+        for rows in sorted(parts, key=len):
+            selected = rows if selected is None else _intersect_sorted(selected, rows)
+            if len(selected) == 0:
+                break
+        return selected
+    
+    def filter_frame(self, df, filters):
+        """Filtrelenmiş veri (satır sırası korunur); filtre yoksa kopya"""
+        rows = self.select(filters)
+        if rows is None:
+            return df.copy()
+        return df.take(rows)
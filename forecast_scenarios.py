@@ -0,0 +1,287 @@
+"""🔮 TAHMİN SENARYO ÖNBELLEĞİ
+
+Bir seri için tüm tahminler (ML, basit yöntemler, istatistiksel modeller)
+tek seferde en uzun ufuk için, güven aralıklarıyla birlikte hesaplanır.
+Daha kısa ufuklar bu sonucun ilk ayları alınarak üretilir; tahmin
+periyodu değiştiğinde yeniden eğitim veya tahmin yapılmaz.
+
+Özyinelemeli ML tahmini, basit yöntemler ve durum-uzayı modelleri ufuktan
+bağımsız yol ürettiği için kısa ufuk dilimi, doğrudan o ufukla hesaplanan
+tahminle aynıdır.
+
+- Süreç içi LRU önbellek: arayüz (zaman serisi sekmesi) ve rapor hattı
+  aynı seri için aynı sonucu paylaşır
+- Model kayıt defteri: süreç yeniden başlasa da senaryolar diskten döner
+- Arka plan eğitimi: arayüz senaryoyu arka plan thread'ine gönderir, eğitim
+  sürerken basit tahminleri ve model bazlı ilerlemeyi gösterir
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from analytics import ML_MODEL_CONFIG_VERSION, train_advanced_ml_models
+from model_registry import get_model_registry, series_fingerprint
+from statistical_models import (
+    DEFAULT_SERIES_TIMEOUT,
+    STAT_MODELS,
+    SeriesTimeout,
+    call_with_timeout,
+    fit_statistical_models,
+)
+from training_scheduler import get_training_scheduler
+
+logger = logging.getLogger(__name__)
+
+FORECAST_MAX_HORIZON = 12
+
+# Süreç içi önbellekte tutulacak seri sayısı
+SCENARIO_CACHE_SIZE = 32
+
+# Arka plan thread sayısı (çekirdek kullanımını eğitim zamanlayıcısı sınırlar)
+SCENARIO_JOB_WORKERS = 4
+
+# İlerleme durumları
+STATUS_DONE = ('Tamam', 'Hata', 'Zaman Aşımı')
+
+_scenario_cache = OrderedDict()
+_scenario_cache_lock = threading.Lock()
+
+def _cache_get(key):
+    with _scenario_cache_lock:
+        scenario = _scenario_cache.get(key)
+        if scenario is not None:
+            _scenario_cache.move_to_end(key)
+        return scenario
+
+def _cache_put(key, scenario):
+    with _scenario_cache_lock:
+        _scenario_cache[key] = scenario
+        _scenario_cache.move_to_end(key)
+        while len(_scenario_cache) > SCENARIO_CACHE_SIZE:
+            _scenario_cache.popitem(last=False)
+
+def clear_forecast_scenarios():
+    """Süreç içi senaryo önbelleğini boşalt"""
+    with _scenario_cache_lock:
+        _scenario_cache.clear()
+
+def _scenario_key(registry, monthly_df, product, brick, max_horizon):
+    return registry.make_key(
+        series_fingerprint(monthly_df, ['DATE', 'PF_Satis']),
+        product,
+        brick,
+        ['scenario', str(max_horizon), ML_MODEL_CONFIG_VERSION] + STAT_MODELS
+    )
+
+def _cached_scenario(key, registry):
+    """Önce süreç içi önbellek, sonra kayıt defteri; yoksa None"""
+    scenario = _cache_get(key)
+    if scenario is None:
+        scenario = registry.get(key)
+        if scenario is not None:
+            _cache_put(key, scenario)
+    return scenario
+
+def compute_forecast_scenarios(monthly_df, product=None, brick=None, max_horizon=FORECAST_MAX_HORIZON,
+                               registry=None, progress_callback=None):
+    """
+    Seri için tüm modellerin `max_horizon` aylık tahminleri (önbellekli)
+    
+    Aynı seri arka planda hesaplanıyorsa yeniden eğitilmez, o iş beklenir.
+    
+    Args:
+        monthly_df: calculate_advanced_time_series çıktısı (DATE, PF_Satis)
+        max_horizon: Hesaplanan en uzun ufuk (ay)
+        progress_callback: (ad, durum) -> None, model bazlı ilerleme
+    
+    Returns:
+        dict: {'ml_results', 'best_model_name', 'stat_results', 'forecast_df',
+        'max_horizon', 'from_cache'}; ML için yetersiz veride ML alanları None.
+        İstatistiksel modeller eğitim zamanlayıcısından sıra alır ve
+        DEFAULT_SERIES_TIMEOUT süre sınırıyla eğitilir; süre aşılırsa
+        stat_results boş kalır.
+    """
+    if registry is None:
+        registry = get_model_registry()
+    
+    key = _scenario_key(registry, monthly_df, product, brick, max_horizon)
+    
+    scenario = _cached_scenario(key, registry)
+    if scenario is not None:
+        return dict(scenario, from_cache=True)
+    
+    running_job = _get_job(key)
+    if running_job is not None and running_job.thread_id != threading.get_ident():
+        return dict(running_job.future.result(), from_cache=False)
+    
+    if progress_callback is not None and len(monthly_df) >= 12:
+        progress_callback('İstatistiksel Modeller', 'Bekliyor')
+    
+    ml_results, best_model_name, forecast_df = train_advanced_ml_models(
+        monthly_df, max_horizon, product=product, brick=brick, progress_callback=progress_callback
+    )
+    
+    stat_results = {}
+    stat_status = None
+    if len(monthly_df) >= 12:
+        stat_status = 'Tamam'
+        with get_training_scheduler().slot(max_cpus=1):
+            # statsmodels yüklemesi süre sınırına sayılmasın
+            import statsmodels.tsa.statespace.sarimax  # noqa: F401
+            
+            if progress_callback is not None:
+                progress_callback('İstatistiksel Modeller', 'Eğitiliyor')
+            try:
+                stat_results = call_with_timeout(
+                    DEFAULT_SERIES_TIMEOUT, fit_statistical_models,
+                    monthly_df['PF_Satis'].values, monthly_df['DATE'].iloc[-1], max_horizon
+                )
+            except SeriesTimeout as e:
+                logger.warning("İstatistiksel modeller eğitilemedi: %s", e)
+                stat_status = 'Zaman Aşımı'
+        if progress_callback is not None:
+            progress_callback('İstatistiksel Modeller', stat_status)
+    
+    if stat_results:
+        forecast_df = pd.concat(
+            [forecast_df] + [metrics['forecast'] for metrics in stat_results.values()],
+            ignore_index=True
+        )
+    
+    scenario = {
+        'ml_results': ml_results,
+        'best_model_name': best_model_name,
+        'stat_results': stat_results,
+        'forecast_df': forecast_df,
+        'max_horizon': max_horizon
+    }
+    
+    # Yük altında az ağaçla eğitilmiş senaryo saklanmaz; tam model warm start ile gelir
+    if not any(metrics.get('degraded') for metrics in (ml_results or {}).values()):
+        _cache_put(key, scenario)
+        # Süre aşımı yükten kaynaklanabilir: diske yazılmaz, süreç yeniden başlayınca tekrar denenir
+        if stat_status != 'Zaman Aşımı':
+            registry.put(key, scenario)
+    
+    return dict(scenario, from_cache=False)
+
+def slice_forecast_horizon(forecast_df, periods):
+    """Her modelin sadece ilk `periods` ayı (tahminler model içinde tarih sıralı)"""
+    if forecast_df is None or forecast_df.empty:
+        return forecast_df
+    return forecast_df.groupby('Model', sort=False).head(periods).reset_index(drop=True)
+
+def get_forecast_scenario(monthly_df, forecast_periods, product=None, brick=None, registry=None):
+    """
+    İstenen ufuk için tahminler; en uzun ufuk senaryosundan dilimlenir
+    
+    Returns:
+        (ml_results, best_model_name, stat_results, forecast_df, from_cache)
+    """
+    max_horizon = max(FORECAST_MAX_HORIZON, forecast_periods)
+    scenario = compute_forecast_scenarios(monthly_df, product, brick, max_horizon, registry)
+    
+    return (
+        scenario['ml_results'],
+        scenario['best_model_name'],
+        scenario['stat_results'],
+        slice_forecast_horizon(scenario['forecast_df'], forecast_periods),
+        scenario['from_cache']
+    )
+
+class ScenarioJob:
+    """Arka planda hesaplanan tahmin senaryosu ve model bazlı ilerlemesi"""
+    
+    def __init__(self, key):
+        self.key = key
+        self.started = time.perf_counter()
+        self.future = None
+        self.thread_id = None
+        self._progress = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def update(self, name, status):
+        with self._lock:
+            self._progress[name] = status
+    
+    def progress(self):
+        """[(ad, durum), ...] ve tamamlanma oranı (0-1)"""
+        with self._lock:
+            items = list(self._progress.items())
+        if not items:
+            return items, 0.0
+        done = sum(status in STATUS_DONE for _, status in items)
+        return items, done / len(items)
+    
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+    
+    def done(self):
+        return self.future.done()
+    
+    def _run(self, *args):
+        self.thread_id = threading.get_ident()
+        return compute_forecast_scenarios(*args, progress_callback=self.update)
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+_job_executor = None
+
+def _get_job(key):
+    """Bu seri için devam eden arka plan işi (yoksa None)"""
+    with _jobs_lock:
+        job = _jobs.get(key)
+    if job is None or job.future is None or job.done():
+        return None
+    return job
+
+def submit_forecast_scenario(monthly_df, product=None, brick=None, max_horizon=FORECAST_MAX_HORIZON,
+                             registry=None):
+    """
+    Senaryoyu önbellekten döndür, yoksa arka planda hesaplamaya gönder
+    
+    Aynı seri için ikinci istek yeni iş başlatmaz, devam eden işi döndürür.
+    İş, çağıranın bağlamında çalışır (eğitim zamanlayıcısı oturum bütçesi).
+    
+    Returns:
+        (scenario, job): önbellekte veya iş bitmişse (scenario, None),
+        hesaplama sürüyorsa (None, job). Başarısız iş hatası burada yükseltilir.
+    """
+    global _job_executor
+    
+    if registry is None:
+        registry = get_model_registry()
+    
+    key = _scenario_key(registry, monthly_df, product, brick, max_horizon)
+    
+    scenario = _cached_scenario(key, registry)
+    if scenario is not None:
+        return dict(scenario, from_cache=True), None
+    
+    with _jobs_lock:
+        job = _jobs.get(key)
+        
+        if job is not None and job.done():
+            # Bitmiş iş bir kez teslim edilir (az ağaçlı senaryolar önbelleğe yazılmaz)
+            del _jobs[key]
+            return job.future.result(), None
+        
+        if job is None:
+            if _job_executor is None:
+                _job_executor = ThreadPoolExecutor(max_workers=SCENARIO_JOB_WORKERS,
+                                                   thread_name_prefix='tahmin-senaryo')
+            job = ScenarioJob(key)
+            job.future = _job_executor.submit(
+                contextvars.copy_context().run, job._run,
+                monthly_df, product, brick, max_horizon, registry
+            )
+            _jobs[key] = job
+            logger.info("Tahmin senaryosu arka planda hesaplanıyor (%s)", key[:8])
+    
+    return None, job
@@ -0,0 +1,164 @@
+"""🗄️ EĞİTİLMİŞ MODEL KAYIT DEFTERİ
+
+Eğitilmiş ML modellerini ve metriklerini diskte saklar; aynı seri için
+tekrar eğitim yapılmasını önler.
+
+- Anahtar: (seri parmak izi, ürün, brick, feature seti)
+- Değer: pickle ile saklanan model sonuçları
+- LRU tahliye: dosya erişim zamanına göre en eski kayıtlar silinir
+
+Yapılandırma (ortam değişkenleri):
+    PORTFOY_MODEL_CACHE_DIR   Kayıt klasörü (varsayılan: ~/.cache/ticari_portfoy/models)
+    PORTFOY_MODEL_CACHE_SIZE  Maksimum kayıt sayısı (varsayılan: 64, 0 = kapalı)
+"""
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ticari_portfoy', 'models')
+DEFAULT_MAX_ENTRIES = 64
+
+def series_fingerprint(df, columns):
+    """Serinin içerik bazlı parmak izi (değerler değişmedikçe aynı kalır)"""
+    available = [col for col in columns if col in df.columns]
+    hashed = pd.util.hash_pandas_object(df[available], index=False).values
+    digest = hashlib.sha1(hashed.tobytes())
+    digest.update('|'.join(available).encode('utf-8'))
+    return digest.hexdigest()
+
+class ModelRegistry:
+    """Diskte kalıcı, LRU tahliyeli model kayıt defteri"""
+    
+    def __init__(self, cache_dir=None, max_entries=None):
+        self.cache_dir = cache_dir or os.environ.get('PORTFOY_MODEL_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if max_entries is None:
+            max_entries = int(os.environ.get('PORTFOY_MODEL_CACHE_SIZE', DEFAULT_MAX_ENTRIES))
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+    
+    @staticmethod
+    def make_key(fingerprint, product=None, brick=None, feature_set=()):
+        """Kayıt anahtarı: seri parmak izi + ürün + brick + feature seti"""
+        parts = [fingerprint, str(product or ''), str(brick or 'TÜMÜ'), ','.join(feature_set)]
+        return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+    
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+    
+    def get(self, key):
+        """Kayıtlı değeri döndür, yoksa None (erişim zamanı LRU için güncellenir)"""
+        if not self.enabled:
+            return None
+        
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path, None)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            # Bozuk / uyumsuz kayıt: sil ve yeniden eğitilsin
+            logger.warning("Model kaydı okunamadı (%s): %s", key, e)
+            self._remove(path)
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        return value
+    
+    def put(self, key, value):
+        """Değeri atomik olarak yaz ve gerekirse en eski kayıtları tahliye et"""
+        if not self.enabled:
+            return
+        
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            logger.warning("Model kaydı yazılamadı (%s): %s", key, e)
+            return
+        
+        self._evict()
+    
+    def _entries(self):
+        """(erişim zamanı, yol, boyut) listesi"""
+        entries = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return entries
+        
+        for name in names:
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+    
+    def _evict(self):
+        with self._lock:
+            entries = self._entries()
+            overflow = len(entries) - self.max_entries
+            if overflow <= 0:
+                return
+            for _, path, _ in sorted(entries)[:overflow]:
+                self._remove(path)
+    
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    
+    def clear(self):
+        """Tüm kayıtları sil"""
+        with self._lock:
+            for _, path, _ in self._entries():
+                self._remove(path)
+    
+    def stats(self):
+        """Kayıt sayısı, disk boyutu ve isabet istatistikleri"""
+        entries = self._entries()
+        return {
+            'entries': len(entries),
+            'max_entries': self.max_entries,
+            'size_mb': sum(size for _, _, size in entries) / (1024 * 1024),
+            'hits': self.hits,
+            'misses': self.misses,
+            'oldest_access': time.ctime(min(entries)[0]) if entries else None
+        }
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+def get_model_registry():
+    """Süreç genelinde paylaşılan varsayılan kayıt defteri"""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = ModelRegistry()
+        return _default_registry
@@ -0,0 +1,113 @@
+"""➕ AYLIK ÖNEK TOPLAMLARI (PREFIX SUM)
+
+Yüklenen veri için bir kez kurulur: ay ekseni boyunca kümülatif toplamlar
+brick, şehir, bölge ve manager kırılımlarında tutulur. Ardışık aylardan
+oluşan bir tarih aralığının varlık bazında toplamı iki önek satırının
+farkıdır (varlık başına O(1)); aralık değiştiğinde ham veri yeniden gruplanmaz.
+
+Kenar çubuğu filtreleri (çoklu seçim dahil) brick taneciğinde (Bölge / Şehir /
+Brick / Manager kombinasyonu) uygulanır; filtre kolonları kırılımın içindeyse
+doğrudan o kırılımın dizisi okunur.
+"""
+import numpy as np
+import pandas as pd
+
+from analytics import get_portfolio_columns
+from filter_index import active_filters
+
+# Brick taneciği: diğer kırılımlar bunun alt kümesi
+ENTITY_KEYS = ['REGION', 'CITY_NORMALIZED', 'CITY', 'TERRITORIES', 'MANAGER']
+
+# Kurulumda brick taneciğinden toplanan kırılımlar
+PREFIX_DIMENSIONS = [
+    ['REGION'],
+    ['REGION', 'CITY_NORMALIZED'],
+    ['REGION', 'MANAGER'],
+]
+
+class MonthlyPrefixSums:
+    """
+    Kırılım bazında aylık önek toplamları
+    
+    prefix[m] ilk m ayın toplamıdır; [first, stop) aylarının toplamı
+    prefix[stop] - prefix[first]. Son kolon satır sayısıdır (aralıkta satırı
+    olmayan varlıklar groupby'daki gibi sonuçta yer almaz).
+    """
+    
+    def __init__(self, df, months):
+        self.months = list(months)
+        self.value_cols = [col for col in get_portfolio_columns() if col in df.columns]
+        self._dtypes = {col: df[col].dtype for col in self.value_cols}
+        self._col_index = {col: i for i, col in enumerate(self.value_cols)}
+        
+        month_codes = pd.Categorical(df['YIL_AY'], categories=self.months).codes
+        frame = df[ENTITY_KEYS + self.value_cols].assign(__month=month_codes, __rows=1)
+        frame = frame[frame['__month'] >= 0]
+        
+        monthly = frame.groupby(ENTITY_KEYS + ['__month'], dropna=False, sort=False).sum().reset_index()
+        entity_codes = monthly.groupby(ENTITY_KEYS, dropna=False, sort=False).ngroup().values
+        entities = monthly[ENTITY_KEYS].drop_duplicates().reset_index(drop=True)
+        
+        sums = np.zeros((len(self.months), len(entities), len(self.value_cols) + 1))
+        sums[monthly['__month'].values, entity_codes] = monthly[self.value_cols + ['__rows']].values
+        prefix = np.concatenate([np.zeros((1,) + sums.shape[1:]), np.cumsum(sums, axis=0)])
+        
+        self._dimensions = {tuple(ENTITY_KEYS): (entities, prefix)}
+        for keys in PREFIX_DIMENSIONS:
+            codes = entities.groupby(keys, dropna=False, sort=False).ngroup().values
+            groups = entities[keys].drop_duplicates().reset_index(drop=True)
+            membership = np.zeros((len(entities), len(groups)))
+            membership[np.arange(len(entities)), codes] = 1.0
+            # (ay, varlık, kolon) -> (ay, grup, kolon)
+            grouped = np.matmul(prefix.transpose(0, 2, 1), membership).transpose(0, 2, 1)
+            self._dimensions[tuple(keys)] = (groups, np.ascontiguousarray(grouped))
+    
+    def month_range(self, first, stop, filters=()):
+        """[first, stop) aylarına ve kenar çubuğu filtrelerine bağlı görünüm"""
+        return PrefixSumRange(self, first, stop, filters)
+    
+    def totals(self, value_cols, by, first, stop, filters=()):
+        """
+        [first, stop) aylarında `by` kırılımında toplamlar; groupby(by).sum() ile aynı çıktı
+        
+        `by` veya filtre kolonları brick taneciğinde yoksa None (çağıran başka yoldan hesaplar).
+        """
+        filters = active_filters(filters)
+        needed = set(by) | {col for col, _ in filters}
+        if not needed <= set(ENTITY_KEYS) or not set(value_cols) <= set(self.value_cols):
+            return None
+        
+        # Gerekli kolonları kapsayan en küçük kırılım
+        keys = next((keys for keys in PREFIX_DIMENSIONS if needed <= set(keys)), ENTITY_KEYS)
+        groups, prefix = self._dimensions[tuple(keys)]
+        
+        columns = [self._col_index[col] for col in value_cols] + [-1]
+        diff = prefix[stop][:, columns] - prefix[first][:, columns]
+        
+        mask = diff[:, -1] > 0
+        for col, value in filters:
+            mask &= (groups[col].isin(value) if isinstance(value, tuple) else groups[col] == value).values
+        
+        if by:
+            result = groups[mask].reset_index(drop=True)
+            result[list(value_cols)] = diff[mask, :-1]
+            result = result.groupby(list(by))[list(value_cols)].sum().reset_index()
+        else:
+            result = pd.DataFrame([diff[mask, :-1].sum(axis=0)], columns=list(value_cols))
+        
+        for col in value_cols:
+            if pd.api.types.is_integer_dtype(self._dtypes[col]):
+                result[col] = np.rint(result[col]).astype('int64')
+        return result
+
+class PrefixSumRange:
+    """Ay aralığına ve kenar çubuğu filtrelerine bağlı önek toplamı görünümü"""
+    
+    def __init__(self, prefix_sums, first, stop, filters=()):
+        self.prefix_sums = prefix_sums
+        self.first = first
+        self.stop = stop
+        self.filters = active_filters(filters)
+    
+    def totals(self, value_cols, by, filters=()):
+        return self.prefix_sums.totals(value_cols, by, self.first, self.stop, self.filters + tuple(filters))
@@ -0,0 +1,174 @@
+"""🦆 DUCKDB SORGU MOTORU (OPSİYONEL)
+
+Normalize edilmiş satış verisini süreç içi bir DuckDB tablosuna yükler;
+şehir / brick / bölge / manager / rakip / aylık toplamalar SQL olarak çok
+thread'li çalışır. Kenar çubuğu filtreleri her seferinde pandas ile veri
+kopyalamak yerine WHERE koşuluna dönüşür.
+
+Toplama sonuçları pandas groupby ile aynı biçimdedir (aynı kolon sırası,
+grup anahtarına göre sıralı, eksik anahtarlar hariç); türetilmiş metrikler
+analytics.py'de her iki yol için aynı kodla hesaplanır.
+
+Yapılandırma (ortam değişkenleri):
+    PORTFOY_QUERY_ENGINE           pandas | duckdb | auto (varsayılan: auto)
+    PORTFOY_QUERY_ENGINE_MIN_ROWS  auto modunda DuckDB'nin devreye girdiği satır sayısı
+                                   (varsayılan: 500000)
+    PORTFOY_QUERY_THREADS          DuckDB thread sayısı (varsayılan: çekirdek sayısı)
+
+duckdb kurulu değilse pandas yolu kullanılır.
+"""
+import logging
+import os
+
+import pandas as pd
+
+from filter_index import active_filters
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_ROWS = 500_000
+
+ROW_ID_COL = '__row'
+
+# 'first' pandas'taki gibi satır sırasına göre ilk boş olmayan değer
+_EXTRA_AGGREGATES = {
+    'first': 'arg_min({col}, {row}) FILTER (WHERE {col} IS NOT NULL)',
+    'nunique': 'COUNT(DISTINCT {col})',
+    'min': 'MIN({col})',
+    'join': "string_agg(DISTINCT {col}, ', ' ORDER BY {col})"
+}
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+class SalesQueryEngine:
+    """Satış tablosu üzerinde filtreli toplama sorguları"""
+    
+    def __init__(self, df, threads=None, _connection=None, _filters=(), _dtypes=None):
+        if _connection is not None:
+            # filtered() ile oluşturulan görünüm: bağlantı ve tablo paylaşılır
+            self._con = _connection
+            self._filters = _filters
+            self._dtypes = _dtypes
+            return
+        
+        # duckdb sadece bu motor seçildiğinde yüklenir
+        import duckdb
+        
+        self._con = duckdb.connect(database=':memory:')
+        threads = threads or int(os.environ.get('PORTFOY_QUERY_THREADS', 0)) or os.cpu_count() or 1
+        self._con.execute(f"SET threads = {int(threads)}")
+        
+        source = df.reset_index(drop=True)
+        source[ROW_ID_COL] = source.index.values
+        self._con.register('sales_source', source)
+        self._con.execute("CREATE TABLE sales AS SELECT * FROM sales_source")
+        self._con.unregister('sales_source')
+        
+        self._filters = ()
+        self._dtypes = df.dtypes.to_dict()
+    
+    def filtered(self, **equals):
+        """
+        Filtreli görünüm (ör. REGION='MARMARA'; çoklu seçim: REGION=('EGE', 'MARMARA'))
+        
+        None, "TÜMÜ" veya boş seçimli filtreler yok sayılır.
+        """
+        filters = self._filters + active_filters(equals.items())
+        return SalesQueryEngine(None, _connection=self._con, _filters=filters, _dtypes=self._dtypes)
+    
+    def _where(self, date_filter=None):
+        clauses = []
+        params = []
+        for col, value in self._filters:
+            if isinstance(value, tuple):
+                clauses.append(f"{_quote(col)} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{_quote(col)} = ?")
+                params.append(value)
+        if date_filter:
+            clauses.append('"DATE" BETWEEN ? AND ?')
+            params.extend([pd.Timestamp(date_filter[0]).to_pydatetime(),
+                           pd.Timestamp(date_filter[1]).to_pydatetime()])
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+    
+    def _query(self, sql, params):
+        # Her sorgu kendi cursor'unda: thread'ler arasında güvenli
+        cursor = self._con.cursor()
+        try:
+            return cursor.execute(sql, params).df()
+        finally:
+            cursor.close()
+    
+    def row_count(self, date_filter=None):
+        where, params = self._where(date_filter)
+        return int(self._query(f"SELECT COUNT(*) AS n FROM sales{where}", params)['n'].iloc[0])
+    
+    def aggregate(self, value_cols, by, date_filter=None, extra=None, dropna=True):
+        """
+        `by` kırılımında toplamlar; pandas `groupby(by, dropna=dropna).agg(...)` ile aynı çıktı
+        
+        Args:
+            value_cols: Toplanacak sayısal kolonlar
+            by: Grup kolonları (boş liste = tek satır genel toplam)
+            extra: {kolon: 'first' | 'nunique' | 'join' | 'min'} ek toplamalar;
+                ROW_ID_COL: 'min' grubun ilk satır sırasını verir
+        """
+        extra = extra or {}
+        
+        select = [_quote(col) for col in by]
+        for col in value_cols:
+            cast = 'BIGINT' if pd.api.types.is_integer_dtype(self._dtypes.get(col)) else 'DOUBLE'
+            select.append(f"CAST(COALESCE(SUM({_quote(col)}), 0) AS {cast}) AS {_quote(col)}")
+        for col, how in extra.items():
+            expression = _EXTRA_AGGREGATES[how].format(col=_quote(col), row=_quote(ROW_ID_COL))
+            select.append(f"{expression} AS {_quote(col)}")
+        
+        where, params = self._where(date_filter)
+        
+        # pandas groupby (dropna=True) eksik anahtarlı satırları dışarıda bırakır
+        key_clauses = [f"{_quote(col)} IS NOT NULL" for col in by] if dropna else []
+        if key_clauses:
+            where = (where + ' AND ' if where else ' WHERE ') + ' AND '.join(key_clauses)
+        
+        sql = f"SELECT {', '.join(select)} FROM sales{where}"
+        if by:
+            sql += f" GROUP BY {', '.join(_quote(col) for col in by)}"
+        
+        result = self._query(sql, params)
+        
+        for col, how in extra.items():
+            if how == 'nunique':
+                result[col] = result[col].astype('int64')
+            elif how == 'first' and col in self._dtypes:
+                result[col] = result[col].astype(self._dtypes[col])
+        
+        if by:
+            # Sıralama pandas ile aynı (Python string karşılaştırması)
+            result = result.sort_values(by, kind='mergesort').reset_index(drop=True)
+        
+        return result
+
+def create_query_engine(df, backend=None):
+    """
+    Yapılandırmaya göre DuckDB motoru; pandas yolu seçiliyse None
+    
+    backend: 'pandas' | 'duckdb' | 'auto' (varsayılan: PORTFOY_QUERY_ENGINE)
+    """
+    backend = (backend or os.environ.get('PORTFOY_QUERY_ENGINE', 'auto')).lower()
+    
+    if backend == 'pandas':
+        return None
+    
+    if backend == 'auto':
+        min_rows = int(os.environ.get('PORTFOY_QUERY_ENGINE_MIN_ROWS', DEFAULT_MIN_ROWS))
+        if len(df) < min_rows:
+            return None
+    
+    try:
+        return SalesQueryEngine(df)
+    except ImportError:
+        if backend == 'duckdb':
+            logger.warning("duckdb kurulu değil, pandas kullanılıyor")
+        return None
@@ -0,0 +1,491 @@
+"""📥 RAPOR MOTORU
+Excel rapor üretimi, paralel rapor hattı ve toplu (ürün × bölge/manager) rapor üretimi
+
+Streamlit'ten bağımsızdır; hem arayüz (app.py) hem komut satırı (cli.py) kullanır.
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait, as_completed
+import pandas as pd
+import numpy as np
+import xlsxwriter
+
+from analytics import (
+    PRODUCTS,
+    safe_divide,
+    get_product_columns,
+    calculate_advanced_time_series,
+    perform_trend_analysis,
+    calculate_city_performance,
+    calculate_brick_performance,
+    calculate_competitor_analysis,
+    calculate_bcg_matrix,
+    calculate_region_comparative_analysis
+)
+from forecast_scenarios import get_forecast_scenario
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# EXCEL RAPOR OLUŞTURUCU - XLSXWRITER CONSTANT MEMORY
+# =============================================================================
+
+REPORT_SHEET_ORDER = [
+    'Brick Performans',
+    'Zaman Serisi',
+    'Trend Analizi',
+    'BCG Matrix',
+    'Şehir Analizi',
+    'Rakip Analizi',
+    'Bölge Karşılaştırması',
+    'Şehir-Brick Stratejik Uyum',
+    'ML Tahminler',
+    'ML Performans',
+    'ML Tahmin Karşılaştırma'
+]
+
+def run_task_graph(tasks, max_workers=None, progress_callback=None):
+    """
+    Bağımlılık grafiğindeki görevleri thread havuzunda çalıştır
+    
+    tasks: {isim: (fonksiyon, [bağımlılıklar])}
+    Fonksiyon, bağımlılıklarının sonuçlarını sırasıyla parametre olarak alır.
+    Bağımlılıkları tamamlanan görev beklemeden havuza gönderilir; böylece
+    toplam süre en yavaş bağımlılık zincirine yaklaşır.
+    
+    Returns:
+        (dict, pd.DataFrame): Görev sonuçları ve görev bazlı süre tablosu
+    """
+    def timed_call(func, args):
+        start = time.perf_counter()
+        value = func(*args)
+        return value, time.perf_counter() - start
+    
+    pending = dict(tasks)
+    total = len(pending)
+    results = {}
+    timings = []
+    workers = max_workers or max(1, min(total, os.cpu_count() or 1))
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        running = {}
+        
+        while pending or running:
+            ready = [name for name, (_, deps) in pending.items() if all(dep in results for dep in deps)]
+            for name in ready:
+                func, deps = pending.pop(name)
+                # Görev, çağıranın bağlamında çalışır (eğitim zamanlayıcısı oturumu)
+                future = executor.submit(contextvars.copy_context().run, timed_call, func,
+                                         [results[dep] for dep in deps])
+                running[future] = name
+            
+            if not running:
+                raise ValueError(f"Çözülemeyen bağımlılık: {', '.join(sorted(pending))}")
+            
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                value, elapsed = future.result()
+                results[name] = value
+                timings.append({'Bölüm': name, 'Süre (sn)': elapsed})
+                
+                # Callback ana thread'de çağrılır (Streamlit elemanları güvenle güncellenebilir)
+                if progress_callback is not None:
+                    progress_callback(len(results), total, name, elapsed)
+    
+    return results, pd.DataFrame(timings, columns=['Bölüm', 'Süre (sn)'])
+
+def build_report_pipeline(df, product, date_filter=None, forecast_periods=6, engine=None):
+    """
+    Rapor bölümlerini bağımlılık grafiği olarak tanımla
+    
+    Trend analizi ve tahmin modelleri aylık zaman serisine bağlıdır,
+    diğer tüm bölümler birbirinden bağımsız çalışır. Tahminler senaryo
+    önbelleğinden gelir (arayüzdeki zaman serisi sekmesiyle ortak).
+    
+    `engine` (satış küpü veya sorgu motoru görünümü) verilirse bölümler
+    sekmelerle aynı ortak toplamalardan okunur, ham veri yeniden gruplanmaz.
+    """
+    def brick_performance():
+        terr_perf = calculate_brick_performance(df, product, date_filter, engine=engine)
+        total_market_all = terr_perf['Toplam_Pazar'].sum()
+        terr_perf['Toplam_Pazar_%'] = safe_divide(terr_perf['Toplam_Pazar'], total_market_all) * 100
+        return terr_perf
+    
+    def forecast_models(monthly_df):
+        if len(monthly_df) >= 12:
+            return get_forecast_scenario(monthly_df, forecast_periods, product=product)[:4]
+        return None, None, {}, None
+    
+    return {
+        'Brick Performans': (brick_performance, []),
+        'Zaman Serisi': (lambda: calculate_advanced_time_series(df, product, None, date_filter, engine=engine), []),
+        'Trend Analizi': (perform_trend_analysis, ['Zaman Serisi']),
+        'BCG Matrix': (lambda: calculate_bcg_matrix(df, product, date_filter, engine=engine), []),
+        'Şehir Analizi': (lambda: calculate_city_performance(df, product, date_filter, engine=engine), []),
+        'Rakip Analizi': (lambda: calculate_competitor_analysis(df, product, date_filter, engine=engine), []),
+        'Bölge Karşılaştırması': (
+            lambda: calculate_region_comparative_analysis(df, product, date_filter, engine=engine), []
+        ),
+        'Tahmin Modelleri': (forecast_models, ['Zaman Serisi'])
+    }
+
+def assemble_report_sections(df, product, date_filter=None, forecast_periods=6, progress_callback=None, max_workers=None,
+                             engine=None):
+    """
+    Rapor sayfalarını paralel hesapla
+    
+    Sadece DataFrame döndürülür, model nesneleri rapora taşınmaz.
+    `engine`: df ile aynı filtreli satış küpü / sorgu motoru görünümü (bkz. build_report_pipeline)
+    
+    Returns:
+        (dict, pd.DataFrame): Sayfa adı -> DataFrame ve bölüm bazlı hesaplama süreleri
+    """
+    results, section_timings = run_task_graph(
+        build_report_pipeline(df, product, date_filter, forecast_periods, engine=engine),
+        max_workers=max_workers,
+        progress_callback=progress_callback
+    )
+    
+    trend_analysis = results['Trend Analizi']
+    ml_results, best_model_name, stat_results, forecast_df = results['Tahmin Modelleri']
+    
+    sections = {
+        'Brick Performans': results['Brick Performans'],
+        'Zaman Serisi': results['Zaman Serisi'],
+        'Trend Analizi': pd.DataFrame([trend_analysis]) if 'error' not in trend_analysis else None,
+        'BCG Matrix': results['BCG Matrix'],
+        'Şehir Analizi': results['Şehir Analizi'],
+        'Rakip Analizi': results['Rakip Analizi'],
+        'Bölge Karşılaştırması': results['Bölge Karşılaştırması'],
+        'ML Tahminler': forecast_df
+    }
+    
+    model_tables = [('ML', ml_results or {}), ('İstatistiksel', stat_results)]
+    if ml_results is not None or stat_results:
+        sections['ML Performans'] = pd.DataFrame([
+            {
+                'Model': name,
+                'Tip': model_type,
+                'MAE': metrics['MAE'],
+                'RMSE': metrics['RMSE'],
+                'MAPE': metrics['MAPE'],
+                'R2': metrics['R2']
+            }
+            for model_type, model_results in model_tables
+            for name, metrics in model_results.items()
+        ])
+    
+    if ml_results is not None:
+        sections['ML Tahmin Karşılaştırma'] = ml_results[best_model_name].get('forecast_benchmark')
+    
+    return sections, section_timings
+
+# Süreç içi önbellekte tutulacak rapor (filtre durumu) sayısı
+REPORT_CACHE_SIZE = 16
+
+_report_cache = OrderedDict()
+_report_cache_lock = threading.Lock()
+
+def get_report_sections(cache_key, df, product, date_filter=None, forecast_periods=6, progress_callback=None,
+                        engine=None):
+    """
+    assemble_report_sections, süreç içi LRU önbellekli
+    
+    Arayüzün ilerleme çubuğu gibi önbellek dışında oluşturulan nesneleri
+    güncelleyen progress_callback sadece hesaplama sırasında çağrılır;
+    önbellekten dönüşte bölümler yeniden hesaplanmaz, callback çağrılmaz.
+    
+    Args:
+        cache_key: Filtre durumunu tanımlayan hash'lenebilir anahtar
+            (ör. veri anahtarı, filtreler, ürün, tarih aralığı, ufuk)
+    
+    Returns:
+        (dict, pd.DataFrame, bool): Sayfalar, bölüm süreleri ve önbellekten gelip gelmediği
+    """
+    with _report_cache_lock:
+        cached = _report_cache.get(cache_key)
+        if cached is not None:
+            _report_cache.move_to_end(cache_key)
+            return cached + (True,)
+    
+    sections, section_timings = assemble_report_sections(
+        df, product, date_filter, forecast_periods, progress_callback=progress_callback, engine=engine
+    )
+    
+    with _report_cache_lock:
+        _report_cache[cache_key] = (sections, section_timings)
+        _report_cache.move_to_end(cache_key)
+        while len(_report_cache) > REPORT_CACHE_SIZE:
+            _report_cache.popitem(last=False)
+    
+    return sections, section_timings, False
+
+def _excel_column_kind(column_name, series):
+    """Kolon için Excel hücre tipini ve sayı formatı anahtarını belirle"""
+    if pd.api.types.is_bool_dtype(series):
+        return 'bool', None
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime', 'date'
+    if pd.api.types.is_numeric_dtype(series):
+        if '%' in str(column_name):
+            return 'number', 'percent'
+        if pd.api.types.is_integer_dtype(series):
+            return 'number', 'integer'
+        return 'number', 'decimal'
+    return 'text', None
+
+def _write_dataframe_sheet(workbook, sheet_name, data, formats):
+    """DataFrame'i tek sayfaya satır satır yaz (constant_memory sırası korunur)"""
+    worksheet = workbook.add_worksheet(sheet_name[:31])
+    
+    kinds = []
+    for col_idx, column_name in enumerate(data.columns):
+        kind, format_key = _excel_column_kind(column_name, data[column_name])
+        kinds.append(kind)
+        width = max(len(str(column_name)) + 2, 12)
+        worksheet.set_column(col_idx, col_idx, width, formats.get(format_key))
+    
+    worksheet.freeze_panes(1, 0)
+    worksheet.write_row(0, 0, [str(c) for c in data.columns], formats['header'])
+    
+    row_idx = 0
+    for row_idx, values in enumerate(data.itertuples(index=False, name=None), start=1):
+        for col_idx, value in enumerate(values):
+            kind = kinds[col_idx]
+            if value is None:
+                continue
+            if kind == 'number':
+                if pd.isna(value) or not np.isfinite(value):
+                    continue
+                worksheet.write_number(row_idx, col_idx, value)
+            elif kind == 'datetime':
+                if pd.isna(value):
+                    continue
+                worksheet.write_datetime(row_idx, col_idx, value.to_pydatetime())
+            elif kind == 'bool':
+                worksheet.write_boolean(row_idx, col_idx, bool(value))
+            elif isinstance(value, float) and np.isnan(value):
+                continue
+            else:
+                worksheet.write_string(row_idx, col_idx, str(value))
+    
+    return row_idx
+
+def write_excel_report(sections, output=None):
+    """
+    Rapor sayfalarını xlsxwriter constant_memory modunda yaz
+    
+    - Satırlar sırayla diske akıtılır, tüm çalışma kitabı bellekte tutulmaz
+    - Sayılar string yerine yerel Excel sayı formatlarıyla yazılır
+    - Her sayfa için yazma süresi ölçülür
+    
+    Returns:
+        (bytes, pd.DataFrame): Excel içeriği ve sayfa bazlı süre tablosu
+    """
+    if output is None:
+        output = BytesIO()
+    
+    workbook = xlsxwriter.Workbook(output, {
+        'constant_memory': True,
+        'strings_to_numbers': False,
+        'strings_to_formulas': False,
+        'strings_to_urls': False
+    })
+    
+    formats = {
+        'header': workbook.add_format({'bold': True, 'bg_color': '#1E3A8A', 'font_color': '#FFFFFF', 'border': 1}),
+        'integer': workbook.add_format({'num_format': '#,##0'}),
+        'decimal': workbook.add_format({'num_format': '#,##0.00'}),
+        'percent': workbook.add_format({'num_format': '0.0"%"'}),
+        'date': workbook.add_format({'num_format': 'yyyy-mm-dd'})
+    }
+    
+    sheet_names = [name for name in REPORT_SHEET_ORDER if name in sections]
+    sheet_names += [name for name in sections if name not in REPORT_SHEET_ORDER]
+    
+    timings = []
+    for sheet_name in sheet_names:
+        data = sections[sheet_name]
+        if data is None or data.empty:
+            continue
+        
+        start = time.perf_counter()
+        row_count = _write_dataframe_sheet(workbook, sheet_name, data, formats)
+        timings.append({
+            'Sayfa': sheet_name,
+            'Satır': row_count,
+            'Kolon': len(data.columns),
+            'Süre (sn)': time.perf_counter() - start
+        })
+    
+    start = time.perf_counter()
+    workbook.close()
+    timings.append({
+        'Sayfa': 'Dosya Kapatma',
+        'Satır': 0,
+        'Kolon': 0,
+        'Süre (sn)': time.perf_counter() - start
+    })
+    
+    return output.getvalue(), pd.DataFrame(timings)
+
+# =============================================================================
+# TOPLU RAPOR ÜRETİMİ - ÜRÜN × BÖLGE / MANAGER
+# =============================================================================
+
+BATCH_GROUP_OPTIONS = {
+    'REGION': 'Bölge',
+    'MANAGER': 'Manager'
+}
+
+# Bölge / manager bilgisi eksik satırların toplu rapordaki grubu
+BATCH_MISSING_GROUP = 'BELİRSİZ'
+
+def build_batch_aggregate(df, date_filter=None):
+    """
+    Toplu rapor için ortak aylık agregasyon (tek geçiş)
+    
+    Tüm ürün kolonları Brick/Şehir/Manager/Ay seviyesinde tek groupby ile toplanır.
+    Ham veride Brick-ay başına tek satır varsa sonuç ham veriyle birebir aynıdır.
+    """
+    if date_filter:
+        df = df[(df['DATE'] >= date_filter[0]) & (df['DATE'] <= date_filter[1])]
+    
+    measure_cols = []
+    for product in PRODUCTS:
+        cols = get_product_columns(product)
+        measure_cols += [cols['pf'], cols['rakip']]
+    
+    agg_spec = {col: 'sum' for col in measure_cols}
+    agg_spec['DATE'] = 'min'
+    
+    aggregate = df.groupby(
+        ['TERRITORIES', 'REGION', 'CITY', 'CITY_NORMALIZED', 'MANAGER', 'YIL_AY'],
+        sort=False,
+        dropna=False
+    ).agg(agg_spec).reset_index()
+    
+    aggregate['AY'] = aggregate['DATE'].dt.month
+    aggregate['YIL'] = aggregate['DATE'].dt.year
+    
+    return aggregate
+
+def _batch_file_name(product, group_value):
+    """Zip içindeki rapor dosya adı"""
+    safe_group = str(group_value).strip().replace('/', '-').replace(' ', '_')
+    return f"{product.replace(' ', '_')}_{safe_group}.xlsx"
+
+def _batch_file_names(jobs):
+    """
+    Her (ürün, grup) için benzersiz zip dosya adı
+    
+    Sadeleştirme farklı değerleri aynı ada indirebilir ("A B" / "A_B",
+    "A/B" / "A-B"); çakışan adlara sıra eki verilir, raporlar birbirinin
+    üzerine yazılmaz. Karşılaştırma büyük/küçük harf duyarsızdır.
+    """
+    names = {}
+    used = set()
+    for product, group_value in jobs:
+        file_name = _batch_file_name(product, group_value)
+        stem = file_name[:-len('.xlsx')]
+        suffix = 2
+        while file_name.lower() in used:
+            file_name = f"{stem}_{suffix}.xlsx"
+            suffix += 1
+        used.add(file_name.lower())
+        names[(product, group_value)] = file_name
+    return names
+
+def generate_batch_reports(df, products=None, group_by='REGION', date_filter=None, forecast_periods=6,
+                           max_workers=None, progress_callback=None):
+    """
+    Her (ürün × bölge/manager) kombinasyonu için Excel raporu üret ve zip'le
+    
+    - Ortak agregasyon ve grup bölümlemesi bir kez yapılır
+    - Raporlar thread havuzunda paralel hesaplanıp yazılır
+    - Rapor bazlı ve toplam süreler log tablosunda döner (zip içine de eklenir)
+    - Bölge / manager bilgisi eksik satırlar BATCH_MISSING_GROUP raporunda yer alır
+    
+    Returns:
+        (bytes, pd.DataFrame): Zip içeriği ve rapor bazlı süre logu
+    """
+    if group_by not in BATCH_GROUP_OPTIONS:
+        raise ValueError(f"Geçersiz gruplama: {group_by}")
+    
+    products = products or PRODUCTS
+    batch_start = time.perf_counter()
+    
+    aggregate = build_batch_aggregate(df, date_filter)
+    
+    # groupby eksik anahtarları atar; bu satırların satışı hiçbir rapordan düşmemeli
+    missing = aggregate[group_by].isna()
+    if missing.any():
+        logger.warning(
+            "%s bilgisi eksik %d satır '%s' grubunda raporlanıyor",
+            BATCH_GROUP_OPTIONS[group_by], int(missing.sum()), BATCH_MISSING_GROUP
+        )
+        aggregate[group_by] = aggregate[group_by].astype(object).where(~missing, BATCH_MISSING_GROUP)
+    
+    partitions = {value: part for value, part in aggregate.groupby(group_by, sort=True)}
+    jobs = [(product, value) for product in products for value in partitions]
+    file_names = _batch_file_names(jobs)
+    prepare_elapsed = time.perf_counter() - batch_start
+    
+    def build_one(product, group_value):
+        start = time.perf_counter()
+        # Raporlar zaten paralel, bölüm grafiği rapor içinde sıralı çalışır
+        sections, _ = assemble_report_sections(
+            partitions[group_value], product, None, forecast_periods, max_workers=1
+        )
+        report_bytes, _ = write_excel_report(sections)
+        return report_bytes, time.perf_counter() - start
+    
+    log_rows = []
+    output = BytesIO()
+    workers = max_workers or max(1, min(len(jobs), os.cpu_count() or 1))
+    
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(build_one, product, value): (product, value) for product, value in jobs}
+            
+            for future in as_completed(futures):
+                product, group_value = futures[future]
+                file_name = file_names[(product, group_value)]
+                report_bytes, elapsed = future.result()
+                
+                # Zip yazımı sadece ana thread'de
+                archive.writestr(file_name, report_bytes)
+                log_rows.append({
+                    'Ürün': product,
+                    BATCH_GROUP_OPTIONS[group_by]: group_value,
+                    'Dosya': file_name,
+                    'Satır': len(partitions[group_value]),
+                    'Boyut (KB)': len(report_bytes) / 1024,
+                    'Süre (sn)': elapsed
+                })
+                
+                if progress_callback is not None:
+                    progress_callback(len(log_rows), len(jobs), file_name, elapsed)
+        
+        batch_log = pd.DataFrame(log_rows)
+        if not batch_log.empty:
+            batch_log = batch_log.sort_values(['Ürün', BATCH_GROUP_OPTIONS[group_by]]).reset_index(drop=True)
+        
+        total_elapsed = time.perf_counter() - batch_start
+        summary = pd.DataFrame([
+            {'Adım': 'Ortak agregasyon', 'Süre (sn)': prepare_elapsed},
+            {'Adım': f'{len(jobs)} rapor (paralel)', 'Süre (sn)': total_elapsed - prepare_elapsed},
+            {'Adım': 'Toplam', 'Süre (sn)': total_elapsed}
+        ])
+        archive.writestr('rapor_sureleri.csv', batch_log.to_csv(index=False))
+        archive.writestr('toplam_sure.csv', summary.to_csv(index=False))
+    
+    batch_log.attrs['total_seconds'] = total_elapsed
+    return output.getvalue(), batch_log
@@ -0,0 +1,192 @@
+"""🧊 HİYERARŞİK SATIŞ KÜPÜ (Bölge → Şehir → Brick → Manager)
+
+Filtre durumu (kenar çubuğu filtreleri + tarih aralığı) başına ham veri bir
+kez taranır: Bölge / Şehir / Brick / Manager / Ay taneciğinde tüm ürünlerin
+PF ve rakip toplamları çıkarılır. Hiyerarşinin her seviyesi (GROUPING SETS)
+bu küçük tablodan kurulumda hesaplanır; bölge seçildiğinde şehir, brick ve
+manager kırılımları yeniden hesaplanmaz, ilgili seviyeden okunur.
+
+Daha dar bir filtre durumunun (bölge / şehir / brick / manager alt kümesi,
+tam aylardan oluşan daha kısa dönem) küpü, onu kapsayan bir küpün taneciği
+süzülerek kurulur (subset); ham veri yeniden taranmaz. Tam aylık dönem
+küplerinde ara katman gerektirmeyen toplamlar (genel toplam, bölge, şehir,
+manager) önek toplamlarından okunur (bkz. prefix_sums).
+
+SalesRollup, query_engine.SalesQueryEngine ile aynı arayüzü (aggregate,
+filtered, row_count) sunduğu için analytics'teki calculate_* fonksiyonlarına
+`engine=` olarak verilebilir; sonuçlar ham veriden hesaplananla aynıdır.
+"""
+import numpy as np
+import pandas as pd
+
+from analytics import get_portfolio_columns
+from filter_index import active_filters
+from query_engine import ROW_ID_COL
+
+# Küp taneciği: ham veriye dönmeden kurulabilen tüm kırılımlar bunların alt kümesi
+ROLLUP_KEYS = ['REGION', 'CITY_NORMALIZED', 'CITY', 'TERRITORIES', 'MANAGER', 'YIL_AY']
+
+# Kurulumda hesaplanan seviyeler: (grup kolonları, ek toplamalar)
+ROLLUP_GROUPING_SETS = [
+    (['REGION'], {'CITY_NORMALIZED': 'nunique'}),
+    (['REGION', 'CITY_NORMALIZED'], {}),
+    (['REGION', 'TERRITORIES'], {'MANAGER': 'first', 'CITY_NORMALIZED': 'join'}),
+    (['REGION', 'MANAGER'], {'TERRITORIES': 'nunique', 'CITY_NORMALIZED': 'nunique'}),
+    (['REGION', 'YIL_AY'], {}),
+    (['CITY_NORMALIZED', 'REGION'], {}),
+    (['TERRITORIES', 'REGION', 'CITY', 'MANAGER'], {}),
+    (['YIL_AY'], {'DATE': 'first'}),
+]
+
+def _join_unique(values):
+    return ', '.join(sorted(set(values)))
+
+def _filter_mask(frame, filters):
+    mask = np.ones(len(frame), dtype=bool)
+    for col, value in filters:
+        mask &= (frame[col].isin(value) if isinstance(value, tuple) else frame[col] == value).values
+    return mask
+
+def _normalize_date_filter(date_filter):
+    if not date_filter:
+        return None
+    return pd.Timestamp(date_filter[0]), pd.Timestamp(date_filter[1])
+
+def build_sales_rollup(df, date_filter=None, engine=None):
+    """
+    Filtrelenmiş veri için satış küpü (ham veri tek geçişte taranır)
+    
+    Tüm ürünlerin ölçüleri birlikte toplanır; ürün değiştirmek küpü yeniden
+    kurmaz, sadece kolon seçer.
+    
+    Args:
+        df: Kenar çubuğu filtreleri uygulanmış veri
+        engine: Aynı filtrelerle query_engine görünümü (varsa tanecik SQL ile çıkarılır)
+    """
+    value_cols = [col for col in get_portfolio_columns() if col in df.columns]
+    
+    if engine is not None:
+        grain = engine.aggregate(
+            value_cols, ROLLUP_KEYS, date_filter,
+            extra={'DATE': 'first', ROW_ID_COL: 'min'}, dropna=False
+        )
+    else:
+        if date_filter:
+            df = df[(df['DATE'] >= date_filter[0]) & (df['DATE'] <= date_filter[1])]
+        
+        frame = df[ROLLUP_KEYS + value_cols + ['DATE']].assign(**{ROW_ID_COL: np.arange(len(df))})
+        agg = dict.fromkeys(value_cols, 'sum')
+        agg.update({'DATE': 'first', ROW_ID_COL: 'min'})
+        grain = frame.groupby(ROLLUP_KEYS, dropna=False, sort=False).agg(agg).reset_index()
+    
+    # Satır sırası korunur: 'first' seviyelerde de ham verideki ilk değeri verir
+    grain = grain.sort_values(ROW_ID_COL, kind='mergesort').reset_index(drop=True)
+    
+    return SalesRollup(grain, value_cols, date_filter)
+
+class SalesRollup:
+    """Satış küpü; seviyeler kurulumda hesaplanır, sorgular seviyeden okunur"""
+    
+    def __init__(self, grain, value_cols, date_filter=None, _levels=None, _filters=(), prefix=None):
+        self.grain = grain
+        self.value_cols = value_cols
+        self.date_filter = _normalize_date_filter(date_filter)
+        self.prefix = prefix
+        self._filters = _filters
+        
+        if _levels is None:
+            _levels = {}
+            for by, extra in ROLLUP_GROUPING_SETS:
+                _levels[(tuple(by), tuple(sorted(extra.items())))] = self._compute_level(by, extra)
+        self._levels = _levels
+    
+    def filtered(self, **equals):
+        """
+        Filtreli görünüm (ör. REGION='MARMARA'; çoklu seçim: REGION=('EGE', 'MARMARA'));
+        seviyeler paylaşılır
+        
+        None, "TÜMÜ" veya boş seçimli filtreler yok sayılır.
+        """
+        filters = self._filters + active_filters(equals.items())
+        return SalesRollup(self.grain, self.value_cols, self.date_filter, _levels=self._levels, _filters=filters,
+                           prefix=self.prefix)
+    
+    def subset(self, filters=(), months=None, date_filter=None, prefix=None):
+        """
+        Alt filtre durumunun küpü; tanecik satırları seçilir, ham veri taranmaz
+        
+        Args:
+            filters: ((kolon, değer | (değer, ...)), ...) tanecik kolonlarında
+            months: Seçilecek aylar (YIL_AY); None ise tüm aylar
+            date_filter: Alt küpün tarih aralığı; months verilmişse tam olarak bu
+                ayların satırlarını seçmelidir (bkz. PeriodIndex.month_span)
+            prefix: Aynı aylar ve filtreler için önek toplamı görünümü
+        """
+        mask = _filter_mask(self.grain, active_filters(filters))
+        if months is not None:
+            mask &= self.grain['YIL_AY'].isin(months).values
+        grain = self.grain[mask].reset_index(drop=True)
+        return SalesRollup(grain, self.value_cols, date_filter, _filters=self._filters, prefix=prefix)
+    
+    def levels(self):
+        """Kurulumda hesaplanan seviyelerin grup kolonları"""
+        return [list(by) for by, _ in self._levels]
+    
+    def _compute_level(self, by, extra, grain=None):
+        agg = dict.fromkeys(self.value_cols, 'sum')
+        for col, how in extra.items():
+            agg[col] = _join_unique if how == 'join' else how
+        return (self.grain if grain is None else grain).groupby(by).agg(agg).reset_index()
+    
+    def _level(self, by, extra):
+        """Önce kurulumdaki seviye (ek toplamaları kapsayan), yoksa tanecikten hesapla"""
+        for (level_by, level_extra), level in self._levels.items():
+            if list(level_by) == by and set(extra.items()) <= set(level_extra):
+                return level
+        return self._compute_level(by, extra)
+    
+    def _check_date_filter(self, date_filter):
+        if _normalize_date_filter(date_filter) != self.date_filter:
+            raise ValueError("Satış küpü farklı bir tarih aralığı için oluşturuldu")
+    
+    def _select(self, frame):
+        return frame[_filter_mask(frame, self._filters)]
+    
+    def row_count(self, date_filter=None):
+        """Filtreye uyan tanecik satırı sayısı (0 ise ham veride de satır yok)"""
+        self._check_date_filter(date_filter)
+        return len(self._select(self.grain))
+    
+    def nunique(self, col):
+        """Filtreye uyan satırlarda kolonun farklı değer sayısı (col tanecik kolonu olmalı)"""
+        return self._select(self.grain)[col].nunique()
+    
+    def aggregate(self, value_cols, by, date_filter=None, extra=None):
+        """
+        `by` kırılımında toplamlar; SalesQueryEngine.aggregate ile aynı çıktı
+        
+        Filtre kolonları + `by` bir kurulum seviyesine karşılık geliyorsa sonuç
+        o seviyeden süzülür (bölge drill-down'ı bu yolla okunur).
+        """
+        self._check_date_filter(date_filter)
+        extra = extra or {}
+        
+        if self.prefix is not None and not extra:
+            result = self.prefix.totals(value_cols, by, self._filters)
+            if result is not None:
+                return result
+        
+        if not by:
+            return self._select(self.grain)[value_cols].sum().to_frame().T
+        
+        if any(isinstance(value, tuple) or col in extra for col, value in self._filters):
+            # Çoklu seçim veya ek toplamadaki kolona filtre: seviye satırları
+            # (ilk / farklı sayısı) birleştirilemez, seçilen tanecik satırlarından hesaplanır
+            level = self._compute_level(list(by), extra, self._select(self.grain))
+            return level[list(by) + list(value_cols) + list(extra)].reset_index(drop=True)
+        
+        filter_cols = [col for col, _ in self._filters if col not in by]
+        level = self._level(filter_cols + list(by), extra)
+        
+        result = self._select(level)[list(by) + list(value_cols) + list(extra)]
+        return result.reset_index(drop=True)
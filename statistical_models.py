@@ -0,0 +1,333 @@
+"""📐 İSTATİSTİKSEL TAHMİN MODELLERİ
+
+Aylık seriler için klasik zaman serisi modelleri (statsmodels):
+
+- Üstel Düzeltme (SES), Holt (trend), Holt-Winters (trend + 12 aylık mevsimsellik)
+- SARIMA (1,1,1)(0,1,1,12)
+
+Tüm modeller durum-uzayı (state space) formundadır: eğitim döneminde
+bulunan parametreler tüm seriye uygulanır; test metrikleri sklearn
+modelleriyle aynı şekilde bir adım ileri tahminlerden hesaplanır ve
+gelecek tahmini %95 güven aralığı ile birlikte üretilir.
+
+Brick bazlı çalıştırmada seriler süreç havuzunda paralel eğitilir ve her
+seri için süre sınırı uygulanır. Tek seri çalıştırmada (tahmin senaryosu)
+model tek işçili bir süreçte eğitilir (call_with_timeout); süresi aşan
+eğitim durdurulur, eğitim zamanlayıcısının çekirdek bütçesi dışına taşmaz.
+"""
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from analytics import build_brick_month_panel
+from model_registry import get_model_registry, series_fingerprint
+from training_scheduler import get_training_scheduler
+
+logger = logging.getLogger(__name__)
+
+STAT_MODELS = ['Üstel Düzeltme', 'Holt', 'Holt-Winters', 'SARIMA']
+
+# Mevsimsel modeller eğitimde en az iki tam yıl ister
+SEASONAL_MODELS = {'Holt-Winters', 'SARIMA'}
+MIN_SEASONAL_TRAIN_MONTHS = 24
+
+DEFAULT_SERIES_TIMEOUT = 5.0
+
+# Tek işçili sürecin başlatılması ve import'ları için süre sınırına eklenen pay
+# (SIGALRM olmayan sistemlerde işçi bu payla birlikte sonlandırılır)
+WORKER_START_SECONDS = 60.0
+
+class SeriesTimeout(Exception):
+    """Seri için süre sınırı aşıldı"""
+
+def _can_use_alarm():
+    return hasattr(signal, 'SIGALRM') and threading.current_thread() is threading.main_thread()
+
+@contextmanager
+def series_timeout(seconds):
+    """
+    Seri bazlı süre sınırı (SIGALRM)
+    
+    Sadece ana thread'de ve SIGALRM destekleyen sistemlerde uygulanır;
+    diğer durumlar için call_with_timeout kullanılmalıdır.
+    """
+    if not seconds or not _can_use_alarm():
+        yield
+        return
+    
+    def _raise_timeout(signum, frame):
+        raise SeriesTimeout(f"{seconds:.1f} sn süre sınırı aşıldı")
+    
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def _call_with_alarm(seconds, func, args, kwargs):
+    """Süreç işçisi: çağrıyı işçinin ana thread'inde SIGALRM süre sınırıyla çalıştır"""
+    # statsmodels yüklemesi süre sınırına sayılmasın
+    import statsmodels.tsa.statespace.sarimax  # noqa: F401
+    
+    with series_timeout(seconds):
+        return func(*args, **kwargs)
+
+def call_with_timeout(seconds, func, *args, **kwargs):
+    """
+    func(*args, **kwargs) süre sınırıyla; `seconds` aşılırsa SeriesTimeout
+    
+    Ana thread'de (süreç havuzu işçileri) çağrı SIGALRM ile kesilir. Diğer
+    thread'lerde (Streamlit betik thread'i, arka plan işleri) çağrı tek işçili
+    bir spawn sürecinde çalışır; süre sınırı orada SIGALRM ile uygulanır, işçi
+    WORKER_START_SECONDS payı ile de bitmezse sonlandırılır. Süresi aşan eğitim
+    arka planda çalışmaya devam etmez (çağıranın zamanlayıcı slotu gerçek
+    çekirdek kullanımını gösterir). func ve argümanları pickle'lanabilir olmalıdır.
+    """
+    if not seconds:
+        return func(*args, **kwargs)
+    
+    if _can_use_alarm():
+        with series_timeout(seconds):
+            return func(*args, **kwargs)
+    
+    try:
+        # spawn: Streamlit sunucusunun thread'leri fork ile kopyalanmaz
+        pool = multiprocessing.get_context('spawn').Pool(1)
+    except OSError as e:
+        logger.warning("Süre sınırı için işçi süreç başlatılamadı, süre sınırı olmadan çalışılıyor: %s", e)
+        return func(*args, **kwargs)
+    
+    # Çıkışta terminate: süresi aşan işçi durdurulur
+    with pool:
+        pending = pool.apply_async(_call_with_alarm, (seconds, func, args, kwargs))
+        try:
+            return pending.get(seconds + WORKER_START_SECONDS)
+        except multiprocessing.TimeoutError:
+            raise SeriesTimeout(f"{seconds:.1f} sn süre sınırı aşıldı") from None
+
+def _build_model(name, endog):
+    """Model adına göre eğitilmemiş statsmodels modeli"""
+    # statsmodels sadece istatistiksel tahmin gerektiğinde yüklenir
+    from statsmodels.tsa.statespace.exponential_smoothing import ExponentialSmoothing
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+    
+    if name == 'Üstel Düzeltme':
+        return ExponentialSmoothing(endog, trend=False)
+    if name == 'Holt':
+        return ExponentialSmoothing(endog, trend=True)
+    if name == 'Holt-Winters':
+        return ExponentialSmoothing(endog, trend=True, seasonal=12)
+    if name == 'SARIMA':
+        return SARIMAX(endog, order=(1, 1, 1), seasonal_order=(0, 1, 1, 12))
+    raise ValueError(f"Bilinmeyen istatistiksel model: {name}")
+
+def fit_statistical_models(values, last_date, forecast_periods=6, models=None):
+    """
+    Tek seri için istatistiksel modelleri eğit, test et ve tahmin üret
+    
+    Args:
+        values: Ay sıralı satış değerleri
+        last_date: Son ayın tarihi
+        models: Eğitilecek modeller (varsayılan: STAT_MODELS)
+    
+    Returns:
+        dict: model adı -> {'MAE', 'RMSE', 'MAPE', 'R2', 'y_pred', 'forecast', 'fit_seconds'}
+    """
+    y = np.asarray(values, dtype=float)
+    split_idx = int(len(y) * 0.8)
+    y_test = y[split_idx:]
+    
+    # ML tahminleriyle aynı tarih adımları
+    future_dates = pd.DatetimeIndex([
+        pd.Timestamp(last_date) + pd.DateOffset(months=i + 1) for i in range(forecast_periods)
+    ])
+    
+    results = {}
+    
+    for name in models or STAT_MODELS:
+        if name in SEASONAL_MODELS and split_idx < MIN_SEASONAL_TRAIN_MONTHS:
+            continue
+        
+        start = time.perf_counter()
+        try:
+            with warnings.catch_warnings():
+                # Kısa serilerde yakınsama uyarıları beklenen durum
+                warnings.simplefilter("ignore")
+                train_fit = _build_model(name, y[:split_idx]).fit(disp=False)
+                full_fit = train_fit.apply(y)
+                forecast = full_fit.get_forecast(forecast_periods)
+                conf_int = np.asarray(forecast.conf_int(alpha=0.05))
+        except SeriesTimeout:
+            raise
+        except Exception as e:
+            logger.warning("%s modeli eğitilemedi: %s", name, e)
+            continue
+        
+        # Test dönemi: eğitim parametreleriyle bir adım ileri tahminler
+        y_pred = np.maximum(np.asarray(full_fit.fittedvalues)[split_idx:], 0)
+        errors = y_test - y_pred
+        ss_tot = np.sum((y_test - y_test.mean()) ** 2)
+        
+        predicted = np.maximum(np.asarray(forecast.predicted_mean), 0)
+        
+        results[name] = {
+            'MAE': np.mean(np.abs(errors)),
+            'RMSE': np.sqrt(np.mean(errors ** 2)),
+            'MAPE': np.mean(np.abs(errors) / np.maximum(y_test, 1)) * 100,
+            'R2': 1 - np.sum(errors ** 2) / ss_tot if ss_tot > 0 else 0.0,
+            'y_pred': y_pred,
+            'forecast': pd.DataFrame({
+                'DATE': future_dates,
+                'YIL_AY': future_dates.strftime('%Y-%m'),
+                'PF_Satis': predicted,
+                'Alt_Sinir': np.maximum(conf_int[:, 0], 0),
+                'Ust_Sinir': np.maximum(conf_int[:, 1], 0),
+                'Model': name,
+                'Tahmin_Tipi': 'İstatistiksel Tahmin'
+            }),
+            'fit_seconds': time.perf_counter() - start
+        }
+    
+    return results
+
+def _fit_brick_chunk(chunk, forecast_periods, timeout):
+    """
+    Süreç havuzu görevi: bir grup brick için modelleri eğit
+    
+    Returns:
+        (summary_rows, forecast_frames)
+    """
+    # statsmodels yüklemesi ilk serinin süre sınırına sayılmasın
+    import statsmodels.tsa.statespace.sarimax  # noqa: F401
+    
+    summary_rows = []
+    forecast_frames = []
+    
+    for brick, values, last_date in chunk:
+        start = time.perf_counter()
+        try:
+            results = call_with_timeout(timeout, fit_statistical_models, values, last_date, forecast_periods)
+        except SeriesTimeout:
+            summary_rows.append({'TERRITORIES': brick, 'Durum': 'Zaman Aşımı',
+                                 'Süre (sn)': time.perf_counter() - start})
+            continue
+        
+        if not results:
+            summary_rows.append({'TERRITORIES': brick, 'Durum': 'Yetersiz Veri',
+                                 'Süre (sn)': time.perf_counter() - start})
+            continue
+        
+        best_name = min(results, key=lambda name: results[name]['MAPE'])
+        best = results[best_name]
+        
+        summary_rows.append({
+            'TERRITORIES': brick,
+            'Durum': 'Tamam',
+            'En İyi Model': best_name,
+            'MAPE': best['MAPE'],
+            'Toplam Tahmin': best['forecast']['PF_Satis'].sum(),
+            'Süre (sn)': time.perf_counter() - start
+        })
+        forecast_frames.append(best['forecast'].assign(TERRITORIES=brick))
+    
+    return summary_rows, forecast_frames
+
+def fit_statistical_models_by_brick(df, product, date_filter=None, forecast_periods=6,
+                                    max_workers=None, timeout=DEFAULT_SERIES_TIMEOUT, registry=None):
+    """
+    Her brick için istatistiksel modelleri paralel eğit, en iyisiyle tahmin et
+    
+    Brick'ler işçi sayısı kadar gruba bölünür (süreç başına tek statsmodels
+    yüklemesi); her seriye `timeout` saniye süre sınırı uygulanır. İşçi
+    sayısı oturumun eğitim zamanlayıcısından aldığı çekirdekle sınırlıdır.
+    Tek işçide de gruplar süreçte çalışır: SIGALRM sadece ana thread'de
+    çalışır, Streamlit betiği ise ayrı bir thread'dedir. Süreç havuzu
+    kullanılamazsa seriler call_with_timeout ile tek tek (seri başına işçi süreç) eğitilir.
+    
+    Returns:
+        (summary, forecast_df): brick bazlı en iyi model / MAPE / durum ve
+        en iyi modellerin tahminleri; veri yoksa veya tüm seriler sıfırsa (None, None)
+    """
+    panel, brick_info = build_brick_month_panel(df, product, date_filter)
+    if panel.empty:
+        return None, None
+    
+    n_bricks = len(brick_info)
+    n_months = len(panel) // n_bricks
+    
+    if registry is None:
+        registry = get_model_registry()
+    
+    registry_key = registry.make_key(
+        series_fingerprint(panel, ['TERRITORIES', 'DATE', 'PF_Satis']),
+        product,
+        'STAT',
+        STAT_MODELS + [str(forecast_periods), str(timeout)]
+    )
+    
+    cached = registry.get(registry_key)
+    if cached is not None:
+        return cached
+    
+    history = panel['PF_Satis'].values.reshape(n_bricks, n_months)
+    last_date = panel['DATE'].iloc[n_months - 1]
+    series = [
+        (brick, history[i], last_date)
+        for i, brick in enumerate(brick_info['TERRITORIES'])
+        if history[i].any()
+    ]
+    if not series:
+        # Tüm brick'lerde satış sıfır: eğitilecek seri yok
+        return None, None
+    
+    summary_rows = []
+    forecast_frames = []
+    
+    def collect(chunk_result):
+        rows, frames = chunk_result
+        summary_rows.extend(rows)
+        forecast_frames.extend(frames)
+    
+    with get_training_scheduler().slot(max_cpus=max_workers) as plan:
+        workers = min(len(series), plan.n_jobs) or 1
+        chunks = [series[i::workers] for i in range(workers)]
+        
+        try:
+            # spawn: Streamlit sunucusunun thread'leri fork ile kopyalanmaz
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = [
+                    executor.submit(_fit_brick_chunk, chunk, forecast_periods, timeout)
+                    for chunk in chunks if chunk
+                ]
+                for future in futures:
+                    collect(future.result())
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning("İstatistiksel model süreç havuzu kullanılamadı, seri çalışılıyor: %s", e)
+            summary_rows.clear()
+            forecast_frames.clear()
+            collect(_fit_brick_chunk(series, forecast_periods, timeout))
+    
+    summary = pd.DataFrame(summary_rows).merge(
+        brick_info[['TERRITORIES', 'CITY', 'REGION']],
+        on='TERRITORIES',
+        how='left'
+    )
+    summary = summary.sort_values('TERRITORIES').reset_index(drop=True)
+    
+    forecast_df = pd.concat(forecast_frames, ignore_index=True) if forecast_frames else pd.DataFrame()
+    
+    registry.put(registry_key, (summary, forecast_df))
+    
+    return summary, forecast_df
@@ -0,0 +1,169 @@
+"""⚙️ MODEL EĞİTİM ZAMANLAYICISI
+
+Paylaşılan uygulama sunucusunda model eğitimlerinin çekirdek kullanımını
+süreç genelinde sınırlar; aynı anda çalışan oturumlar birbirini
+aç bırakmaz.
+
+- İşçi havuzu: aynı anda en fazla `max_workers` eğitim çalışır, diğerleri
+  sıraya girer (FIFO; bütçesi dolu oturumun işi sıradakileri bekletmez)
+- Oturum CPU bütçesi: bir oturumun çalışan eğitimleri toplamda
+  `session_cpu_budget` çekirdeği aşamaz
+- Yük altında kademeli düşüş: kuyruk uzadığında Random Forest daha az
+  ağaçla eğitilir; yük kalktığında kayıtlı model warm start ile tamamlanır
+- Kuyruk derinliği, çalışan iş sayısı ve bekleme süreleri `stats()` ile izlenir
+
+Yapılandırma (ortam değişkenleri):
+    PORTFOY_TRAIN_WORKERS        Eşzamanlı eğitim sayısı (varsayılan: çekirdek / 2)
+    PORTFOY_SESSION_CPU_BUDGET   Oturum başına çekirdek (varsayılan: çekirdek / işçi)
+    PORTFOY_TRAIN_DEGRADE_DEPTH  Bu kuyruk derinliğinden itibaren ağaç sayısı azaltılır
+                                 (varsayılan: işçi sayısı)
+"""
+import contextvars
+import itertools
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+DEFAULT_SESSION = 'varsayılan'
+
+# Kuyruk derinliği eşiğinin katlarına göre ağaç oranı
+DEGRADE_TREE_FACTORS = [(2, 0.25), (1, 0.5)]
+
+TrainingPlan = namedtuple('TrainingPlan', ['n_jobs', 'tree_factor', 'degraded', 'wait_seconds'])
+
+_current_session = contextvars.ContextVar('training_session', default=DEFAULT_SESSION)
+
+def set_training_session(session_id):
+    """Bu thread / bağlamdaki eğitimlerin ait olduğu oturum"""
+    _current_session.set(session_id or DEFAULT_SESSION)
+
+def get_training_session():
+    return _current_session.get()
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+class TrainingScheduler:
+    """Süreç genelinde eğitim kuyruğu ve çekirdek bütçesi"""
+    
+    def __init__(self, max_workers=None, session_cpu_budget=None, degrade_depth=None, total_cpus=None):
+        self.total_cpus = total_cpus or os.cpu_count() or 1
+        self.max_workers = max_workers or _env_int('PORTFOY_TRAIN_WORKERS', max(1, self.total_cpus // 2))
+        self.session_cpu_budget = session_cpu_budget or _env_int(
+            'PORTFOY_SESSION_CPU_BUDGET', max(1, self.total_cpus // self.max_workers)
+        )
+        self.degrade_depth = degrade_depth or _env_int('PORTFOY_TRAIN_DEGRADE_DEPTH', self.max_workers)
+        
+        self._condition = threading.Condition()
+        self._queue = deque()
+        self._tickets = itertools.count()
+        self._running = 0
+        self._used_cpus = 0
+        self._session_cpus = {}
+        
+        self.completed = 0
+        self.degraded = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    def _allocation(self, session):
+        """Oturuma şu an verilebilecek çekirdek sayısı (0 = bekle)"""
+        if self._running >= self.max_workers:
+            return 0
+        session_free = self.session_cpu_budget - self._session_cpus.get(session, 0)
+        return max(0, min(session_free, self.total_cpus - self._used_cpus))
+    
+    def _tree_factor(self, queue_depth):
+        for multiple, factor in DEGRADE_TREE_FACTORS:
+            if queue_depth >= multiple * self.degrade_depth:
+                return factor
+        return 1.0
+    
+    def _admissible(self, ticket, session):
+        """Sıradaki ilk uygun iş bu mu (bütçesi dolu oturumlar atlanır)"""
+        for queued_ticket, queued_session in self._queue:
+            if self._allocation(queued_session) > 0:
+                return queued_ticket == ticket
+        return False
+    
+    @contextmanager
+    def slot(self, session=None, max_cpus=None):
+        """
+        Eğitim için sıra bekle ve çekirdek ayır
+        
+        Yields:
+            TrainingPlan: n_jobs (ayrılan çekirdek), tree_factor (ağaç oranı),
+            degraded, wait_seconds
+        """
+        session = session or get_training_session()
+        ticket = next(self._tickets)
+        start = time.perf_counter()
+        
+        with self._condition:
+            self._queue.append((ticket, session))
+            while not self._admissible(ticket, session):
+                self._condition.wait()
+            
+            self._queue.remove((ticket, session))
+            n_jobs = self._allocation(session)
+            if max_cpus:
+                n_jobs = min(n_jobs, max_cpus)
+            tree_factor = self._tree_factor(len(self._queue))
+            
+            self._running += 1
+            self._used_cpus += n_jobs
+            self._session_cpus[session] = self._session_cpus.get(session, 0) + n_jobs
+            
+            wait_seconds = time.perf_counter() - start
+            self.total_wait += wait_seconds
+            self.max_wait = max(self.max_wait, wait_seconds)
+            if tree_factor < 1.0:
+                self.degraded += 1
+        
+        try:
+            yield TrainingPlan(n_jobs, tree_factor, tree_factor < 1.0, wait_seconds)
+        finally:
+            with self._condition:
+                self._running -= 1
+                self._used_cpus -= n_jobs
+                self._session_cpus[session] -= n_jobs
+                if not self._session_cpus[session]:
+                    del self._session_cpus[session]
+                self.completed += 1
+                self._condition.notify_all()
+    
+    def is_idle(self):
+        """Bekleyen iş yok (tam kapasite eğitim yapılabilir)"""
+        with self._condition:
+            return not self._queue
+    
+    def stats(self):
+        """Kuyruk derinliği, çalışan iş, çekirdek kullanımı ve bekleme süreleri"""
+        with self._condition:
+            finished = self.completed + self._running
+            return {
+                'queue_depth': len(self._queue),
+                'running': self._running,
+                'max_workers': self.max_workers,
+                'used_cpus': self._used_cpus,
+                'total_cpus': self.total_cpus,
+                'session_cpu_budget': self.session_cpu_budget,
+                'completed': self.completed,
+                'degraded': self.degraded,
+                'avg_wait_seconds': self.total_wait / finished if finished else 0.0,
+                'max_wait_seconds': self.max_wait
+            }
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+def get_training_scheduler():
+    """Süreç genelinde paylaşılan varsayılan zamanlayıcı"""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = TrainingScheduler()
+        return _default_scheduler